@@ -0,0 +1,42 @@
+"""Add natural key unique constraint to cost_data
+
+Revision ID: 9f73a5d10f32
+Revises: 094c8a33f26b
+Create Date: 2025-11-20 10:15:42.118903
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9f73a5d10f32'
+down_revision = '094c8a33f26b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Remove duplicates left behind by the old select-then-insert ingestion,
+    # keeping the most recently written row for each key
+    op.execute("""
+        DELETE FROM cost_data a
+        USING cost_data b
+        WHERE a.aws_account_id = b.aws_account_id
+          AND a.date = b.date
+          AND a.service = b.service
+          AND a.region IS NOT DISTINCT FROM b.region
+          AND a.usage_type IS NOT DISTINCT FROM b.usage_type
+          AND (COALESCE(a.updated_at, a.created_at), a.id::text)
+            < (COALESCE(b.updated_at, b.created_at), b.id::text)
+    """)
+
+    op.create_unique_constraint(
+        'uq_cost_data_account_date_service_region_usage',
+        'cost_data',
+        ['aws_account_id', 'date', 'service', 'region', 'usage_type'],
+        postgresql_nulls_not_distinct=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_cost_data_account_date_service_region_usage', 'cost_data', type_='unique')
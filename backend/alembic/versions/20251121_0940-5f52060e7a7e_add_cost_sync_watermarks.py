@@ -0,0 +1,26 @@
+"""Add cost sync watermarks to aws_accounts
+
+Revision ID: 5f52060e7a7e
+Revises: 9f73a5d10f32
+Create Date: 2025-11-21 09:40:18.552031
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5f52060e7a7e'
+down_revision = '9f73a5d10f32'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('aws_accounts', sa.Column('cost_synced_from', sa.Date(), nullable=True))
+    op.add_column('aws_accounts', sa.Column('cost_watermark_date', sa.Date(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('aws_accounts', 'cost_watermark_date')
+    op.drop_column('aws_accounts', 'cost_synced_from')
@@ -0,0 +1,58 @@
+"""Add sync_jobs table for the background job queue
+
+Revision ID: f1399948f329
+Revises: 5f52060e7a7e
+Create Date: 2025-11-22 11:05:37.904412
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1399948f329'
+down_revision = '5f52060e7a7e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'sync_jobs',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('tenant_id', sa.UUID(), nullable=False),
+        sa.Column('job_type', sa.String(), nullable=False),
+        sa.Column('account_id', sa.UUID(), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=True),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('run_after', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('locked_by', sa.String(), nullable=True),
+        sa.Column('locked_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_error', sa.String(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'uq_sync_jobs_in_flight', 'sync_jobs', ['job_type', 'account_id'],
+        unique=True,
+        postgresql_where=sa.text("status IN ('queued', 'running')")
+    )
+    op.create_index(
+        'idx_sync_jobs_dequeue', 'sync_jobs', ['run_after'],
+        unique=False,
+        postgresql_where=sa.text("status = 'queued'")
+    )
+    op.create_index('idx_sync_jobs_tenant_created', 'sync_jobs', ['tenant_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_sync_jobs_tenant_created', table_name='sync_jobs')
+    op.drop_index('idx_sync_jobs_dequeue', table_name='sync_jobs')
+    op.drop_index('uq_sync_jobs_in_flight', table_name='sync_jobs')
+    op.drop_table('sync_jobs')
@@ -0,0 +1,47 @@
+"""Add cost_tag_data table for cost allocation tag breakdowns
+
+Revision ID: 6b2e81c4d9a7
+Revises: f1399948f329
+Create Date: 2025-11-23 10:20:44.183927
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6b2e81c4d9a7'
+down_revision = 'f1399948f329'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'cost_tag_data',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('tenant_id', sa.UUID(), nullable=False),
+        sa.Column('aws_account_id', sa.UUID(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('tag_key', sa.String(), nullable=False),
+        sa.Column('tag_value', sa.String(), nullable=False),
+        sa.Column('cost', sa.Float(), nullable=False),
+        sa.Column('currency', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['aws_account_id'], ['aws_accounts.id'], ),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'aws_account_id', 'date', 'tag_key', 'tag_value',
+            name='uq_cost_tag_data_account_date_key_value'
+        )
+    )
+    op.create_index('idx_cost_tag_tenant_key_date', 'cost_tag_data', ['tenant_id', 'tag_key', 'date'], unique=False)
+    op.create_index('idx_cost_tag_account_key_date', 'cost_tag_data', ['aws_account_id', 'tag_key', 'date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_cost_tag_account_key_date', table_name='cost_tag_data')
+    op.drop_index('idx_cost_tag_tenant_key_date', table_name='cost_tag_data')
+    op.drop_table('cost_tag_data')
@@ -0,0 +1,93 @@
+"""Add CUR ingestion manifest and include tags in the cost_data natural key
+
+Revision ID: a83c0d27e5b1
+Revises: 6b2e81c4d9a7
+Create Date: 2025-11-24 09:15:06.274519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'a83c0d27e5b1'
+down_revision = '6b2e81c4d9a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CUR line items differ by resource tags, so tags become part of the key
+    op.execute("UPDATE cost_data SET tags = '{}'::jsonb WHERE tags IS NULL")
+    op.alter_column(
+        'cost_data', 'tags',
+        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+        nullable=False,
+        server_default=sa.text("'{}'::jsonb")
+    )
+    op.drop_constraint('uq_cost_data_account_date_service_region_usage', 'cost_data', type_='unique')
+    op.create_unique_constraint(
+        'uq_cost_data_account_date_service_region_usage_tags',
+        'cost_data',
+        ['aws_account_id', 'date', 'service', 'region', 'usage_type', 'tags'],
+        postgresql_nulls_not_distinct=True
+    )
+
+    op.create_table(
+        'cur_ingest_files',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('tenant_id', sa.UUID(), nullable=False),
+        sa.Column('aws_account_id', sa.UUID(), nullable=False),
+        sa.Column('path', sa.String(), nullable=False),
+        sa.Column('billing_period', sa.String(), nullable=False),
+        sa.Column('fingerprint', sa.String(), nullable=False),
+        sa.Column('rows_ingested', sa.BigInteger(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('last_error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['aws_account_id'], ['aws_accounts.id'], ),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('aws_account_id', 'path', name='uq_cur_ingest_files_account_path')
+    )
+    op.create_index(
+        'idx_cur_ingest_files_account_period', 'cur_ingest_files', ['aws_account_id', 'billing_period'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_cur_ingest_files_account_period', table_name='cur_ingest_files')
+    op.drop_table('cur_ingest_files')
+
+    # Collapse rows that now differ only by tags back onto the old key
+    op.execute("""
+        WITH collapsed AS (
+            DELETE FROM cost_data
+            WHERE tags <> '{}'::jsonb
+            RETURNING tenant_id, aws_account_id, date, service, region, usage_type, cost, currency
+        )
+        INSERT INTO cost_data (id, tenant_id, aws_account_id, date, service, region, usage_type, tags, cost, currency)
+        SELECT gen_random_uuid(), tenant_id, aws_account_id, date, service, region, usage_type, '{}'::jsonb,
+               sum(cost), max(currency)
+        FROM collapsed
+        GROUP BY tenant_id, aws_account_id, date, service, region, usage_type
+        ON CONFLICT (aws_account_id, date, service, region, usage_type, tags)
+        DO UPDATE SET cost = cost_data.cost + EXCLUDED.cost
+    """)
+    op.drop_constraint('uq_cost_data_account_date_service_region_usage_tags', 'cost_data', type_='unique')
+    op.create_unique_constraint(
+        'uq_cost_data_account_date_service_region_usage',
+        'cost_data',
+        ['aws_account_id', 'date', 'service', 'region', 'usage_type'],
+        postgresql_nulls_not_distinct=True
+    )
+    op.alter_column(
+        'cost_data', 'tags',
+        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+        nullable=True,
+        server_default=None
+    )
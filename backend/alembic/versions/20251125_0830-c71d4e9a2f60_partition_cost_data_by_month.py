@@ -0,0 +1,133 @@
+"""Partition cost_data by month on date
+
+Revision ID: c71d4e9a2f60
+Revises: a83c0d27e5b1
+Create Date: 2025-11-25 08:30:51.640218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c71d4e9a2f60'
+down_revision = 'a83c0d27e5b1'
+branch_labels = None
+depends_on = None
+
+COLUMNS = "id, tenant_id, aws_account_id, date, service, region, usage_type, tags, cost, currency, created_at, updated_at"
+
+INDEXES = {
+    'idx_cost_tenant_date': ['tenant_id', 'date'],
+    'idx_cost_account_date': ['aws_account_id', 'date'],
+    'idx_cost_service': ['service'],
+    'idx_cost_date': ['date'],
+}
+
+
+def cost_data_columns():
+    # Constraint names are explicit: partitions keep their own copies of the
+    # parent's foreign keys, so generated names would not match across versions
+    return [
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('tenant_id', sa.UUID(), nullable=False),
+        sa.Column('aws_account_id', sa.UUID(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('service', sa.String(), nullable=False),
+        sa.Column('region', sa.String(), nullable=True),
+        sa.Column('usage_type', sa.String(), nullable=True),
+        sa.Column('tags', postgresql.JSONB(astext_type=sa.Text()), server_default=sa.text("'{}'::jsonb"), nullable=False),
+        sa.Column('cost', sa.Float(), nullable=False),
+        sa.Column('currency', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['aws_account_id'], ['aws_accounts.id'], name='cost_data_aws_account_id_fkey'),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], name='cost_data_tenant_id_fkey'),
+    ]
+
+
+def rename_legacy_table() -> None:
+    """Move the current table and its index/constraint names out of the way"""
+    op.rename_table('cost_data', 'cost_data_legacy')
+    op.execute("ALTER TABLE cost_data_legacy RENAME CONSTRAINT cost_data_pkey TO cost_data_legacy_pkey")
+    op.execute(
+        "ALTER TABLE cost_data_legacy RENAME CONSTRAINT uq_cost_data_account_date_service_region_usage_tags "
+        "TO uq_cost_data_legacy_natural_key"
+    )
+    op.execute("ALTER TABLE cost_data_legacy RENAME CONSTRAINT cost_data_tenant_id_fkey TO cost_data_legacy_tenant_id_fkey")
+    op.execute(
+        "ALTER TABLE cost_data_legacy RENAME CONSTRAINT cost_data_aws_account_id_fkey "
+        "TO cost_data_legacy_aws_account_id_fkey"
+    )
+    for index_name in INDEXES:
+        op.drop_index(index_name, table_name='cost_data_legacy')
+
+
+def upgrade() -> None:
+    rename_legacy_table()
+
+    # Primary and unique keys of a partitioned table must include the partition key
+    op.create_table(
+        'cost_data',
+        *cost_data_columns(),
+        sa.PrimaryKeyConstraint('id', 'date', name='cost_data_pkey'),
+        sa.UniqueConstraint(
+            'aws_account_id', 'date', 'service', 'region', 'usage_type', 'tags',
+            name='uq_cost_data_account_date_service_region_usage_tags',
+            postgresql_nulls_not_distinct=True
+        ),
+        postgresql_partition_by='RANGE (date)'
+    )
+    # Indexes on the parent are created on every partition
+    for index_name, columns in INDEXES.items():
+        op.create_index(index_name, 'cost_data', columns, unique=False)
+
+    # One partition per month covering existing data, plus the next three months
+    op.execute("""
+        DO $$
+        DECLARE
+            month_start date;
+            last_month date;
+        BEGIN
+            SELECT date_trunc('month', coalesce(min(date), current_date))::date,
+                   (date_trunc('month', greatest(coalesce(max(date), current_date), current_date))
+                    + interval '3 months')::date
+            INTO month_start, last_month
+            FROM cost_data_legacy;
+
+            WHILE month_start <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I PARTITION OF cost_data FOR VALUES FROM (%L) TO (%L)',
+                    'cost_data_p' || to_char(month_start, 'YYYY_MM'),
+                    month_start,
+                    (month_start + interval '1 month')::date
+                );
+                month_start := (month_start + interval '1 month')::date;
+            END LOOP;
+        END $$
+    """)
+
+    op.execute(f"INSERT INTO cost_data ({COLUMNS}) SELECT {COLUMNS} FROM cost_data_legacy")
+    op.drop_table('cost_data_legacy')
+
+
+def downgrade() -> None:
+    rename_legacy_table()
+
+    op.create_table(
+        'cost_data',
+        *cost_data_columns(),
+        sa.PrimaryKeyConstraint('id', name='cost_data_pkey'),
+        sa.UniqueConstraint(
+            'aws_account_id', 'date', 'service', 'region', 'usage_type', 'tags',
+            name='uq_cost_data_account_date_service_region_usage_tags',
+            postgresql_nulls_not_distinct=True
+        )
+    )
+    for index_name, columns in INDEXES.items():
+        op.create_index(index_name, 'cost_data', columns, unique=False)
+
+    op.execute(f"INSERT INTO cost_data ({COLUMNS}) SELECT {COLUMNS} FROM cost_data_legacy")
+    # Drops every partition with it
+    op.drop_table('cost_data_legacy')
@@ -0,0 +1,92 @@
+"""Dictionary-encode cost_data service, region and usage_type
+
+Revision ID: 4f9a7d2c1e83
+Revises: c71d4e9a2f60
+Create Date: 2025-11-26 10:45:12.318604
+
+The UPDATE rewrites every cost_data row; run VACUUM FULL cost_data (or
+pg_repack) afterwards to return the space of the dropped text columns.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f9a7d2c1e83'
+down_revision = 'c71d4e9a2f60'
+branch_labels = None
+depends_on = None
+
+# Dimension table, cost_data name column, cost_data id column, id type
+DIMENSIONS = [
+    ('cost_services', 'service', 'service_id', sa.SmallInteger()),
+    ('cost_regions', 'region', 'region_id', sa.SmallInteger()),
+    ('cost_usage_types', 'usage_type', 'usage_type_id', sa.Integer()),
+]
+
+
+def upgrade() -> None:
+    for table_name, name_column, id_column, id_type in DIMENSIONS:
+        op.create_table(
+            table_name,
+            sa.Column('id', id_type, sa.Identity(), nullable=False),
+            sa.Column('name', sa.String(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('name')
+        )
+        op.execute(
+            f"INSERT INTO {table_name} (name) "
+            f"SELECT DISTINCT {name_column} FROM cost_data WHERE {name_column} IS NOT NULL ORDER BY 1"
+        )
+        op.add_column('cost_data', sa.Column(id_column, id_type, nullable=True))
+
+    op.execute("""
+        UPDATE cost_data SET
+            service_id = (SELECT id FROM cost_services WHERE name = cost_data.service),
+            region_id = (SELECT id FROM cost_regions WHERE name = cost_data.region),
+            usage_type_id = (SELECT id FROM cost_usage_types WHERE name = cost_data.usage_type)
+    """)
+    op.alter_column('cost_data', 'service_id', nullable=False)
+
+    op.drop_constraint('uq_cost_data_account_date_service_region_usage_tags', 'cost_data', type_='unique')
+    op.drop_index('idx_cost_service', table_name='cost_data')
+    for table_name, name_column, id_column, id_type in DIMENSIONS:
+        op.drop_column('cost_data', name_column)
+        op.create_foreign_key(f'cost_data_{id_column}_fkey', 'cost_data', table_name, [id_column], ['id'])
+
+    op.create_unique_constraint(
+        'uq_cost_data_account_date_service_region_usage_tags',
+        'cost_data',
+        ['aws_account_id', 'date', 'service_id', 'region_id', 'usage_type_id', 'tags'],
+        postgresql_nulls_not_distinct=True
+    )
+    op.create_index('idx_cost_service', 'cost_data', ['service_id'], unique=False)
+
+
+def downgrade() -> None:
+    for table_name, name_column, id_column, id_type in DIMENSIONS:
+        op.add_column('cost_data', sa.Column(name_column, sa.String(), nullable=True))
+
+    op.execute("""
+        UPDATE cost_data SET
+            service = (SELECT name FROM cost_services WHERE id = cost_data.service_id),
+            region = (SELECT name FROM cost_regions WHERE id = cost_data.region_id),
+            usage_type = (SELECT name FROM cost_usage_types WHERE id = cost_data.usage_type_id)
+    """)
+    op.alter_column('cost_data', 'service', nullable=False)
+
+    op.drop_constraint('uq_cost_data_account_date_service_region_usage_tags', 'cost_data', type_='unique')
+    op.drop_index('idx_cost_service', table_name='cost_data')
+    for table_name, name_column, id_column, id_type in DIMENSIONS:
+        op.drop_constraint(f'cost_data_{id_column}_fkey', 'cost_data', type_='foreignkey')
+        op.drop_column('cost_data', id_column)
+        op.drop_table(table_name)
+
+    op.create_unique_constraint(
+        'uq_cost_data_account_date_service_region_usage_tags',
+        'cost_data',
+        ['aws_account_id', 'date', 'service', 'region', 'usage_type', 'tags'],
+        postgresql_nulls_not_distinct=True
+    )
+    op.create_index('idx_cost_service', 'cost_data', ['service'], unique=False)
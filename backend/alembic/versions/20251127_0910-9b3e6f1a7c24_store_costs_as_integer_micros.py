@@ -0,0 +1,48 @@
+"""Store costs as integer micro-units
+
+Revision ID: 9b3e6f1a7c24
+Revises: 4f9a7d2c1e83
+Create Date: 2025-11-27 09:10:37.905117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b3e6f1a7c24'
+down_revision = '4f9a7d2c1e83'
+branch_labels = None
+depends_on = None
+
+# Table, float column, micros column
+COST_COLUMNS = [
+    ('cost_data', 'cost', 'cost_micros'),
+    ('cost_tag_data', 'cost', 'cost_micros'),
+    ('cost_summaries', 'total_cost', 'total_cost_micros'),
+]
+
+
+def upgrade() -> None:
+    # One rewrite per table; the numeric cast rounds the float's decimal value half away from zero
+    for table_name, float_column, micros_column in COST_COLUMNS:
+        op.alter_column(
+            table_name,
+            float_column,
+            new_column_name=micros_column,
+            type_=sa.BigInteger(),
+            existing_nullable=False,
+            postgresql_using=f"round({float_column}::numeric * 1000000)::bigint"
+        )
+
+
+def downgrade() -> None:
+    for table_name, float_column, micros_column in COST_COLUMNS:
+        op.alter_column(
+            table_name,
+            micros_column,
+            new_column_name=float_column,
+            type_=sa.Float(),
+            existing_nullable=False,
+            postgresql_using=f"{micros_column}::double precision / 1000000"
+        )
@@ -0,0 +1,83 @@
+"""Key cost_summaries by service id and backfill the rollups
+
+Revision ID: e25b8c4d7a19
+Revises: 9b3e6f1a7c24
+Create Date: 2025-11-28 09:40:21.547730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e25b8c4d7a19'
+down_revision = '9b3e6f1a7c24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The table was never written to, so there is nothing to convert
+    op.execute("DELETE FROM cost_summaries")
+    op.drop_index('idx_summary_tenant_period', table_name='cost_summaries')
+    op.drop_index('idx_summary_account_period', table_name='cost_summaries')
+    op.drop_column('cost_summaries', 'service')
+    op.add_column('cost_summaries', sa.Column('service_id', sa.SmallInteger(), nullable=True))
+    op.create_foreign_key(
+        'cost_summaries_service_id_fkey', 'cost_summaries', 'cost_services', ['service_id'], ['id']
+    )
+    op.create_unique_constraint(
+        'uq_cost_summary_account_type_start_service',
+        'cost_summaries',
+        ['aws_account_id', 'period_type', 'period_start', 'service_id'],
+        postgresql_nulls_not_distinct=True
+    )
+    op.create_index(
+        'idx_summary_tenant_type_start', 'cost_summaries', ['tenant_id', 'period_type', 'period_start'], unique=False
+    )
+
+    # Daily rows per service plus the account total, then weeks and months from the days
+    op.execute("""
+        INSERT INTO cost_summaries (
+            id, tenant_id, aws_account_id, period_start, period_end, period_type,
+            total_cost_micros, service_id, currency
+        )
+        SELECT gen_random_uuid(), tenant_id, aws_account_id, date, date, 'daily',
+               sum(cost_micros), service_id, max(currency)
+        FROM cost_data
+        GROUP BY GROUPING SETS (
+            (tenant_id, aws_account_id, date, service_id),
+            (tenant_id, aws_account_id, date)
+        )
+    """)
+    for period_type, unit in (('weekly', 'week'), ('monthly', 'month')):
+        op.execute(f"""
+            INSERT INTO cost_summaries (
+                id, tenant_id, aws_account_id, period_start, period_end, period_type,
+                total_cost_micros, service_id, currency
+            )
+            SELECT gen_random_uuid(), tenant_id, aws_account_id, period,
+                   (period + interval '1 {unit}' - interval '1 day')::date,
+                   '{period_type}', sum(total_cost_micros), service_id, max(currency)
+            FROM (
+                SELECT *, date_trunc('{unit}', period_start)::date AS period
+                FROM cost_summaries
+                WHERE period_type = 'daily'
+            ) AS days
+            GROUP BY tenant_id, aws_account_id, period, service_id
+        """)
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM cost_summaries")
+    op.drop_index('idx_summary_tenant_type_start', table_name='cost_summaries')
+    op.drop_constraint('uq_cost_summary_account_type_start_service', 'cost_summaries', type_='unique')
+    op.drop_constraint('cost_summaries_service_id_fkey', 'cost_summaries', type_='foreignkey')
+    op.drop_column('cost_summaries', 'service_id')
+    op.add_column('cost_summaries', sa.Column('service', sa.String(), nullable=True))
+    op.create_index(
+        'idx_summary_account_period', 'cost_summaries', ['aws_account_id', 'period_start', 'period_end'], unique=False
+    )
+    op.create_index(
+        'idx_summary_tenant_period', 'cost_summaries', ['tenant_id', 'period_start', 'period_end'], unique=False
+    )
@@ -0,0 +1,40 @@
+"""Add cost_rollup_dirty_ranges
+
+Revision ID: b6d14f7e9a30
+Revises: e25b8c4d7a19
+Create Date: 2025-11-29 11:20:48.116392
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d14f7e9a30'
+down_revision = 'e25b8c4d7a19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'cost_rollup_dirty_ranges',
+        sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('aws_account_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('start_date', sa.Date(), nullable=False),
+        sa.Column('end_date', sa.Date(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['aws_account_id'], ['aws_accounts.id'], ),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_rollup_dirty_account', 'cost_rollup_dirty_ranges', ['aws_account_id'], unique=False)
+    op.create_index('idx_rollup_dirty_tenant', 'cost_rollup_dirty_ranges', ['tenant_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_rollup_dirty_tenant', table_name='cost_rollup_dirty_ranges')
+    op.drop_index('idx_rollup_dirty_account', table_name='cost_rollup_dirty_ranges')
+    op.drop_table('cost_rollup_dirty_ranges')
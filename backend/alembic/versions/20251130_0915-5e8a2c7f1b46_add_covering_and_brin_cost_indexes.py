@@ -0,0 +1,55 @@
+"""Add covering and BRIN cost indexes
+
+Revision ID: 5e8a2c7f1b46
+Revises: b6d14f7e9a30
+Create Date: 2025-11-30 09:15:03.642958
+
+Index-only scans need the visibility map; run VACUUM ANALYZE cost_data
+after upgrading instead of waiting for autovacuum.
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8a2c7f1b46'
+down_revision = 'b6d14f7e9a30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_index('idx_cost_date', table_name='cost_data')
+    op.drop_index('idx_cost_service', table_name='cost_data')
+    op.drop_index('idx_cost_tenant_date', table_name='cost_data')
+    op.drop_index('idx_cost_account_date', table_name='cost_data')
+    op.create_index(
+        'idx_cost_tenant_date', 'cost_data', ['tenant_id', 'date'], unique=False,
+        postgresql_include=['aws_account_id', 'service_id', 'region_id', 'cost_micros']
+    )
+    op.create_index(
+        'idx_cost_account_date', 'cost_data', ['aws_account_id', 'date'], unique=False,
+        postgresql_include=['tenant_id', 'service_id', 'region_id', 'cost_micros']
+    )
+    op.create_index('idx_cost_date_brin', 'cost_data', ['date'], unique=False, postgresql_using='brin')
+
+    op.drop_index('idx_summary_tenant_type_start', table_name='cost_summaries')
+    op.create_index(
+        'idx_summary_tenant_type_start', 'cost_summaries', ['tenant_id', 'period_type', 'period_start'], unique=False,
+        postgresql_include=['aws_account_id', 'service_id', 'total_cost_micros']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_summary_tenant_type_start', table_name='cost_summaries')
+    op.create_index(
+        'idx_summary_tenant_type_start', 'cost_summaries', ['tenant_id', 'period_type', 'period_start'], unique=False
+    )
+
+    op.drop_index('idx_cost_date_brin', table_name='cost_data')
+    op.drop_index('idx_cost_account_date', table_name='cost_data')
+    op.drop_index('idx_cost_tenant_date', table_name='cost_data')
+    op.create_index('idx_cost_account_date', 'cost_data', ['aws_account_id', 'date'], unique=False)
+    op.create_index('idx_cost_tenant_date', 'cost_data', ['tenant_id', 'date'], unique=False)
+    op.create_index('idx_cost_service', 'cost_data', ['service_id'], unique=False)
+    op.create_index('idx_cost_date', 'cost_data', ['date'], unique=False)
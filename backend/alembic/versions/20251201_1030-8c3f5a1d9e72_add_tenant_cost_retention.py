@@ -0,0 +1,26 @@
+"""Add tenant cost retention columns
+
+Revision ID: 8c3f5a1d9e72
+Revises: 5e8a2c7f1b46
+Create Date: 2025-12-01 10:30:55.204817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c3f5a1d9e72'
+down_revision = '5e8a2c7f1b46'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('tenants', sa.Column('cost_retention_months', sa.Integer(), nullable=True))
+    op.add_column('tenants', sa.Column('cost_downsampled_before', sa.Date(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('tenants', 'cost_downsampled_before')
+    op.drop_column('tenants', 'cost_retention_months')
@@ -0,0 +1,23 @@
+"""Add GIN index on cost_data.tags
+
+Revision ID: 3a7e9d2b5c18
+Revises: 8c3f5a1d9e72
+Create Date: 2025-12-02 08:45:19.730264
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3a7e9d2b5c18'
+down_revision = '8c3f5a1d9e72'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('idx_cost_tags', 'cost_data', ['tags'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('idx_cost_tags', table_name='cost_data')
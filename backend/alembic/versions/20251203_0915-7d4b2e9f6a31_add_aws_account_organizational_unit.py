@@ -0,0 +1,24 @@
+"""Add organizational unit to AWS accounts
+
+Revision ID: 7d4b2e9f6a31
+Revises: 3a7e9d2b5c18
+Create Date: 2025-12-03 09:15:42.318604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d4b2e9f6a31'
+down_revision = '3a7e9d2b5c18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('aws_accounts', sa.Column('organizational_unit', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('aws_accounts', 'organizational_unit')
@@ -0,0 +1,26 @@
+"""Add tenant cost data version
+
+Revision ID: c61f0e8b2d47
+Revises: 7d4b2e9f6a31
+Create Date: 2025-12-04 11:10:07.635192
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c61f0e8b2d47'
+down_revision = '7d4b2e9f6a31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'tenants', sa.Column('cost_data_version', sa.BigInteger(), server_default=sa.text('0'), nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('tenants', 'cost_data_version')
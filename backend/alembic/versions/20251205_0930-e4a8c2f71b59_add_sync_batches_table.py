@@ -0,0 +1,37 @@
+"""Add sync_batches table for sync-all progress
+
+Revision ID: e4a8c2f71b59
+Revises: c61f0e8b2d47
+Create Date: 2025-12-05 09:30:18.402716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a8c2f71b59'
+down_revision = 'c61f0e8b2d47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'sync_batches',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('tenant_id', sa.UUID(), nullable=False),
+        sa.Column('start_date', sa.Date(), nullable=False),
+        sa.Column('end_date', sa.Date(), nullable=False),
+        sa.Column('job_ids', sa.JSON(), nullable=False),
+        sa.Column('skipped', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sync_batches_tenant_id'), 'sync_batches', ['tenant_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_sync_batches_tenant_id'), table_name='sync_batches')
+    op.drop_table('sync_batches')
@@ -0,0 +1,46 @@
+"""Key cost_data on an md5 of its tags instead of the tags themselves
+
+Revision ID: 5b9e1d7c3a26
+Revises: e4a8c2f71b59
+Create Date: 2025-12-06 09:40:51.318264
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b9e1d7c3a26'
+down_revision = 'e4a8c2f71b59'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # A btree entry holding a large tags object can exceed the index row size
+    # and fail a whole bulk merge; the 16-byte hash never does. jsonb::text is
+    # canonical (sorted keys, fixed spacing), so equal tags hash equally.
+    op.add_column(
+        'cost_data',
+        sa.Column('tags_hash', sa.UUID(), sa.Computed("md5(tags::text)::uuid", persisted=True), nullable=False)
+    )
+    op.drop_constraint('uq_cost_data_account_date_service_region_usage_tags', 'cost_data', type_='unique')
+    op.create_unique_constraint(
+        'uq_cost_data_account_date_service_region_usage_tags',
+        'cost_data',
+        ['aws_account_id', 'date', 'service_id', 'region_id', 'usage_type_id', 'tags_hash'],
+        postgresql_nulls_not_distinct=True
+    )
+    # Fresh statistics for the rebuilt index, so the planner keeps choosing the covering ones
+    op.execute("ANALYZE cost_data")
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_cost_data_account_date_service_region_usage_tags', 'cost_data', type_='unique')
+    op.create_unique_constraint(
+        'uq_cost_data_account_date_service_region_usage_tags',
+        'cost_data',
+        ['aws_account_id', 'date', 'service_id', 'region_id', 'usage_type_id', 'tags'],
+        postgresql_nulls_not_distinct=True
+    )
+    op.drop_column('cost_data', 'tags_hash')
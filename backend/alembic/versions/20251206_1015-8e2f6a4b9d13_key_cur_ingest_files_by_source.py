@@ -0,0 +1,63 @@
+"""Key CUR file progress by tenant and export directory
+
+Revision ID: 8e2f6a4b9d13
+Revises: 5b9e1d7c3a26
+Create Date: 2025-12-06 10:15:27.904135
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e2f6a4b9d13'
+down_revision = '5b9e1d7c3a26'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Files sit below <source>/.../<billing period>/
+    op.add_column('cur_ingest_files', sa.Column('source', sa.String(), nullable=True))
+    op.execute("""
+        UPDATE cur_ingest_files
+        SET source = left(path, strpos(path, '/' || billing_period || '/') - 1)
+    """)
+    op.alter_column('cur_ingest_files', 'source', nullable=False)
+
+    # A file ingested by several accounts had its rows loaded more than once.
+    # Keep one record and give its period a fingerprint no file has, so the
+    # next ingest deletes the period and loads it again.
+    op.execute("""
+        WITH duplicated AS (
+            DELETE FROM cur_ingest_files f
+            USING cur_ingest_files keep
+            WHERE f.tenant_id = keep.tenant_id
+              AND f.path = keep.path
+              AND (f.created_at, f.id::text) > (keep.created_at, keep.id::text)
+            RETURNING f.tenant_id, f.source, f.billing_period
+        )
+        UPDATE cur_ingest_files f
+        SET fingerprint = 'restated'
+        FROM duplicated d
+        WHERE f.tenant_id = d.tenant_id AND f.source = d.source AND f.billing_period = d.billing_period
+    """)
+
+    op.drop_index('idx_cur_ingest_files_account_period', table_name='cur_ingest_files')
+    op.drop_constraint('uq_cur_ingest_files_account_path', 'cur_ingest_files', type_='unique')
+    op.create_unique_constraint('uq_cur_ingest_files_tenant_path', 'cur_ingest_files', ['tenant_id', 'path'])
+    op.create_index(
+        'idx_cur_ingest_files_source_period', 'cur_ingest_files', ['tenant_id', 'source', 'billing_period'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_cur_ingest_files_source_period', table_name='cur_ingest_files')
+    op.drop_constraint('uq_cur_ingest_files_tenant_path', 'cur_ingest_files', type_='unique')
+    op.create_unique_constraint('uq_cur_ingest_files_account_path', 'cur_ingest_files', ['aws_account_id', 'path'])
+    op.create_index(
+        'idx_cur_ingest_files_account_period', 'cur_ingest_files', ['aws_account_id', 'billing_period'],
+        unique=False
+    )
+    op.drop_column('cur_ingest_files', 'source')
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Literal
 from datetime import datetime
 import uuid
 
@@ -9,6 +9,9 @@ from app.core.deps import get_current_user, get_current_tenant
 from app.models.user import User
 from app.models.tenant import Tenant
 from app.models.aws_account import AWSAccount
+from app.models.sync_job import SyncJobType
+from app.services.job_queue import JobQueue
+from app.services.result_cache import bump_cost_data_version
 from pydantic import BaseModel
 from typing import Optional
 
@@ -21,6 +24,18 @@ class AWSAccountCreate(BaseModel):
     role_arn: str
     external_id: Optional[str] = None
     region: str = "us-east-1"
+    organizational_unit: Optional[str] = None  # AWS Organizations OU, for grouping costs
+    cost_allocation_tags: Optional[List[str]] = None  # Defaults to COST_ALLOCATION_TAG_KEYS
+    cost_source: Literal["ce", "cur"] = "ce"  # Cost Explorer API or Cost and Usage Report exports
+    payer_account_id: Optional[str] = None  # Payer (management) account; a linked CUR account's rows come from its CUR
+
+
+class CostAllocationTagsUpdate(BaseModel):
+    tag_keys: List[str]
+
+
+class OrganizationalUnitUpdate(BaseModel):
+    organizational_unit: Optional[str] = None
 
 
 class AWSAccountResponse(BaseModel):
@@ -29,6 +44,7 @@ class AWSAccountResponse(BaseModel):
     account_name: Optional[str]
     role_arn: str
     region: str
+    organizational_unit: Optional[str] = None
     is_active: bool
     sync_status: str
     last_sync_at: Optional[datetime]
@@ -59,6 +75,14 @@ async def link_aws_account(
             detail="AWS account already linked to this tenant"
         )
 
+    config_data = {}
+    if account_data.cost_allocation_tags is not None:
+        config_data["cost_allocation_tags"] = account_data.cost_allocation_tags
+    if account_data.cost_source != "ce":
+        config_data["cost_source"] = account_data.cost_source
+    if account_data.payer_account_id:
+        config_data["payer_account_id"] = account_data.payer_account_id
+
     # Create new AWS account
     new_account = AWSAccount(
         id=uuid.uuid4(),
@@ -68,11 +92,15 @@ async def link_aws_account(
         role_arn=account_data.role_arn,
         external_id=account_data.external_id,
         region=account_data.region,
+        organizational_unit=account_data.organizational_unit,
         is_active=True,
-        sync_status="pending"
+        sync_status="pending",
+        config_data=config_data or None
     )
 
     db.add(new_account)
+    # Multi-account results list every active account
+    bump_cost_data_version(db, [current_tenant.id])
     db.commit()
     db.refresh(new_account)
 
@@ -117,14 +145,81 @@ async def get_aws_account(
     return account
 
 
+@router.put("/{account_id}/cost-allocation-tags")
+async def update_cost_allocation_tags(
+    account_id: uuid.UUID,
+    tags_data: CostAllocationTagsUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant)
+):
+    """Set the cost allocation tag keys ingested for an AWS account"""
+
+    account = db.query(AWSAccount).filter(
+        AWSAccount.id == account_id,
+        AWSAccount.tenant_id == current_tenant.id
+    ).first()
+
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="AWS account not found"
+        )
+
+    tag_keys = list(dict.fromkeys(key.strip() for key in tags_data.tag_keys if key.strip()))
+
+    # Reassign so SQLAlchemy notices the JSON change
+    account.config_data = {**(account.config_data or {}), "cost_allocation_tags": tag_keys}
+    bump_cost_data_version(db, [current_tenant.id])
+    db.commit()
+
+    return {
+        "account_id": str(account_id),
+        "cost_allocation_tags": tag_keys
+    }
+
+
+@router.put("/{account_id}/organizational-unit")
+async def update_organizational_unit(
+    account_id: uuid.UUID,
+    ou_data: OrganizationalUnitUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant)
+):
+    """Set the AWS Organizations OU an AWS account's costs are grouped under"""
+
+    account = db.query(AWSAccount).filter(
+        AWSAccount.id == account_id,
+        AWSAccount.tenant_id == current_tenant.id
+    ).first()
+
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="AWS account not found"
+        )
+
+    account.organizational_unit = (ou_data.organizational_unit or "").strip() or None
+    bump_cost_data_version(db, [current_tenant.id])
+    db.commit()
+
+    return {
+        "account_id": str(account_id),
+        "organizational_unit": account.organizational_unit
+    }
+
+
 @router.post("/{account_id}/sync")
 async def sync_aws_account(
     account_id: uuid.UUID,
+    days: int = Query(30, description="Number of days to sync", ge=1, le=90),
+    full_refresh: bool = Query(False, description="Re-fetch the whole range, ignoring the sync watermark"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
     current_tenant: Tenant = Depends(get_current_tenant)
 ):
-    """Trigger a manual sync for an AWS account"""
+    """Queue a background cost sync for an AWS account"""
 
     account = db.query(AWSAccount).filter(
         AWSAccount.id == account_id,
@@ -137,17 +232,28 @@ async def sync_aws_account(
             detail="AWS account not found"
         )
 
+    # Queue the sync, reusing the in-flight job if one exists
+    job, created = JobQueue.enqueue(
+        db,
+        tenant_id=current_tenant.id,
+        job_type=SyncJobType.AWS_ACCOUNT_SYNC,
+        account_id=account.id,
+        payload={"days": days, "full_refresh": full_refresh}
+    )
+
     # Update sync status
     account.sync_status = "syncing"
     account.last_sync_at = datetime.utcnow()
     db.commit()
 
-    # TODO: Trigger background job to sync cost data
-
     return {
-        "message": f"Sync triggered for account {account.account_name}",
+        "message": (
+            f"Sync triggered for account {account.account_name}" if created
+            else f"Sync already in progress for account {account.account_name}"
+        ),
         "account_id": str(account_id),
-        "sync_status": "syncing"
+        "sync_status": "syncing",
+        "job_id": str(job.id)
     }
 
 
@@ -173,6 +279,7 @@ async def unlink_aws_account(
 
     # Soft delete - mark as inactive
     account.is_active = False
+    bump_cost_data_version(db, [current_tenant.id])
     db.commit()
 
     return None
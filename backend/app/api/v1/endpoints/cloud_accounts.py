@@ -9,6 +9,8 @@ from app.core.deps import get_current_user, get_current_tenant
 from app.models.user import User
 from app.models.tenant import Tenant
 from app.models.cloud_account import CloudAccount, CloudProvider
+from app.models.sync_job import SyncJobType
+from app.services.job_queue import JobQueue
 from app.schemas.cloud_account import (
     CloudAccountCreate,
     CloudAccountUpdate,
@@ -182,21 +184,29 @@ async def sync_cloud_account(
                 last_sync_at=account.last_sync_at
             )
 
+    # Queue the sync, reusing the in-flight job if one exists
+    job, created = JobQueue.enqueue(
+        db,
+        tenant_id=current_tenant.id,
+        job_type=SyncJobType.CLOUD_ACCOUNT_SYNC,
+        account_id=account.id
+    )
+
     # Update sync status
     account.sync_status = "syncing"
     account.last_sync_at = datetime.utcnow()
     account.sync_error = None
     db.commit()
 
-    # TODO: Trigger background job to sync cost data based on provider
-    # This will be implemented when we add the cloud provider service classes
+    account_label = f"{account.provider.value.upper()} account: {account.account_name or account.account_id}"
 
     return CloudAccountSyncResponse(
         account_id=account.id,
         provider=account.provider,
         sync_status="syncing",
-        message=f"Sync triggered for {account.provider.value.upper()} account: {account.account_name or account.account_id}",
-        last_sync_at=account.last_sync_at
+        message=f"Sync triggered for {account_label}" if created else f"Sync already in progress for {account_label}",
+        last_sync_at=account.last_sync_at,
+        job_id=job.id
     )
 
 
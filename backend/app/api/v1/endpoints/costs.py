@@ -2,7 +2,7 @@ from fastapi import APIRouter, Query, Depends, HTTPException, status
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 from datetime import date, datetime, timedelta
 import uuid
 import csv
@@ -10,9 +10,12 @@ import io
 
 from app.db.base import get_db
 from app.core.deps import get_current_user, get_current_tenant
+from app.core.http_cache import conditional_cost_get
 from app.models.user import User
 from app.models.tenant import Tenant
+from app.core.money import from_micros
 from app.models.aws_account import AWSAccount
+from app.models.sync_job import SyncBatch
 from app.services.cost_service import CostService
 
 router = APIRouter()
@@ -37,7 +40,7 @@ class CostTrendItem(BaseModel):
     cost: float
 
 
-@router.get("/summary", response_model=CostSummaryResponse)
+@router.get("/summary", response_model=CostSummaryResponse, dependencies=[Depends(conditional_cost_get)])
 async def get_cost_summary(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
@@ -80,7 +83,7 @@ async def get_cost_summary(
     return summary
 
 
-@router.get("/trend", response_model=List[CostTrendItem])
+@router.get("/trend", response_model=List[CostTrendItem], dependencies=[Depends(conditional_cost_get)])
 async def get_cost_trend(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
@@ -113,10 +116,64 @@ async def get_cost_trend(
     return trend
 
 
+@router.post("/sync", status_code=status.HTTP_202_ACCEPTED)
+async def sync_all_cost_data(
+    days: int = Query(30, description="Number of days to sync", ge=1, le=90),
+    full_refresh: bool = Query(False, description="Re-fetch the whole range, ignoring sync watermarks"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant)
+):
+    """
+    Queue a cost sync for all active accounts of the tenant
+
+    - One background job is queued per account; the worker runs them
+      concurrently with a per-tenant limit
+    - Returns immediately with a sync_id; poll GET /costs/sync/status/{sync_id}
+      for per-account status and record counts
+    - Default: last 30 days
+    """
+    from app.services.sync_orchestrator import SyncOrchestrator
+
+    batch = SyncOrchestrator().queue_all(
+        db,
+        tenant_id=str(current_tenant.id),
+        days=days,
+        full_refresh=full_refresh
+    )
+
+    return SyncOrchestrator.batch_progress(db, batch)
+
+
+@router.get("/sync/status/{sync_id}")
+async def get_sync_all_progress(
+    sync_id: uuid.UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant)
+):
+    """Get per-account progress of a sync queued by POST /costs/sync"""
+    from app.services.sync_orchestrator import SyncOrchestrator
+
+    batch = db.query(SyncBatch).filter(
+        SyncBatch.id == sync_id,
+        SyncBatch.tenant_id == current_tenant.id
+    ).first()
+
+    if not batch:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sync not found"
+        )
+
+    return SyncOrchestrator.batch_progress(db, batch)
+
+
 @router.post("/sync/{account_id}")
 async def sync_cost_data(
     account_id: uuid.UUID,
     days: int = Query(30, description="Number of days to sync", ge=1, le=90),
+    full_refresh: bool = Query(False, description="Re-fetch the whole range, ignoring the sync watermark"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
     current_tenant: Tenant = Depends(get_current_tenant)
@@ -127,6 +184,8 @@ async def sync_cost_data(
     - Fetches data from AWS Cost Explorer
     - Stores in database for fast queries
     - Default: last 30 days
+    - Only days after the last sync (plus a restatement window) are fetched
+      unless full_refresh is set
     """
     # Get AWS account
     aws_account = db.query(AWSAccount).filter(
@@ -153,13 +212,29 @@ async def sync_cost_data(
     result = await cost_service.fetch_costs_for_account(
         aws_account=aws_account,
         start_date=start_date,
-        end_date=end_date
+        end_date=end_date,
+        full_refresh=full_refresh
     )
 
     return result
 
 
-@router.get("/by-region", response_model=CostSummaryResponse)
+class RegionBreakdownItem(BaseModel):
+    region: Optional[str]
+    cost: float
+    percentage: float
+
+
+class RegionBreakdownResponse(BaseModel):
+    total_cost: float
+    currency: str
+    start_date: str
+    end_date: str
+    detail_available_from: Optional[str] = None  # Regions are not kept past retention
+    breakdown: List[RegionBreakdownItem]
+
+
+@router.get("/by-region", response_model=RegionBreakdownResponse, dependencies=[Depends(conditional_cost_get)])
 async def get_cost_by_region(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
@@ -174,6 +249,7 @@ async def get_cost_by_region(
     - Defaults to last 30 days if no dates provided
     - Groups costs by region
     - Shows percentage breakdown
+    - Starts at detail_available_from when the range reaches past retention
     """
     # Set default dates
     if not end_date:
@@ -200,7 +276,7 @@ class MonthComparisonResponse(BaseModel):
     currency: str
 
 
-@router.get("/month-comparison", response_model=MonthComparisonResponse)
+@router.get("/month-comparison", response_model=MonthComparisonResponse, dependencies=[Depends(conditional_cost_get)])
 async def get_month_comparison(
     current_month_start: Optional[date] = None,
     current_month_end: Optional[date] = None,
@@ -245,6 +321,8 @@ class ForecastResponse(BaseModel):
     error: Optional[str] = None
 
 
+# No conditional_cost_get: the forecast comes live from Cost Explorer and
+# changes without the tenant's cost_data_version, so a version ETag would go stale
 @router.get("/forecast/{account_id}", response_model=ForecastResponse)
 async def get_cost_forecast(
     account_id: uuid.UUID,
@@ -293,13 +371,15 @@ async def export_costs_csv(
     account_id: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
-    current_tenant: Tenant = Depends(get_current_tenant)
+    current_tenant: Tenant = Depends(get_current_tenant),
+    cache_headers: Dict[str, str] = Depends(conditional_cost_get)
 ):
     """
     Export cost data to CSV format
 
     - Returns CSV file with detailed cost breakdown
     - Includes date, service, region, and cost columns
+    - Daily rows start at the X-Detail-Available-From header when the range reaches past retention
     """
     # Set default dates
     if not end_date:
@@ -307,10 +387,26 @@ async def export_costs_csv(
     if not start_date:
         start_date = end_date - timedelta(days=30)
 
+    # Older days only remain as monthly totals, which have no region
+    start_date, downsampled_before = CostService(db).detail_range(str(current_tenant.id), start_date)
+    if downsampled_before:
+        cache_headers = {**cache_headers, "X-Detail-Available-From": downsampled_before.isoformat()}
+
     # Query cost data
     from app.models.cost_data import CostData
-
-    query = db.query(CostData).filter(
+    from app.models.cost_dimension import RegionDimension, ServiceDimension
+
+    query = db.query(
+        CostData.date,
+        ServiceDimension.name.label('service'),
+        RegionDimension.name.label('region'),
+        CostData.cost_micros,
+        CostData.currency
+    ).join(
+        ServiceDimension, ServiceDimension.id == CostData.service_id
+    ).outerjoin(
+        RegionDimension, RegionDimension.id == CostData.region_id
+    ).filter(
         CostData.tenant_id == current_tenant.id,
         CostData.date >= start_date,
         CostData.date <= end_date
@@ -334,7 +430,8 @@ async def export_costs_csv(
             record.date.isoformat(),
             record.service,
             record.region,
-            f"{record.cost:.2f}",
+            # Exact stored amount, so exports reconcile with AWS invoices
+            str(from_micros(record.cost_micros)),
             record.currency
         ])
 
@@ -346,6 +443,7 @@ async def export_costs_csv(
         iter([output.getvalue()]),
         media_type="text/csv",
         headers={
+            **cache_headers,
             "Content-Disposition": f"attachment; filename={filename}"
         }
     )
@@ -375,6 +473,8 @@ class RecommendationsResponse(BaseModel):
     recommendations: List[RecommendationItem]
 
 
+# No conditional_cost_get: recommendations are read live from AWS (Compute
+# Optimizer, EC2, CloudWatch) and change without the tenant's cost_data_version
 @router.get("/recommendations", response_model=RecommendationsResponse)
 async def get_cost_recommendations(
     account_id: Optional[uuid.UUID] = None,
@@ -428,22 +528,29 @@ async def get_cost_recommendations(
 
 class TagBreakdownItem(BaseModel):
     tag_value: str
+    tags: Dict[str, Optional[str]]  # None for untagged
     cost: float
     percentage: float
 
 
 class TagBreakdownResponse(BaseModel):
     tag_key: str
+    tag_keys: List[str]
     total_cost: float
     currency: str
     start_date: str
     end_date: str
+    detail_available_from: Optional[str] = None  # Tags are not kept past retention
+    accounts_without_tag_detail: int
     breakdown: List[TagBreakdownItem]
 
 
-@router.get("/by-tags", response_model=TagBreakdownResponse)
+@router.get("/by-tags", response_model=TagBreakdownResponse, dependencies=[Depends(conditional_cost_get)])
 async def get_cost_by_tags(
-    tag_key: str = Query(..., description="Tag key to group by (e.g., 'Environment', 'Project')"),
+    tag_key: List[str] = Query(
+        ...,
+        description="Tag key to group by (e.g., 'Environment', 'Project'); repeat it to group by several keys"
+    ),
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     account_id: Optional[str] = None,
@@ -454,9 +561,12 @@ async def get_cost_by_tags(
     """
     Get cost breakdown by AWS resource tags
 
-    - Groups costs by specified tag key
+    - Groups costs by the specified tag keys, e.g. ?tag_key=Environment&tag_key=Team
+    - Spend without a tag value is reported as (untagged)
+    - Multi-key grouping needs resource tags, which only CUR accounts have
     - Defaults to last 30 days if no dates provided
     - Shows percentage breakdown
+    - Starts at detail_available_from when the range reaches past retention
     """
     # Set default dates
     if not end_date:
@@ -470,7 +580,7 @@ async def get_cost_by_tags(
         tenant_id=str(current_tenant.id),
         start_date=start_date,
         end_date=end_date,
-        tag_key=tag_key,
+        tag_keys=tag_key,
         aws_account_id=account_id
     )
 
@@ -484,6 +594,14 @@ class MultiAccountItem(BaseModel):
     cost: float
     percentage: float
     region: str
+    organizational_unit: Optional[str] = None
+
+
+class OrganizationalUnitItem(BaseModel):
+    organizational_unit: Optional[str]
+    account_count: int
+    cost: float
+    percentage: float
 
 
 class MultiAccountResponse(BaseModel):
@@ -493,12 +611,14 @@ class MultiAccountResponse(BaseModel):
     end_date: str
     account_count: int
     accounts: List[MultiAccountItem]
+    organizational_units: Optional[List[OrganizationalUnitItem]] = None
 
 
-@router.get("/multi-account", response_model=MultiAccountResponse)
+@router.get("/multi-account", response_model=MultiAccountResponse, dependencies=[Depends(conditional_cost_get)])
 async def get_multi_account_summary(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
+    group_by: Optional[Literal["organizational_unit"]] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
     current_tenant: Tenant = Depends(get_current_tenant)
@@ -506,7 +626,7 @@ async def get_multi_account_summary(
     """
     Get aggregated cost summary across all AWS accounts
 
-    - Shows cost breakdown per account
+    - Shows cost breakdown per account, or per AWS Organizations OU with group_by=organizational_unit
     - Includes percentages of total spend
     - Defaults to last 30 days
     """
@@ -521,12 +641,154 @@ async def get_multi_account_summary(
     summary = await cost_service.get_multi_account_summary(
         tenant_id=str(current_tenant.id),
         start_date=start_date,
-        end_date=end_date
+        end_date=end_date,
+        group_by=group_by
     )
 
     return summary
 
 
+class CostQueryRow(BaseModel):
+    period: Optional[str]  # Bucket start, None without granularity
+    dimensions: Dict[str, Optional[str]]
+    cost: float
+    percentage: float
+    other: bool
+    account_name: Optional[str] = None
+
+
+class CostQueryResponse(BaseModel):
+    total_cost: float
+    currency: str
+    start_date: str
+    end_date: str
+    group_by: List[str]
+    granularity: Optional[str]
+    detail_available_from: Optional[str]
+    accounts_without_tag_detail: int
+    rows: List[CostQueryRow]
+
+
+@router.get("/query", response_model=CostQueryResponse, dependencies=[Depends(conditional_cost_get)])
+async def query_costs(
+    group_by: List[str] = Query(
+        [],
+        description="Dimension to group by: service, region, account, usage_type or tag:<key>; repeat for several"
+    ),
+    filter: List[str] = Query(
+        [],
+        description="dimension=value, e.g. region=us-east-1 or tag:Team=platform; an empty value matches none"
+    ),
+    granularity: Optional[Literal["day", "week", "month"]] = None,
+    top_n: Optional[int] = Query(None, ge=1, description="Keep the N most expensive groups, the rest become Other"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant)
+):
+    """
+    Query costs grouped by any dimensions
+
+    - Groups by one or more dimensions, e.g. ?group_by=service&group_by=region
+    - Filters repeat: values of one dimension are alternatives, dimensions combine
+    - Optional day, week or month buckets and top-N with an Other bucket
+    - Answered in one query, from the rollups when only service and account are involved
+    - Defaults to last 30 days
+    """
+    # Set default dates
+    if not end_date:
+        end_date = date.today()
+    if not start_date:
+        start_date = end_date - timedelta(days=30)
+
+    filters: Dict[str, List[Optional[str]]] = {}
+    for item in filter:
+        dimension, separator, value = item.partition("=")
+        if not separator:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Filter '{item}' must look like dimension=value"
+            )
+        filters.setdefault(dimension, []).append(value or None)
+
+    cost_service = CostService(db)
+
+    try:
+        result = await cost_service.query_costs(
+            tenant_id=str(current_tenant.id),
+            start_date=start_date,
+            end_date=end_date,
+            group_by=group_by,
+            filters=filters,
+            granularity=granularity,
+            top_n=top_n
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    return result
+
+
+class DashboardResponse(BaseModel):
+    summary: CostSummaryResponse
+    trend: List[CostTrendItem]
+    by_region: RegionBreakdownResponse
+    month_comparison: MonthComparisonResponse
+    multi_account: MultiAccountResponse
+    timings: Optional[Dict[str, float]] = None  # Milliseconds per section, with debug=true
+
+
+@router.get("/dashboard", response_model=DashboardResponse, dependencies=[Depends(conditional_cost_get)])
+async def get_dashboard(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    debug: bool = Query(False, description="Include per-section timings in milliseconds"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant)
+):
+    """
+    Get every dashboard widget in one request
+
+    - Summary, trend, region breakdown, month comparison and per-account costs
+    - Computed from one grouped pass over the cost data
+    - Defaults to last 30 days; the comparison covers end_date's month so far
+    """
+    # Set default dates
+    if not end_date:
+        end_date = date.today()
+    if not start_date:
+        start_date = end_date - timedelta(days=30)
+
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date must be before end_date"
+        )
+
+    cost_service = CostService(db)
+
+    # Timed runs skip the result cache so they measure the queries
+    timings: Optional[Dict[str, float]] = {} if debug else None
+    dashboard = await cost_service.get_dashboard(
+        tenant_id=str(current_tenant.id),
+        start_date=start_date,
+        end_date=end_date,
+        current_month_start=end_date.replace(day=1),
+        current_month_end=end_date,
+        timings=timings
+    )
+
+    if debug:
+        dashboard["timings"] = {name: round(ms, 3) for name, ms in timings.items()}
+
+    return dashboard
+
+
 @router.get("/export/pdf")
 async def export_costs_pdf(
     start_date: Optional[date] = None,
@@ -534,7 +796,8 @@ async def export_costs_pdf(
     account_id: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
-    current_tenant: Tenant = Depends(get_current_tenant)
+    current_tenant: Tenant = Depends(get_current_tenant),
+    cache_headers: Dict[str, str] = Depends(conditional_cost_get)
 ):
     """
     Export cost report to PDF format
@@ -660,6 +923,7 @@ async def export_costs_pdf(
         iter([buffer.getvalue()]),
         media_type="application/pdf",
         headers={
+            **cache_headers,
             "Content-Disposition": f"attachment; filename={filename}"
         }
     )
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+import uuid
+
+from app.db.base import get_db
+from app.core.deps import get_current_user, get_current_tenant
+from app.models.user import User
+from app.models.tenant import Tenant
+from app.models.sync_job import SyncJob
+from app.schemas.sync_job import SyncJobResponse
+
+router = APIRouter()
+
+
+@router.get("/{job_id}", response_model=SyncJobResponse)
+async def get_job(
+    job_id: uuid.UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant)
+):
+    """Get the status of a background job"""
+
+    job = db.query(SyncJob).filter(
+        SyncJob.id == job_id,
+        SyncJob.tenant_id == current_tenant.id
+    ).first()
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+
+    return job
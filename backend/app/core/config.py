@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -20,6 +20,47 @@ class Settings(BaseSettings):
     AWS_REGION: str = "us-east-1"
     AWS_ACCESS_KEY_ID: str = ""
     AWS_SECRET_ACCESS_KEY: str = ""
+    AWS_ASSUME_ROLE_DURATION_SECONDS: int = 3600
+    AWS_CREDENTIAL_CACHE_SIZE: int = 1000  # Assumed roles kept in memory (LRU)
+    AWS_CLIENT_CACHE_SIZE: int = 4000  # boto3 clients kept in memory (LRU)
+    AWS_MAX_POOL_CONNECTIONS: int = 25  # HTTP connections per client
+    AWS_MAX_ATTEMPTS: int = 5  # Including the first call, adaptive retry mode
+    AWS_CONNECT_TIMEOUT_SECONDS: int = 5
+    AWS_READ_TIMEOUT_SECONDS: int = 60
+
+    # Cost Explorer rate limiting (per payer account)
+    CE_RATE_LIMIT_PER_SECOND: float = 5.0
+    CE_RATE_LIMIT_BURST: float = 5.0
+    CE_RATE_LIMIT_MIN_PER_SECOND: float = 0.2
+    CE_THROTTLE_RETRIES: int = 3
+    CE_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CE_CIRCUIT_RESET_SECONDS: float = 60.0
+
+    # Cost ingestion
+    COST_INGEST_BATCH_SIZE: int = 10000  # Rows per COPY load into cost_data
+    # Cost allocation tag keys ingested per account unless overridden in config_data['cost_allocation_tags']
+    COST_ALLOCATION_TAG_KEYS: List[str] = ["Environment", "Project", "Team"]
+    COST_RESTATEMENT_DAYS: int = 3  # Trailing days re-fetched on incremental syncs, AWS revises them
+    COST_PARTITION_MONTHS_AHEAD: int = 3  # Monthly cost_data partitions created ahead of the current month
+    # Months of daily cost detail kept per subscription plan, monthly rollups beyond (plans not listed keep
+    # everything); Tenant.cost_retention_months overrides it
+    COST_RETENTION_MONTHS: Dict[str, int] = {"free": 3, "pro": 13, "business": 25}
+
+    # Cost and Usage Report ingestion (accounts with config_data['cost_source'] == 'cur')
+    CUR_DATA_DIR: str = "/data/cur"  # Operator-managed; a tenant's exports in <dir>/<tenant_id>/<account_id or cur_path>
+    CUR_INGEST_CHUNK_ROWS: int = 50000  # Line items read, aggregated and committed at a time
+
+    # Multi-account sync (keep global concurrency below the DB pool size)
+    SYNC_MAX_CONCURRENCY: int = 8
+    SYNC_MAX_CONCURRENCY_PER_TENANT: int = 2
+
+    # Background jobs
+    JOB_POLL_INTERVAL_SECONDS: float = 2.0
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BASE_SECONDS: int = 30  # Doubled on every failed attempt
+    JOB_RETRY_MAX_SECONDS: int = 1800
+    JOB_HEARTBEAT_SECONDS: int = 30  # How often a running job renews its lock
+    JOB_LOCK_TIMEOUT_SECONDS: int = 300  # Running jobs not renewed for this long are assumed orphaned
 
     # CORS
     CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:5173"]
@@ -27,6 +68,16 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
 
+    # Cost query result cache, keyed by each tenant's cost_data_version
+    COST_CACHE_BACKEND: str = "redis"  # redis (in-process LRU when unreachable), memory or none
+    COST_CACHE_MAX_ENTRIES: int = 10000  # In-process LRU size
+    COST_CACHE_TTL_SECONDS: int = 86400  # Only bounds how long superseded versions linger in Redis
+    COST_CACHE_REDIS_TIMEOUT_SECONDS: float = 0.25
+    COST_CACHE_REDIS_RETRY_SECONDS: int = 30  # Until Redis is tried again after falling back to the LRU
+
+    # Internal port serving Prometheus metrics of an API process, none when unset
+    METRICS_PORT: Optional[int] = None
+
     # Frontend
     FRONTEND_URL: str = "http://localhost:3000"
 
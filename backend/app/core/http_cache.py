@@ -0,0 +1,84 @@
+"""
+Conditional GET for cost read endpoints
+
+A cost response only changes when the tenant's cost_data_version does
+(see app.services.result_cache), so its strong ETag is derived from that
+version, the tenant, the path and the query parameters, plus today's
+date for the endpoints whose default range ends today. The version comes
+with the tenant row the request loads for authorization anyway, so an
+If-None-Match that still matches is answered with 304 before any
+aggregation runs. Endpoints answered live from AWS (the forecast and the
+recommendations) do not use it, since their results change without the
+version.
+"""
+from datetime import date
+from typing import Dict
+import hashlib
+
+from fastapi import Depends, Request
+from fastapi.responses import Response
+
+from app.core.deps import get_current_tenant
+from app.models.tenant import Tenant
+
+# Browsers may keep the payload, but must revalidate it on every use
+CACHE_CONTROL = "private, no-cache"
+
+
+class NotModified(Exception):
+    """Raised by conditional_cost_get when the client's copy is current"""
+
+    def __init__(self, headers: Dict[str, str]):
+        self.headers = headers
+
+
+async def not_modified_handler(request: Request, exc: NotModified) -> Response:
+    return Response(status_code=304, headers=exc.headers)
+
+
+def cost_etag(tenant: Tenant, request: Request, today: date) -> str:
+    """Strong ETag of a cost response for the tenant's current data version"""
+    # Repeated parameters keep their order, which can matter (e.g. group_by)
+    params = sorted(request.query_params.multi_items(), key=lambda item: item[0])
+    source = "\n".join([
+        str(tenant.id),
+        str(tenant.cost_data_version or 0),
+        today.isoformat(),
+        request.url.path,
+        *(f"{name}={value}" for name, value in params)
+    ])
+    return '"' + hashlib.sha256(source.encode()).hexdigest()[:32] + '"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def conditional_cost_get(
+    request: Request,
+    response: Response,
+    current_tenant: Tenant = Depends(get_current_tenant)
+) -> Dict[str, str]:
+    """
+    ETag and Cache-Control for a cost GET, or 304 when If-None-Match matches
+
+    The headers are set on the endpoint's response; endpoints returning
+    their own Response object add the returned headers themselves.
+
+    Raises:
+        NotModified: If the client's copy is still current
+    """
+    headers = {
+        "ETag": cost_etag(current_tenant, request, date.today()),
+        "Cache-Control": CACHE_CONTROL,
+        "Vary": "Authorization"
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, headers["ETag"]):
+        raise NotModified(headers)
+
+    response.headers.update(headers)
+    return headers
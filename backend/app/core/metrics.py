@@ -0,0 +1,16 @@
+"""
+Prometheus metrics of the process
+
+Metrics are prometheus_client collectors declared next to the code that
+updates them, in the client's default registry, which also carries the
+process and platform metrics. They are served on an internal port of
+their own (METRICS_PORT for the API, --metrics-port for the worker) and
+never through the public API. Label values must stay bounded and must not
+identify a tenant or its AWS accounts.
+"""
+from prometheus_client import start_http_server
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> None:
+    """Serve the default registry on /metrics from a background thread"""
+    start_http_server(port, addr=host)
@@ -0,0 +1,48 @@
+"""
+Fixed-point money
+
+Costs are stored and summed as integer micro-units (1 USD = 1,000,000
+micros) and only turned into Decimal amounts at the edges: API responses,
+exports and comparisons with user-entered amounts. Never route them
+through float.
+"""
+from decimal import Decimal, ROUND_HALF_EVEN, ROUND_HALF_UP
+from typing import Optional, Union
+
+MICROS_PER_UNIT = 1_000_000
+CENT = Decimal("0.01")
+
+Amount = Union[Decimal, str, int, float]
+
+
+def to_decimal(amount: Optional[Amount]) -> Decimal:
+    """Exact Decimal for an amount; floats go through their shortest repr"""
+    if amount is None:
+        return Decimal(0)
+    if isinstance(amount, Decimal):
+        return amount
+    if isinstance(amount, float):
+        return Decimal(repr(amount))
+    return Decimal(amount)
+
+
+def to_micros(amount: Optional[Amount]) -> int:
+    """Amount in currency units (e.g. Cost Explorer's Amount string) to micros, rounding half to even"""
+    return int(to_decimal(amount).scaleb(6).quantize(Decimal(1), rounding=ROUND_HALF_EVEN))
+
+
+def from_micros(micros: Optional[Union[int, Decimal]]) -> Decimal:
+    """Exact amount in currency units; SUM() of a BIGINT comes back as Decimal"""
+    return Decimal(int(micros or 0)).scaleb(-6)
+
+
+def round_money(micros: Optional[Union[int, Decimal]]) -> Decimal:
+    """Amount rounded to cents the way invoices are (half up)"""
+    return from_micros(micros).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def percentage(part: Union[int, Decimal], total: Union[int, Decimal]) -> float:
+    """Share of total in percent, rounded to two places; 0 when total is 0"""
+    if not total:
+        return 0.0
+    return float((Decimal(part) * 100 / Decimal(total)).quantize(CENT, rounding=ROUND_HALF_UP))
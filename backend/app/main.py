@@ -1,12 +1,25 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.http_cache import NotModified, not_modified_handler
+from app.core.metrics import start_metrics_server
 from app.api.v1.api import api_router
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Metrics go on their own internal port, never through the public API
+    if settings.METRICS_PORT:
+        start_metrics_server(settings.METRICS_PORT)
+    yield
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    description="Cloud Cost Optimization Platform API"
+    description="Cloud Cost Optimization Platform API",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -21,6 +34,9 @@ app.add_middleware(
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+# Conditional GETs of cost endpoints answer 304 without a body
+app.add_exception_handler(NotModified, not_modified_handler)
+
 
 @app.get("/health")
 async def health_check():
@@ -2,9 +2,12 @@ from app.models.user import User
 from app.models.tenant import Tenant
 from app.models.aws_account import AWSAccount
 from app.models.cloud_account import CloudAccount, CloudProvider
-from app.models.cost_data import CostData, CostSummary
+from app.models.cost_data import CostData, CostTagData, CostSummary, CostRollupDirtyRange
+from app.models.cost_dimension import ServiceDimension, RegionDimension, UsageTypeDimension
 from app.models.architecture import Architecture
 from app.models.budget import Budget, BudgetAlert
+from app.models.sync_job import SyncJob, SyncBatch
+from app.models.cur_ingest import CURIngestFile
 
 __all__ = [
     "User",
@@ -13,8 +16,16 @@ __all__ = [
     "CloudAccount",
     "CloudProvider",
     "CostData",
+    "CostTagData",
     "CostSummary",
+    "CostRollupDirtyRange",
+    "ServiceDimension",
+    "RegionDimension",
+    "UsageTypeDimension",
     "Architecture",
     "Budget",
-    "BudgetAlert"
+    "BudgetAlert",
+    "SyncJob",
+    "SyncBatch",
+    "CURIngestFile"
 ]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, String, DateTime, Date, Boolean, ForeignKey, JSON
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -17,9 +17,12 @@ class AWSAccount(Base):
     role_arn = Column(String, nullable=False)  # IAM role ARN for cross-account access
     external_id = Column(String)  # For additional security
     region = Column(String, default="us-east-1")
+    organizational_unit = Column(String)  # AWS Organizations OU the account sits in, e.g. "Root/Workloads/Prod"
     is_active = Column(Boolean, default=True)
     last_sync_at = Column(DateTime(timezone=True))
     sync_status = Column(String, default="pending")  # pending, syncing, success, error
+    cost_synced_from = Column(Date)  # Earliest day covered by ingested cost data
+    cost_watermark_date = Column(Date)  # Last complete day of ingested cost data
     config_data = Column(JSON)  # Additional configuration (renamed from metadata to avoid SQLAlchemy conflict)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
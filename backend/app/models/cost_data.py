@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Float, ForeignKey, Index, Date
+from sqlalchemy import Column, String, DateTime, BigInteger, ForeignKey, Index, Date, UniqueConstraint, SmallInteger, Integer, Identity, Computed, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -7,24 +7,80 @@ from app.db.base import Base
 
 
 class CostData(Base):
-    """Daily cost data for AWS services"""
+    """Daily cost data for AWS services, range-partitioned by month on date"""
     __tablename__ = "cost_data"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
     aws_account_id = Column(UUID(as_uuid=True), ForeignKey("aws_accounts.id"), nullable=False)
 
+    # Time dimension (partition key, so part of the primary key)
+    date = Column(Date, primary_key=True, nullable=False)
+
+    # Cost dimensions, dictionary-encoded (names in cost_services, cost_regions, cost_usage_types)
+    service_id = Column(SmallInteger, ForeignKey("cost_services.id"), nullable=False)
+    region_id = Column(SmallInteger, ForeignKey("cost_regions.id"))
+    usage_type_id = Column(Integer, ForeignKey("cost_usage_types.id"))
+    tags = Column(JSONB, nullable=False, default=dict, server_default=text("'{}'::jsonb"))  # Resource tags as JSON object, {} when untagged
+    # Stands in for tags in the natural key: a btree entry holding the JSONB itself can outgrow the page
+    tags_hash = Column(UUID(as_uuid=True), Computed("md5(tags::text)::uuid", persisted=True), nullable=False)
+
+    # Cost metrics
+    cost_micros = Column(BigInteger, nullable=False)  # Unblended cost in millionths of the currency unit, see app.core.money
+    currency = Column(String, default="USD")
+
+    # Metadata
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Relationships
+    tenant = relationship("Tenant")
+    aws_account = relationship("AWSAccount")
+
+    # Indexes for efficient querying
+    __table_args__ = (
+        # Natural key used by ingestion for INSERT ... ON CONFLICT upserts
+        UniqueConstraint(
+            'aws_account_id', 'date', 'service_id', 'region_id', 'usage_type_id', 'tags_hash',
+            name='uq_cost_data_account_date_service_region_usage_tags',
+            postgresql_nulls_not_distinct=True
+        ),
+        # Covering indexes for CostService aggregates: every column they filter,
+        # group or sum on is in the index, so they run as index-only scans
+        Index(
+            'idx_cost_tenant_date', 'tenant_id', 'date',
+            postgresql_include=['aws_account_id', 'service_id', 'region_id', 'cost_micros']
+        ),
+        Index(
+            'idx_cost_account_date', 'aws_account_id', 'date',
+            postgresql_include=['tenant_id', 'service_id', 'region_id', 'cost_micros']
+        ),
+        # Rows arrive roughly in date order, so a few pages of BRIN summarize a month
+        Index('idx_cost_date_brin', 'date', postgresql_using='brin'),
+        # Tag key lookups (tags ? key, tags ?| keys) for tag breakdowns
+        Index('idx_cost_tags', 'tags', postgresql_using='gin'),
+        # Monthly partitions are managed by app.services.partitions
+        {'postgresql_partition_by': 'RANGE (date)'},
+    )
+
+
+class CostTagData(Base):
+    """Daily cost per cost allocation tag value, one row per tag key"""
+    __tablename__ = "cost_tag_data"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    aws_account_id = Column(UUID(as_uuid=True), ForeignKey("aws_accounts.id"), nullable=False)
+
     # Time dimension
     date = Column(Date, nullable=False)
 
-    # Cost dimensions
-    service = Column(String, nullable=False)  # e.g., "Amazon EC2", "Amazon S3"
-    region = Column(String)  # e.g., "us-east-1"
-    usage_type = Column(String)  # e.g., "DataTransfer-Out-Bytes"
-    tags = Column(JSONB)  # Resource tags as JSON object
+    # Tag dimension
+    tag_key = Column(String, nullable=False)  # e.g., "Environment"
+    tag_value = Column(String, nullable=False)  # e.g., "production", empty for untagged usage
 
     # Cost metrics
-    cost = Column(Float, nullable=False)  # Unblended cost
+    cost_micros = Column(BigInteger, nullable=False)  # Unblended cost in millionths of the currency unit, see app.core.money
     currency = Column(String, default="USD")
 
     # Metadata
@@ -35,17 +91,20 @@ class CostData(Base):
     tenant = relationship("Tenant")
     aws_account = relationship("AWSAccount")
 
-    # Indexes for efficient querying
+    # Indexes
     __table_args__ = (
-        Index('idx_cost_tenant_date', 'tenant_id', 'date'),
-        Index('idx_cost_account_date', 'aws_account_id', 'date'),
-        Index('idx_cost_service', 'service'),
-        Index('idx_cost_date', 'date'),
+        # Natural key used by ingestion for INSERT ... ON CONFLICT upserts
+        UniqueConstraint(
+            'aws_account_id', 'date', 'tag_key', 'tag_value',
+            name='uq_cost_tag_data_account_date_key_value'
+        ),
+        Index('idx_cost_tag_tenant_key_date', 'tenant_id', 'tag_key', 'date'),
+        Index('idx_cost_tag_account_key_date', 'aws_account_id', 'tag_key', 'date'),
     )
 
 
 class CostSummary(Base):
-    """Pre-aggregated cost summaries for faster queries"""
+    """Pre-aggregated cost summaries for faster queries, maintained by app.services.rollups"""
     __tablename__ = "cost_summaries"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -54,12 +113,12 @@ class CostSummary(Base):
 
     # Aggregation period
     period_start = Column(Date, nullable=False)
-    period_end = Column(Date, nullable=False)
-    period_type = Column(String, nullable=False)  # daily, weekly, monthly
+    period_end = Column(Date, nullable=False)  # Inclusive
+    period_type = Column(String, nullable=False)  # daily, weekly (ISO, Monday first), monthly
 
     # Aggregated metrics
-    total_cost = Column(Float, nullable=False)
-    service = Column(String)  # NULL for account-level summaries
+    total_cost_micros = Column(BigInteger, nullable=False)  # Millionths of the currency unit
+    service_id = Column(SmallInteger, ForeignKey("cost_services.id"))  # NULL for account-level summaries
     currency = Column(String, default="USD")
 
     # Metadata
@@ -72,6 +131,34 @@ class CostSummary(Base):
 
     # Indexes
     __table_args__ = (
-        Index('idx_summary_tenant_period', 'tenant_id', 'period_start', 'period_end'),
-        Index('idx_summary_account_period', 'aws_account_id', 'period_start', 'period_end'),
+        # One row per account, period and service (NULL service = account total)
+        UniqueConstraint(
+            'aws_account_id', 'period_type', 'period_start', 'service_id',
+            name='uq_cost_summary_account_type_start_service',
+            postgresql_nulls_not_distinct=True
+        ),
+        Index(
+            'idx_summary_tenant_type_start', 'tenant_id', 'period_type', 'period_start',
+            postgresql_include=['aws_account_id', 'service_id', 'total_cost_micros']
+        ),
+    )
+
+
+class CostRollupDirtyRange(Base):
+    """Days of an account's cost_data changed since its cost_summaries rows were last rebuilt"""
+    __tablename__ = "cost_rollup_dirty_ranges"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    aws_account_id = Column(UUID(as_uuid=True), ForeignKey("aws_accounts.id"), nullable=False)
+
+    # Changed days, written in the transaction that changed them
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)  # Inclusive
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index('idx_rollup_dirty_account', 'aws_account_id'),
+        Index('idx_rollup_dirty_tenant', 'tenant_id'),
     )
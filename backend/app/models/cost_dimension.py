@@ -0,0 +1,26 @@
+from sqlalchemy import Column, String, SmallInteger, Integer, Identity
+from app.db.base import Base
+
+
+class ServiceDimension(Base):
+    """AWS service names referenced by cost_data.service_id"""
+    __tablename__ = "cost_services"
+
+    id = Column(SmallInteger, Identity(), primary_key=True)
+    name = Column(String, nullable=False, unique=True)  # e.g., "Amazon EC2"
+
+
+class RegionDimension(Base):
+    """Region names referenced by cost_data.region_id"""
+    __tablename__ = "cost_regions"
+
+    id = Column(SmallInteger, Identity(), primary_key=True)
+    name = Column(String, nullable=False, unique=True)  # e.g., "us-east-1"
+
+
+class UsageTypeDimension(Base):
+    """Usage type names referenced by cost_data.usage_type_id"""
+    __tablename__ = "cost_usage_types"
+
+    id = Column(Integer, Identity(), primary_key=True)
+    name = Column(String, nullable=False, unique=True)  # e.g., "DataTransfer-Out-Bytes"
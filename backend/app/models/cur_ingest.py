@@ -0,0 +1,47 @@
+from sqlalchemy import Column, String, DateTime, BigInteger, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+import uuid
+from app.db.base import Base
+
+
+class CURIngestStatus:
+    """Ingestion states of a CUR file"""
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class CURIngestFile(Base):
+    """Progress of one Cost and Usage Report file, so ingestion can resume mid-file"""
+    __tablename__ = "cur_ingest_files"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    aws_account_id = Column(UUID(as_uuid=True), ForeignKey("aws_accounts.id"), nullable=False)  # Account that ingests the source
+
+    # File identity
+    source = Column(String, nullable=False)  # Export directory; progress is shared by every account reading it
+    path = Column(String, nullable=False)
+    billing_period = Column(String, nullable=False)  # e.g. "20251101-20251201"
+    fingerprint = Column(String, nullable=False)  # Size and mtime; a change means AWS rewrote the report
+
+    # Progress
+    rows_ingested = Column(BigInteger, nullable=False, default=0)  # Line items committed, the resume offset
+    status = Column(String, nullable=False, default=CURIngestStatus.IN_PROGRESS)
+    last_error = Column(String)
+
+    # Metadata
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    completed_at = Column(DateTime(timezone=True))
+
+    # Relationships
+    tenant = relationship("Tenant")
+    aws_account = relationship("AWSAccount")
+
+    __table_args__ = (
+        UniqueConstraint('tenant_id', 'path', name='uq_cur_ingest_files_tenant_path'),
+        Index('idx_cur_ingest_files_source_period', 'tenant_id', 'source', 'billing_period'),
+    )
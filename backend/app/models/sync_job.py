@@ -0,0 +1,80 @@
+from sqlalchemy import Column, String, DateTime, Date, Integer, ForeignKey, JSON, Index, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+import uuid
+from app.db.base import Base
+
+
+class SyncJobType:
+    """Job types understood by the worker"""
+    AWS_ACCOUNT_SYNC = "aws_account_sync"
+    CLOUD_ACCOUNT_SYNC = "cloud_account_sync"
+
+
+class SyncJobStatus:
+    """Job lifecycle states"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class SyncJob(Base):
+    """Durable background job stored in Postgres and dequeued with SKIP LOCKED"""
+    __tablename__ = "sync_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+
+    # What to run
+    job_type = Column(String, nullable=False)  # aws_account_sync, cloud_account_sync
+    account_id = Column(UUID(as_uuid=True), nullable=False)  # AWSAccount or CloudAccount id, per job_type
+    payload = Column(JSON)  # Job arguments, e.g. {"days": 30}
+
+    # Execution state
+    status = Column(String, nullable=False, default=SyncJobStatus.QUEUED)  # queued, running, succeeded, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    locked_by = Column(String)  # Worker that claimed the job
+    locked_at = Column(DateTime(timezone=True))
+    last_error = Column(String)
+    result = Column(JSON)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True))
+
+    # Relationships
+    tenant = relationship("Tenant")
+
+    __table_args__ = (
+        # At most one in-flight job per account and job type
+        Index(
+            'uq_sync_jobs_in_flight', 'job_type', 'account_id',
+            unique=True,
+            postgresql_where=text("status IN ('queued', 'running')")
+        ),
+        Index('idx_sync_jobs_dequeue', 'run_after', postgresql_where=text("status = 'queued'")),
+        Index('idx_sync_jobs_tenant_created', 'tenant_id', 'created_at'),
+    )
+
+
+class SyncBatch(Base):
+    """The per-account jobs queued by one sync-all request, for progress reporting"""
+    __tablename__ = "sync_batches"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False, index=True)
+
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+    job_ids = Column(JSON, nullable=False)  # SyncJob ids, including in-flight jobs that were reused
+    skipped = Column(JSON, nullable=False)  # Progress entries of accounts that cannot be synced
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    tenant = relationship("Tenant")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Boolean
+from sqlalchemy import Column, String, DateTime, Date, Boolean, Integer, BigInteger, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -22,6 +22,12 @@ class Tenant(Base):
     subscription_status = Column(String, default="free")  # free, active, past_due, canceled
     subscription_plan = Column(String, default="free")    # free, pro, business, enterprise
 
+    # Cost history retention, see app.services.retention
+    cost_retention_months = Column(Integer, nullable=True)  # Overrides the plan's months of daily detail
+    cost_downsampled_before = Column(Date, nullable=True)  # Only monthly rollups remain before this day
+    # Bumped whenever the tenant's cost results can change, see app.services.result_cache
+    cost_data_version = Column(BigInteger, nullable=False, default=0, server_default=text("0"))
+
     # Relationships
     users = relationship("User", back_populates="tenant")
     aws_accounts = relationship("AWSAccount", back_populates="tenant")
@@ -100,3 +100,4 @@ class CloudAccountSyncResponse(BaseModel):
     sync_status: str
     message: str
     last_sync_at: Optional[datetime] = None
+    job_id: Optional[UUID] = None  # Background job running the sync
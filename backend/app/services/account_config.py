@@ -0,0 +1,58 @@
+"""
+Per-account ingestion settings stored in AWSAccount.config_data
+"""
+from typing import List, Optional
+import os
+
+from app.core.config import settings
+from app.models.aws_account import AWSAccount
+
+COST_SOURCE_CE = "ce"  # Cost Explorer API (default)
+COST_SOURCE_CUR = "cur"  # Cost and Usage Report exports
+
+
+def get_cost_source(aws_account: AWSAccount) -> str:
+    """Where an account's cost data is ingested from"""
+    return (aws_account.config_data or {}).get("cost_source") or COST_SOURCE_CE
+
+
+def get_cost_allocation_tag_keys(aws_account: AWSAccount) -> List[str]:
+    """Cost allocation tag keys to ingest, config_data['cost_allocation_tags'] or the global default"""
+    tag_keys = (aws_account.config_data or {}).get("cost_allocation_tags")
+    if tag_keys is None:
+        tag_keys = settings.COST_ALLOCATION_TAG_KEYS
+    return list(dict.fromkeys(key for key in tag_keys if key))
+
+
+def get_cur_tenant_dir(aws_account: AWSAccount) -> str:
+    """Directory operators place a tenant's CUR exports in, CUR_DATA_DIR/<tenant_id>"""
+    return os.path.realpath(os.path.join(settings.CUR_DATA_DIR, str(aws_account.tenant_id)))
+
+
+def get_cur_path(aws_account: AWSAccount) -> str:
+    """
+    Directory holding the account's CUR exports
+
+    A tenant's claim to an AWS account ID proves nothing, so exports are
+    only read from the tenant's own directory: <tenant dir>/<account_id>,
+    or config_data['cur_path'] relative to it, which only an operator
+    assigns (python -m app.services.cur_ingest --assign-path).
+
+    Raises:
+        ValueError: If the path resolves outside the tenant's directory,
+            through ".." or a symbolic link
+    """
+    tenant_dir = get_cur_tenant_dir(aws_account)
+    relative = (aws_account.config_data or {}).get("cur_path") or aws_account.account_id
+    path = os.path.realpath(os.path.join(tenant_dir, relative))
+    if os.path.commonpath([tenant_dir, path]) != tenant_dir:
+        raise ValueError(f"CUR path {relative} is outside the tenant's export directory")
+    return path
+
+
+def get_payer_account_id(aws_account: AWSAccount) -> Optional[str]:
+    """AWS account ID of the payer billing this account, config_data['payer_account_id'], None for a payer"""
+    payer_account_id = (aws_account.config_data or {}).get("payer_account_id")
+    if not payer_account_id or payer_account_id == aws_account.account_id:
+        return None
+    return payer_account_id
@@ -1,78 +1,285 @@
-import boto3
-from typing import Optional
+import threading
+from collections import OrderedDict
+from datetime import timezone
+from typing import Optional, Dict, Hashable, Any
+import botocore.session
+from botocore.config import Config
+from botocore.credentials import CredentialProvider, CredentialResolver, RefreshableCredentials
 from botocore.exceptions import ClientError, BotoCoreError
 import logging
 
+from app.core.config import settings
+
 logger = logging.getLogger(__name__)
 
+# Services whose calls go through app.services.rate_limiter, which does the
+# retrying; botocore retries would multiply its attempts and hide throttles
+# from its token bucket, circuit breaker and metrics
+LIMITER_RETRIED_SERVICES = {'ce'}
+
+
+class LRUCache:
+    """Thread-safe mapping that evicts the least recently used entry past max_size"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max(max_size, 1)
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+
+class _AssumedRoleProvider(CredentialProvider):
+    """Hands a role session its cached RefreshableCredentials"""
+
+    METHOD = 'sts-assume-role'
+
+    def __init__(self, credentials: RefreshableCredentials):
+        super().__init__()
+        self._credentials = credentials
+
+    def load(self) -> RefreshableCredentials:
+        return self._credentials
+
 
 class AWSClientManager:
-    """Manages AWS client connections using cross-account IAM roles"""
+    """Manages AWS client connections using cross-account IAM roles
 
-    def __init__(self):
-        self._clients = {}
+    Assumed-role credentials are cached per role separately from clients and
+    refreshed by botocore before they expire, so long-lived workers keep
+    working and each role costs one sts:AssumeRole per credential lifetime.
+    Both caches are LRU-bounded.
+    """
 
-    def get_cost_explorer_client(
+    SESSION_NAME = 'CloudCostlySession'
+
+    def __init__(
+        self,
+        credential_cache_size: Optional[int] = None,
+        client_cache_size: Optional[int] = None
+    ):
+        # Shared session: service models and endpoint data are loaded once
+        self._session = botocore.session.get_session()
+        self._credentials = LRUCache(credential_cache_size or settings.AWS_CREDENTIAL_CACHE_SIZE)
+        self._clients = LRUCache(client_cache_size or settings.AWS_CLIENT_CACHE_SIZE)
+        self._sts_clients: Dict[str, Any] = {}
+        # Connection pooling, adaptive client-side retries and bounded timeouts for every client
+        self._client_config = Config(
+            max_pool_connections=settings.AWS_MAX_POOL_CONNECTIONS,
+            retries={
+                'mode': 'adaptive',
+                'max_attempts': settings.AWS_MAX_ATTEMPTS
+            },
+            connect_timeout=settings.AWS_CONNECT_TIMEOUT_SECONDS,
+            read_timeout=settings.AWS_READ_TIMEOUT_SECONDS
+        )
+        self._limited_client_config = self._client_config.merge(
+            Config(retries={'mode': 'standard', 'total_max_attempts': 1})
+        )
+        self._lock = threading.Lock()
+        # Striped locks so concurrent misses for one key do the work only once
+        self._key_locks = [threading.Lock() for _ in range(64)]
+
+    def _lock_for(self, key: Hashable) -> threading.Lock:
+        return self._key_locks[hash(key) % len(self._key_locks)]
+
+    def _get_sts_client(self, region: str):
+        """STS client using the platform's own credentials"""
+        with self._lock:
+            if region not in self._sts_clients:
+                self._sts_clients[region] = self._session.create_client(
+                    'sts',
+                    region_name=region,
+                    config=self._client_config
+                )
+            return self._sts_clients[region]
+
+    def _assume_role(self, role_arn: str, external_id: Optional[str], region: str) -> Dict[str, str]:
+        """Call sts:AssumeRole and return credentials in botocore's metadata format"""
+        assume_role_params = {
+            'RoleArn': role_arn,
+            'RoleSessionName': self.SESSION_NAME,
+            'DurationSeconds': settings.AWS_ASSUME_ROLE_DURATION_SECONDS
+        }
+
+        if external_id:
+            assume_role_params['ExternalId'] = external_id
+
+        credentials = self._get_sts_client(region).assume_role(**assume_role_params)['Credentials']
+
+        return {
+            'access_key': credentials['AccessKeyId'],
+            'secret_key': credentials['SecretAccessKey'],
+            'token': credentials['SessionToken'],
+            'expiry_time': credentials['Expiration'].astimezone(timezone.utc).isoformat()
+        }
+
+    def _get_role_session(
+        self,
+        role_arn: str,
+        external_id: Optional[str] = None,
+        region: str = "us-east-1"
+    ) -> botocore.session.Session:
+        """
+        Get a botocore session carrying auto-refreshing credentials for a role
+
+        The session shares the data loader of the manager's base session, so
+        creating it does not reload service models.
+        """
+        cache_key = (role_arn, external_id)
+
+        role_session = self._credentials.get(cache_key)
+        if role_session is not None:
+            return role_session
+
+        with self._lock_for(cache_key):
+            role_session = self._credentials.get(cache_key)
+            if role_session is not None:
+                return role_session
+
+            def refresh() -> Dict[str, str]:
+                logger.info(f"Refreshing assumed-role credentials for {role_arn}")
+                return self._assume_role(role_arn, external_id, region)
+
+            credentials = RefreshableCredentials.create_from_metadata(
+                metadata=self._assume_role(role_arn, external_id, region),
+                refresh_using=refresh,
+                method='sts-assume-role'
+            )
+
+            # The role's credentials are the only ones the session may resolve
+            role_session = botocore.session.Session()
+            role_session.register_component('data_loader', self._session.get_component('data_loader'))
+            role_session.register_component(
+                'credential_provider', CredentialResolver(providers=[_AssumedRoleProvider(credentials)])
+            )
+
+            self._credentials.put(cache_key, role_session)
+            return role_session
+
+    def get_credentials(
+        self,
+        role_arn: str,
+        external_id: Optional[str] = None,
+        region: str = "us-east-1"
+    ) -> RefreshableCredentials:
+        """
+        Get cached assumed-role credentials, refreshed automatically before expiry
+
+        Args:
+            role_arn: IAM role ARN for cross-account access
+            external_id: Optional external ID for additional security
+            region: Region of the STS endpoint used to assume the role
+
+        Returns:
+            botocore RefreshableCredentials
+        """
+        return self._get_role_session(role_arn, external_id, region).get_credentials()
+
+    def get_client(
         self,
+        service_name: str,
         role_arn: str,
         external_id: Optional[str] = None,
         region: str = "us-east-1"
     ):
         """
-        Get Cost Explorer client using cross-account IAM role
+        Get a pooled client for any AWS service using cross-account IAM role
+
+        All services for the same role share one set of assumed-role
+        credentials, and clients are reused across calls.
 
         Args:
+            service_name: boto3 service name, e.g. 'ec2', 'cloudwatch', 'ce'
             role_arn: IAM role ARN for cross-account access
             external_id: Optional external ID for additional security
             region: AWS region
 
         Returns:
-            boto3 Cost Explorer client
+            boto3 client for the service
         """
-        # Create cache key
-        cache_key = f"{role_arn}:{region}:ce"
+        cache_key = (role_arn, external_id, region, service_name)
 
-        # Return cached client if available
-        if cache_key in self._clients:
-            return self._clients[cache_key]
+        client = self._clients.get(cache_key)
+        if client is not None:
+            return client
 
         try:
-            # Create STS client to assume role
-            sts_client = boto3.client('sts', region_name=region)
-
-            # Prepare assume role parameters
-            assume_role_params = {
-                'RoleArn': role_arn,
-                'RoleSessionName': 'CloudCostlySession'
-            }
-
-            if external_id:
-                assume_role_params['ExternalId'] = external_id
-
-            # Assume the role
-            assumed_role = sts_client.assume_role(**assume_role_params)
-
-            # Get temporary credentials
-            credentials = assumed_role['Credentials']
-
-            # Create Cost Explorer client with assumed role credentials
-            ce_client = boto3.client(
-                'ce',
-                region_name=region,
-                aws_access_key_id=credentials['AccessKeyId'],
-                aws_secret_access_key=credentials['SecretAccessKey'],
-                aws_session_token=credentials['SessionToken']
-            )
+            role_session = self._get_role_session(role_arn, external_id, region)
 
-            # Cache the client
-            self._clients[cache_key] = ce_client
+            with self._lock_for(cache_key):
+                client = self._clients.get(cache_key)
+                if client is None:
+                    client = role_session.create_client(
+                        service_name,
+                        region_name=region,
+                        config=(
+                            self._limited_client_config if service_name in LIMITER_RETRIED_SERVICES
+                            else self._client_config
+                        )
+                    )
+                    self._clients.put(cache_key, client)
 
-            return ce_client
+            return client
 
         except (ClientError, BotoCoreError) as e:
-            logger.error(f"Failed to create AWS Cost Explorer client: {str(e)}")
+            logger.error(f"Failed to create AWS {service_name} client: {str(e)}")
             raise Exception(f"Failed to connect to AWS: {str(e)}")
 
+    def assume_role(
+        self,
+        role_arn: str,
+        external_id: Optional[str] = None,
+        region: str = "us-east-1",
+        service_name: str = "ce"
+    ):
+        """
+        Get a client for a service under a cross-account IAM role
+
+        Alias of get_client with the argument order used by the
+        recommendation collectors.
+        """
+        return self.get_client(service_name, role_arn, external_id, region)
+
+    def get_cost_explorer_client(
+        self,
+        role_arn: str,
+        external_id: Optional[str] = None,
+        region: str = "us-east-1"
+    ):
+        """
+        Get Cost Explorer client using cross-account IAM role
+
+        Args:
+            role_arn: IAM role ARN for cross-account access
+            external_id: Optional external ID for additional security
+            region: AWS region
+
+        Returns:
+            boto3 Cost Explorer client
+        """
+        return self.get_client('ce', role_arn, external_id, region)
+
     def get_pricing_client(
         self,
         role_arn: str,
@@ -92,43 +299,13 @@ class AWSClientManager:
         """
         # Pricing API is only available in us-east-1
         region = "us-east-1"
-        cache_key = f"{role_arn}:{region}:pricing"
-
-        if cache_key in self._clients:
-            return self._clients[cache_key]
-
-        try:
-            sts_client = boto3.client('sts', region_name=region)
-
-            assume_role_params = {
-                'RoleArn': role_arn,
-                'RoleSessionName': 'CloudCostlyPricingSession'
-            }
-
-            if external_id:
-                assume_role_params['ExternalId'] = external_id
 
-            assumed_role = sts_client.assume_role(**assume_role_params)
-            credentials = assumed_role['Credentials']
-
-            pricing_client = boto3.client(
-                'pricing',
-                region_name=region,
-                aws_access_key_id=credentials['AccessKeyId'],
-                aws_secret_access_key=credentials['SecretAccessKey'],
-                aws_session_token=credentials['SessionToken']
-            )
-
-            self._clients[cache_key] = pricing_client
-            return pricing_client
-
-        except (ClientError, BotoCoreError) as e:
-            logger.error(f"Failed to create AWS Pricing client: {str(e)}")
-            raise Exception(f"Failed to connect to AWS Pricing API: {str(e)}")
+        return self.get_client('pricing', role_arn, external_id, region)
 
     def clear_cache(self):
-        """Clear all cached clients"""
+        """Clear all cached credentials and clients"""
         self._clients.clear()
+        self._credentials.clear()
 
 
 # Global client manager instance
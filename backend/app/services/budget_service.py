@@ -1,13 +1,16 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, func
 from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
 from typing import List, Optional, Dict, Any
 from uuid import UUID
 import logging
 
+from app.core.money import CENT, from_micros, percentage, to_decimal
 from app.models.budget import Budget, BudgetAlert, BudgetPeriod
 from app.models.cost_data import CostData
 from app.schemas.budget import BudgetCreate, BudgetUpdate, BudgetResponse, BudgetStatusResponse
+from app.services.dimensions import REGIONS, SERVICES
 
 logger = logging.getLogger(__name__)
 
@@ -61,31 +64,38 @@ class BudgetService:
         account_id: Optional[UUID] = None,
         service_name: Optional[str] = None,
         region: Optional[str] = None
-    ) -> float:
-        """Calculate current spending for a budget"""
-        query = db.query(func.sum(CostData.cost)).filter(
+    ) -> Decimal:
+        """Calculate current spending for a budget, exactly (summed as integer micros)"""
+        # Compare as dates: cost_data is partitioned on a date column, and
+        # timestamp bounds would stop the planner from pruning partitions
+        query = db.query(func.sum(CostData.cost_micros)).filter(
             and_(
                 CostData.tenant_id == tenant_id,
-                CostData.date >= period_start,
-                CostData.date < period_end
+                CostData.date >= period_start.date(),
+                CostData.date < period_end.date()
             )
         )
 
         # Apply optional filters
         if account_id:
-            query = query.filter(CostData.account_id == account_id)
+            query = query.filter(CostData.aws_account_id == account_id)
         if service_name:
-            query = query.filter(CostData.service == service_name)
+            service_id = SERVICES.lookup(db, service_name)
+            if service_id is None:
+                return Decimal(0)  # No cost has been recorded for this service yet
+            query = query.filter(CostData.service_id == service_id)
         if region:
-            query = query.filter(CostData.region == region)
+            region_id = REGIONS.lookup(db, region)
+            if region_id is None:
+                return Decimal(0)
+            query = query.filter(CostData.region_id == region_id)
 
-        result = query.scalar()
-        return float(result) if result else 0.0
+        return from_micros(query.scalar())
 
     @staticmethod
     def calculate_budget_status(
         budget: Budget,
-        current_spend: float,
+        current_spend: Decimal,
         period_start: datetime,
         period_end: datetime
     ) -> Dict[str, Any]:
@@ -100,28 +110,29 @@ class BudgetService:
         # Ensure days_elapsed is at least 1 to avoid division by zero
         days_elapsed = max(days_elapsed, 1)
 
-        # Calculate percentages
-        percentage_used = (current_spend / budget.budget_amount * 100) if budget.budget_amount > 0 else 0
+        # Calculate percentages, comparing exact amounts
+        budget_amount = to_decimal(budget.budget_amount)
+        percentage_used = percentage(current_spend, budget_amount)
         is_over_threshold = percentage_used >= budget.threshold_percentage
-        is_over_budget = current_spend >= budget.budget_amount
+        is_over_budget = current_spend >= budget_amount
 
         # Project future spend
         daily_average = current_spend / days_elapsed
-        projected_spend = daily_average * total_days if days_elapsed > 0 else 0
-        will_exceed_budget = projected_spend > budget.budget_amount
+        projected_spend = daily_average * total_days if days_elapsed > 0 else Decimal(0)
+        will_exceed_budget = projected_spend > budget_amount
 
         return {
             "budget_id": budget.id,
             "budget_name": budget.name,
             "budget_amount": budget.budget_amount,
             "current_spend": current_spend,
-            "percentage_used": round(percentage_used, 2),
+            "percentage_used": percentage_used,
             "threshold_percentage": budget.threshold_percentage,
             "is_over_threshold": is_over_threshold,
             "is_over_budget": is_over_budget,
             "days_into_period": days_elapsed,
             "days_remaining": max(days_remaining, 0),
-            "projected_spend": round(projected_spend, 2),
+            "projected_spend": projected_spend.quantize(CENT, rounding=ROUND_HALF_UP),
             "will_exceed_budget": will_exceed_budget
         }
 
@@ -239,9 +250,10 @@ class BudgetService:
         now = datetime.utcnow()
         days_remaining = (period_end - now).days
 
-        percentage_used = (current_spend / budget.budget_amount * 100) if budget.budget_amount > 0 else 0
+        budget_amount = to_decimal(budget.budget_amount)
+        percentage_used = percentage(current_spend, budget_amount)
         is_over_threshold = percentage_used >= budget.threshold_percentage
-        is_over_budget = current_spend >= budget.budget_amount
+        is_over_budget = current_spend >= budget_amount
 
         # Convert to dict and add calculated fields
         budget_dict = {
@@ -265,7 +277,7 @@ class BudgetService:
             "updated_at": budget.updated_at,
             # Calculated fields
             "current_spend": current_spend,
-            "percentage_used": round(percentage_used, 2),
+            "percentage_used": percentage_used,
             "days_remaining": max(days_remaining, 0),
             "is_over_budget": is_over_budget,
             "is_over_threshold": is_over_threshold
@@ -0,0 +1,242 @@
+"""
+COPY-based bulk loading for cost tables
+
+Rows are serialized into an in-memory buffer, streamed into a temp
+staging table with COPY FROM STDIN and merged into the target table with
+one INSERT ... SELECT ... ON CONFLICT. Every ingestion path (Cost
+Explorer, CUR, backfills) writes through here.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+import io
+import json
+import logging
+
+from app.services.dimensions import REGIONS, SERVICES, USAGE_TYPES, encode_dimensions
+from app.services.partitions import CostDataPartitions
+from app.services.result_cache import bump_cost_data_version
+from app.services.rollups import CostRollups
+
+logger = logging.getLogger(__name__)
+
+# How an incoming row combines with an existing row for the same key
+MERGE_REPLACE = "replace"  # The incoming cost_micros is the full value (Cost Explorer)
+MERGE_ACCUMULATE = "accumulate"  # The incoming cost_micros is a part of the value (CUR chunks)
+
+
+class BulkTable:
+    """Target table of the bulk loader with its staging table definition"""
+
+    def __init__(
+        self,
+        name: str,
+        columns: Dict[str, str],
+        key_columns: List[str],
+        partitioned: bool = False,
+        dimensions: Optional[Dict[str, tuple]] = None,
+        generated: Optional[Dict[str, str]] = None,
+        rollups: bool = False
+    ):
+        """
+        Args:
+            name: Target table
+            columns: Loaded column names and their staging SQL types, in COPY order
+            key_columns: Columns of the target's unique natural key
+            partitioned: Target is partitioned by month on date (see app.services.partitions)
+            dimensions: Dictionary-encoded columns, id column to (name column,
+                DimensionCache). Rows carry the names; ids are resolved on load.
+            generated: Key columns the database computes, to the loaded column
+                they are computed from
+            rollups: Loads mark their days dirty for cost_summaries (see app.services.rollups)
+        """
+        self.name = name
+        self.columns = list(columns)
+        self.column_types = columns
+        self.key_columns = key_columns
+        self.partitioned = partitioned
+        self.dimensions = dimensions or {}
+        self.generated = generated or {}
+        self.rollups = rollups
+        # Rows are de-duplicated before their ids are resolved, so key them by name
+        self.row_key_columns = [
+            self.dimensions[column][0] if column in self.dimensions else self.generated.get(column, column)
+            for column in key_columns
+        ]
+        self.staging_name = f"{name}_staging"
+
+    def staging_ddl(self) -> str:
+        definitions = ", ".join(f"{column} {sql_type}" for column, sql_type in self.column_types.items())
+        # Session-local, emptied on commit so a failed merge never leaks rows into the next one
+        return f"CREATE TEMP TABLE IF NOT EXISTS {self.staging_name} ({definitions}) ON COMMIT DELETE ROWS"
+
+
+COST_DATA = BulkTable(
+    "cost_data",
+    {
+        "tenant_id": "UUID NOT NULL",
+        "aws_account_id": "UUID NOT NULL",
+        "date": "DATE NOT NULL",
+        "service_id": "SMALLINT NOT NULL",
+        "region_id": "SMALLINT",
+        "usage_type_id": "INTEGER",
+        "tags": "JSONB NOT NULL",
+        "cost_micros": "BIGINT NOT NULL",
+        "currency": "VARCHAR",
+    },
+    # uq_cost_data_account_date_service_region_usage_tags
+    ["aws_account_id", "date", "service_id", "region_id", "usage_type_id", "tags_hash"],
+    partitioned=True,
+    dimensions={
+        "service_id": ("service", SERVICES),
+        "region_id": ("region", REGIONS),
+        "usage_type_id": ("usage_type", USAGE_TYPES),
+    },
+    generated={"tags_hash": "tags"},
+    rollups=True
+)
+
+COST_TAG_DATA = BulkTable(
+    "cost_tag_data",
+    {
+        "tenant_id": "UUID NOT NULL",
+        "aws_account_id": "UUID NOT NULL",
+        "date": "DATE NOT NULL",
+        "tag_key": "VARCHAR NOT NULL",
+        "tag_value": "VARCHAR NOT NULL",
+        "cost_micros": "BIGINT NOT NULL",
+        "currency": "VARCHAR",
+    },
+    # uq_cost_tag_data_account_date_key_value
+    ["aws_account_id", "date", "tag_key", "tag_value"]
+)
+
+
+def row_key(table: BulkTable, row: Dict) -> tuple:
+    """Hashable natural key of a row, for de-duplicating before a load"""
+    return tuple(
+        json.dumps(row[column], sort_keys=True) if isinstance(row[column], dict) else row[column]
+        for column in table.row_key_columns
+    )
+
+
+def _escape(value: str) -> str:
+    """Escape a value for COPY's text format"""
+    if "\\" in value or "\t" in value or "\n" in value or "\r" in value:
+        value = value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    return value
+
+
+def write_copy_text(rows: Iterable[Dict], columns: List[str], buffer: io.StringIO) -> int:
+    """
+    Serialize rows in COPY's text format: tab separated, \\N for NULL
+
+    Returns:
+        Number of rows written
+    """
+    # Ids and dates repeat across most rows of a load; format each one once
+    formatted: Dict = {}
+    count = 0
+
+    for row in rows:
+        values = []
+        for column in columns:
+            value = row.get(column)
+            if value is None:
+                values.append("\\N")
+            elif value.__class__ is str:
+                values.append(_escape(value))
+            elif value.__class__ in (int, float):
+                values.append(repr(value))
+            elif isinstance(value, dict):
+                values.append(_escape(json.dumps(value, sort_keys=True, separators=(",", ":"))))
+            else:
+                text_value = formatted.get(value)
+                if text_value is None:
+                    text_value = formatted[value] = _escape(str(value))
+                values.append(text_value)
+        buffer.write("\t".join(values))
+        buffer.write("\n")
+        count += 1
+
+    return count
+
+
+def copy_rows(
+    db: Session,
+    table: BulkTable,
+    rows: Iterable[Dict],
+    mode: str = MERGE_REPLACE
+) -> Tuple[int, int]:
+    """
+    Bulk-load rows with COPY and merge them into the target table
+
+    Rows must be unique per natural key within one call. Runs in the
+    session's transaction and does not commit; the cost_data_version of
+    every tenant in the rows is bumped in it too.
+
+    Args:
+        db: Database session
+        table: COST_DATA or COST_TAG_DATA
+        rows: Dictionaries with the table's column values, and names in place
+            of dimension ids (the ids are added to the dictionaries)
+        mode: MERGE_REPLACE or MERGE_ACCUMULATE
+
+    Returns:
+        Tuple of (inserted, updated) row counts
+    """
+    if mode == MERGE_ACCUMULATE:
+        cost_update = f"{table.name}.cost_micros + EXCLUDED.cost_micros"
+    elif mode == MERGE_REPLACE:
+        cost_update = "EXCLUDED.cost_micros"
+    else:
+        raise ValueError(f"Unknown merge mode: {mode}")
+
+    rows = list(rows)
+    if table.dimensions and rows:
+        encode_dimensions(db, rows, table.dimensions)
+
+    buffer = io.StringIO()
+    if not write_copy_text(rows, table.columns, buffer):
+        return 0, 0
+    buffer.seek(0)
+
+    if table.partitioned:
+        # Rows for a month without a partition would fail the whole merge
+        dates = [row["date"] for row in rows]
+        CostDataPartitions.ensure_partitions(db, min(dates), max(dates))
+
+    columns = ", ".join(table.columns)
+
+    db.execute(text(table.staging_ddl()))
+    db.execute(text(f"TRUNCATE {table.staging_name}"))
+
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table.staging_name} ({columns}) FROM STDIN", buffer)
+    finally:
+        cursor.close()
+
+    inserted, total = db.execute(text(f"""
+        WITH merged AS (
+            INSERT INTO {table.name} (id, {columns})
+            SELECT gen_random_uuid(), {columns}
+            FROM {table.staging_name}
+            ON CONFLICT ({', '.join(table.key_columns)}) DO UPDATE SET
+                cost_micros = {cost_update},
+                currency = EXCLUDED.currency,
+                updated_at = now()
+            -- Staged rows carry no updated_at, so only conflicting rows get one.
+            -- (xmax can't be read back from a partitioned table.)
+            RETURNING (updated_at IS NULL) AS inserted
+        )
+        SELECT count(*) FILTER (WHERE inserted), count(*) FROM merged
+    """)).one()
+
+    db.execute(text(f"TRUNCATE {table.staging_name}"))
+
+    if table.rollups:
+        CostRollups.mark_dirty(db, rows)
+    bump_cost_data_version(db, (row["tenant_id"] for row in rows))
+
+    return inserted, total - inserted
@@ -0,0 +1,356 @@
+"""
+Cost query engine: any group-by, filters and granularity in one statement
+
+A CostQuery names the dimensions to group by (service, region, account,
+usage_type, or tag:<key>), filters on dimension values, an optional time
+granularity (day, week, month) and an optional top-N with the rest folded
+into an "Other" bucket. CostQueryEngine compiles it into a single SQL
+statement.
+
+Queries that only touch service and account are answered from the
+rollups in cost_summaries, with the same planner the fixed reports use
+(see app.services.rollups); anything else scans cost_data through its
+covering indexes, and tag values come from the GIN-indexed tags column.
+Only accounts ingested from CUR carry resource tags on cost_data, so
+Cost Explorer accounts count as untagged there.
+"""
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+import uuid
+
+from sqlalchemy import Date, case, cast, false, func, null, or_, select, union_all
+from sqlalchemy.orm import Session, aliased
+
+from app.core.money import percentage, round_money
+from app.models.aws_account import AWSAccount
+from app.models.cost_data import CostData, CostSummary
+from app.models.cost_dimension import RegionDimension, ServiceDimension, UsageTypeDimension
+from app.models.tenant import Tenant
+from app.services.account_config import COST_SOURCE_CUR, get_cost_source
+from app.services.rollups import PERIOD_DAILY, PERIOD_MONTHLY, PERIOD_WEEKLY, CostRollups, plan_rollup_ranges
+
+DIMENSION_SERVICE = "service"
+DIMENSION_REGION = "region"
+DIMENSION_ACCOUNT = "account"
+DIMENSION_USAGE_TYPE = "usage_type"
+TAG_PREFIX = "tag:"
+
+DIMENSIONS = (DIMENSION_SERVICE, DIMENSION_REGION, DIMENSION_ACCOUNT, DIMENSION_USAGE_TYPE)
+
+# Dimensions cost_summaries is keyed by
+ROLLUP_DIMENSIONS = {DIMENSION_SERVICE, DIMENSION_ACCOUNT}
+
+# Granularity to the date_trunc unit and the coarsest rollup that fits in one bucket
+GRANULARITIES = {
+    "day": ("day", PERIOD_DAILY),
+    "week": ("week", PERIOD_WEEKLY),
+    "month": ("month", PERIOD_MONTHLY),
+}
+
+OTHER = "Other"
+
+# Names of dictionary-encoded dimensions
+NAME_TABLES = {
+    DIMENSION_SERVICE: ServiceDimension,
+    DIMENSION_REGION: RegionDimension,
+    DIMENSION_USAGE_TYPE: UsageTypeDimension,
+}
+
+
+def _is_tag(dimension: str) -> bool:
+    return dimension.startswith(TAG_PREFIX)
+
+
+class CostQuery:
+    """A validated cost query; raises ValueError for anything it cannot answer"""
+
+    def __init__(
+        self,
+        group_by: Sequence[str] = (),
+        filters: Optional[Dict[str, Sequence[Optional[str]]]] = None,
+        granularity: Optional[str] = None,
+        top_n: Optional[int] = None
+    ):
+        self.group_by: List[str] = list(dict.fromkeys(group_by))
+        self.filters: Dict[str, List[Optional[str]]] = {
+            dimension: list(values) for dimension, values in (filters or {}).items()
+        }
+        self.granularity = granularity
+        self.top_n = top_n
+
+        for dimension in [*self.group_by, *self.filters]:
+            if dimension not in DIMENSIONS and not (_is_tag(dimension) and dimension[len(TAG_PREFIX):]):
+                raise ValueError(
+                    f"Unknown dimension '{dimension}', expected one of {', '.join(DIMENSIONS)} or tag:<key>"
+                )
+        for value in self.filters.get(DIMENSION_ACCOUNT, []):
+            try:
+                uuid.UUID(str(value))
+            except ValueError:
+                raise ValueError(f"Account filter '{value}' is not an account id")
+        if granularity is not None and granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity '{granularity}', expected one of {', '.join(GRANULARITIES)}")
+        if top_n is not None and top_n < 1:
+            raise ValueError("top_n must be at least 1")
+
+    @property
+    def uses_rollups(self) -> bool:
+        """Whether every grouped and filtered dimension is in cost_summaries"""
+        return set(self.group_by) <= ROLLUP_DIMENSIONS and set(self.filters) <= ROLLUP_DIMENSIONS
+
+    @property
+    def uses_tags(self) -> bool:
+        return any(_is_tag(dimension) for dimension in [*self.group_by, *self.filters])
+
+
+class CostQueryEngine:
+    """Compiles and runs CostQuery objects for a tenant"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def run(self, tenant_id: str, start_date: date, end_date: date, query: CostQuery) -> Dict:
+        """
+        Run a cost query over an inclusive date range
+
+        Args:
+            tenant_id: Tenant UUID
+            start_date: Start date
+            end_date: End date (inclusive)
+            query: Dimensions, filters, granularity and top-N
+
+        Returns:
+            Dictionary with one row per period and group, most expensive first
+        """
+        downsampled_before = self.db.query(Tenant.cost_downsampled_before).filter(
+            Tenant.id == tenant_id
+        ).scalar()
+
+        statement = self.statement(tenant_id, start_date, end_date, query, downsampled_before)
+        rows = self.db.execute(statement).all() if statement is not None else []
+        # Ungrouped parts return a single NULL sum when there is nothing to add up
+        rows = [row for row in rows if row.micros is not None]
+
+        period_micros: Dict[Optional[date], int] = {}
+        for row in rows:
+            period_micros[row.period] = period_micros.get(row.period, 0) + row.micros
+        total_micros = sum(period_micros.values())
+
+        result_rows = []
+        for row in rows:
+            dimensions = {}
+            for index, dimension in enumerate(query.group_by):
+                if row.other:
+                    dimensions[dimension] = OTHER
+                elif dimension == DIMENSION_ACCOUNT:
+                    key = getattr(row, f"key_{index}")
+                    dimensions[dimension] = str(key) if key else None
+                else:
+                    dimensions[dimension] = getattr(row, f"name_{index}")
+
+            item = {
+                "period": row.period.isoformat() if row.period else None,
+                "dimensions": dimensions,
+                "cost": round_money(row.micros),
+                # Share of its period, or of the whole range without granularity
+                "percentage": percentage(row.micros, period_micros[row.period]),
+                "other": row.other
+            }
+            if DIMENSION_ACCOUNT in query.group_by and not row.other:
+                item["account_name"] = row.account_name
+            result_rows.append(item)
+
+        accounts_without_tag_detail = 0
+        if query.uses_tags:
+            accounts = self.db.query(AWSAccount).filter(AWSAccount.tenant_id == tenant_id).all()
+            accounts_without_tag_detail = sum(1 for account in accounts if get_cost_source(account) != COST_SOURCE_CUR)
+
+        return {
+            "total_cost": round_money(total_micros),
+            "currency": "USD",
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "group_by": query.group_by,
+            "granularity": query.granularity,
+            # Before this only service and account totals per month remain (see app.services.retention)
+            "detail_available_from": downsampled_before.isoformat() if downsampled_before else None,
+            "accounts_without_tag_detail": accounts_without_tag_detail,
+            "rows": result_rows
+        }
+
+    def statement(
+        self,
+        tenant_id: str,
+        start_date: date,
+        end_date: date,
+        query: CostQuery,
+        downsampled_before: Optional[date] = None
+    ):
+        """
+        The single SELECT answering a query, None for an empty range
+
+        Rollup rows and raw days are pre-aggregated per period and group and
+        summed again on top. With top_n, groups are ranked by their total
+        over the whole range, so the same groups make the cut in every
+        period. Dimension names are joined on last, onto the few result rows.
+        """
+        account_ids = query.filters.get(DIMENSION_ACCOUNT)
+        dirty = CostRollups.dirty_ranges(
+            self.db, tenant_id, start_date, end_date, account_ids[0] if account_ids and len(account_ids) == 1 else None
+        )
+
+        if query.uses_rollups:
+            coarsest = GRANULARITIES[query.granularity][1] if query.granularity else PERIOD_MONTHLY
+            plan = plan_rollup_ranges(start_date, end_date, dirty, downsampled_before, coarsest)
+            parts = self._rollup_parts(tenant_id, query, plan)
+            raw_ranges = plan.raw_ranges
+        else:
+            parts = []
+            # Raw rows end at the horizon; only monthly rollups hold what came before
+            raw_start = max(start_date, downsampled_before) if downsampled_before else start_date
+            raw_ranges = [(raw_start, end_date)] if raw_start <= end_date else []
+
+        if raw_ranges:
+            parts.append(self._raw_part(tenant_id, query, raw_ranges))
+
+        if not parts:
+            return None
+
+        key_names = [f"key_{index}" for index in range(len(query.group_by))]
+        combined = (parts[0] if len(parts) == 1 else union_all(*parts)).subquery("cost_parts")
+        keys = [combined.c[name] for name in key_names]
+        grouped = select(
+            combined.c.period, *keys, func.sum(combined.c.micros).label("micros")
+        ).group_by(combined.c.period, *keys).subquery("grouped")
+        keys = [grouped.c[name] for name in key_names]
+
+        if query.top_n and keys:
+            totals = select(
+                grouped,
+                func.sum(grouped.c.micros).over(partition_by=keys).label("group_micros")
+            ).subquery("group_totals")
+            ranked = select(
+                totals,
+                func.dense_rank().over(order_by=[totals.c.group_micros.desc(), *(totals.c[name] for name in key_names)])
+                .label("group_rank")
+            ).subquery("ranked")
+            other = ranked.c.group_rank > query.top_n
+            final_keys = [case((~other, ranked.c[name])).label(name) for name in key_names]
+            result = select(
+                ranked.c.period, *final_keys, func.sum(ranked.c.micros).label("micros"), other.label("other")
+            ).group_by(ranked.c.period, *final_keys, other).subquery("result")
+        else:
+            result = select(grouped, false().label("other")).subquery("result")
+
+        columns = [result.c.period, *(result.c[name] for name in key_names), result.c.micros, result.c.other]
+        joined = result
+        for index, dimension in enumerate(query.group_by):
+            key = result.c[f"key_{index}"]
+            if dimension in NAME_TABLES:
+                names = aliased(NAME_TABLES[dimension])
+                joined = joined.outerjoin(names, names.id == key)
+                columns.append(names.name.label(f"name_{index}"))
+            elif dimension == DIMENSION_ACCOUNT:
+                accounts = aliased(AWSAccount)
+                joined = joined.outerjoin(accounts, accounts.id == key)
+                columns.append(accounts.account_name.label("account_name"))
+            else:
+                columns.append(key.label(f"name_{index}"))
+
+        return select(*columns).select_from(joined).order_by(
+            result.c.period, result.c.other, result.c.micros.desc()
+        )
+
+    def _rollup_parts(self, tenant_id: str, query: CostQuery, plan) -> List:
+        """Pre-aggregated selects over the rollup rows of a plan"""
+        by_service = DIMENSION_SERVICE in query.group_by or DIMENSION_SERVICE in query.filters
+        columns = {DIMENSION_SERVICE: CostSummary.service_id, DIMENSION_ACCOUNT: CostSummary.aws_account_id}
+
+        period_ranges = []
+        for period_type, starts in plan.periods.items():
+            if starts:
+                period_ranges.append((period_type, CostSummary.period_start.in_(starts)))
+        if plan.daily_ranges:
+            period_ranges.append((PERIOD_DAILY, or_(
+                *(CostSummary.period_start.between(start, end) for start, end in plan.daily_ranges)
+            )))
+
+        parts = []
+        for period_type, in_plan in period_ranges:
+            # Monthly rows only reach a finer granularity past retention; they stay on their first day
+            if period_type == PERIOD_MONTHLY and query.granularity != "month":
+                bucket = CostSummary.period_start if query.granularity else null()
+            else:
+                bucket = self._bucket(CostSummary.period_start, query.granularity)
+            keys = [columns[dimension].label(f"key_{index}") for index, dimension in enumerate(query.group_by)]
+            part = select(
+                bucket.label("period"), *keys, func.sum(CostSummary.total_cost_micros).label("micros")
+            ).where(
+                CostSummary.tenant_id == tenant_id,
+                CostSummary.period_type == period_type,
+                in_plan,
+                # Service rows when services matter, account-level rows otherwise
+                CostSummary.service_id.isnot(None) if by_service else CostSummary.service_id.is_(None),
+                *self._filters(query, columns)
+            )
+            group_columns = ([bucket] if query.granularity else []) + keys
+            parts.append(part.group_by(*group_columns) if group_columns else part)
+
+        return parts
+
+    def _raw_part(self, tenant_id: str, query: CostQuery, ranges):
+        """Pre-aggregated select over cost_data for the given date ranges"""
+        columns = {
+            DIMENSION_SERVICE: CostData.service_id,
+            DIMENSION_REGION: CostData.region_id,
+            DIMENSION_ACCOUNT: CostData.aws_account_id,
+            DIMENSION_USAGE_TYPE: CostData.usage_type_id,
+        }
+        for dimension in [*query.group_by, *query.filters]:
+            if _is_tag(dimension):
+                columns[dimension] = func.nullif(CostData.tags[dimension[len(TAG_PREFIX):]].astext, '')
+
+        bucket = self._bucket(CostData.date, query.granularity)
+        keys = [columns[dimension].label(f"key_{index}") for index, dimension in enumerate(query.group_by)]
+        part = select(
+            bucket.label("period"), *keys, func.sum(CostData.cost_micros).label("micros")
+        ).where(
+            CostData.tenant_id == tenant_id,
+            or_(*(CostData.date.between(start, end) for start, end in ranges)),
+            *self._filters(query, columns)
+        )
+        group_columns = ([bucket] if query.granularity else []) + keys
+        return part.group_by(*group_columns) if group_columns else part
+
+    @staticmethod
+    def _bucket(day_column, granularity: Optional[str]):
+        if not granularity:
+            return null()
+        if granularity == "day":
+            return day_column
+        return cast(func.date_trunc(GRANULARITIES[granularity][0], day_column), Date)
+
+    @staticmethod
+    def _filters(query: CostQuery, columns: Dict) -> List:
+        """One condition per filtered dimension; its values are alternatives, None matches no value"""
+        conditions = []
+        for dimension, values in query.filters.items():
+            column = columns[dimension]
+            present = [value for value in values if value]
+            matches = []
+
+            if _is_tag(dimension) and present:
+                # Containment is answered by the GIN index on tags
+                key = dimension[len(TAG_PREFIX):]
+                matches += [CostData.tags.contains({key: value}) for value in present]
+            elif dimension in NAME_TABLES and present:
+                names = NAME_TABLES[dimension]
+                matches.append(column.in_(select(names.id).where(names.name.in_(present))))
+            elif present:
+                matches.append(column.in_(present))
+
+            if len(present) < len(values):
+                matches.append(column.is_(None))
+            conditions.append(or_(*matches) if matches else false())
+
+        return conditions
@@ -0,0 +1,628 @@
+"""
+Cost and Usage Report (CUR) ingestion
+
+Reads CUR exports (gzip CSV or Parquet) from a local directory or mounted
+bucket path that operators fill per tenant, CUR_DATA_DIR/<tenant_id>;
+see get_cur_path. Symbolic links there are never followed. Files are streamed in chunks of CUR_INGEST_CHUNK_ROWS line
+items; each chunk is aggregated onto the cost_data key, bulk-loaded with
+COPY and committed together with the file's offset, so an interrupted run
+resumes where it stopped without double counting.
+
+A payer's report covers its linked accounts. Linked accounts configured
+for CUR with the payer's payer_account_id get their line items stored
+under their own AWSAccount by the payer's ingest and are not ingested on
+their own. File progress is kept per tenant and export directory, so one
+directory is only ever ingested by one account.
+
+Run with: python -m app.services.cur_ingest --account-id <uuid> [--path DIR | --assign-path DIR]
+"""
+from concurrent.futures import Executor
+from datetime import date, datetime, timedelta, timezone
+from functools import partial
+from decimal import Decimal
+from itertools import chain, islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+import argparse
+import asyncio
+import csv
+import gzip
+import json
+import logging
+import os
+import re
+
+from app.core.config import settings
+from app.core.money import round_money, to_decimal, to_micros
+from app.models.aws_account import AWSAccount
+from app.models.cost_data import CostData, CostTagData
+from app.models.cur_ingest import CURIngestFile, CURIngestStatus
+from app.services.account_config import (
+    COST_SOURCE_CUR,
+    get_cost_allocation_tag_keys,
+    get_cost_source,
+    get_cur_path,
+    get_payer_account_id,
+)
+from app.services.bulk_loader import COST_DATA, COST_TAG_DATA, MERGE_ACCUMULATE, copy_rows
+from app.services.rollups import CostRollups
+
+logger = logging.getLogger(__name__)
+
+CUR_FILE_SUFFIXES = (".csv.gz", ".csv", ".parquet")
+
+# Billing period folders are named like 20251101-20251201 (end exclusive)
+BILLING_PERIOD_PATTERN = re.compile(r"^(\d{8})-(\d{8})$")
+
+# Normalized column names; CSV headers such as lineItem/UsageStartDate are
+# converted to the snake_case form Parquet exports already use
+USAGE_DATE_COLUMN = "line_item_usage_start_date"
+USAGE_ACCOUNT_COLUMN = "line_item_usage_account_id"
+SERVICE_COLUMNS = ("product_product_name", "line_item_product_code")
+REGION_COLUMNS = ("product_region", "product_region_code")
+USAGE_TYPE_COLUMN = "line_item_usage_type"
+COST_COLUMN = "line_item_unblended_cost"
+CURRENCY_COLUMN = "line_item_currency_code"
+TAG_MAP_COLUMN = "resource_tags"
+TAG_COLUMN_PREFIX = "resource_tags_"
+
+
+def billing_period_dates(billing_period: str) -> Tuple[date, date]:
+    """Start (inclusive) and end (exclusive) of a "YYYYMMDD-YYYYMMDD" billing period folder"""
+    match = BILLING_PERIOD_PATTERN.match(billing_period)
+    return (
+        datetime.strptime(match.group(1), "%Y%m%d").date(),
+        datetime.strptime(match.group(2), "%Y%m%d").date()
+    )
+
+
+def normalize_column(name: str) -> Tuple[str, Optional[str]]:
+    """
+    Map a CUR column name onto its Parquet-style snake_case name
+
+    Returns:
+        Tuple of (normalized name, tag key) where tag key is set for
+        resource tag columns, keeping the CSV header's original casing
+    """
+    category, _, attribute = name.partition("/")
+
+    if category == "resourceTags":
+        # resourceTags/user:Environment -> Environment, resourceTags/aws:createdBy stays prefixed
+        tag_key = attribute[5:] if attribute.startswith("user:") else attribute
+        return f"{TAG_COLUMN_PREFIX}{attribute}", tag_key
+
+    if name.startswith(TAG_COLUMN_PREFIX) and not attribute:
+        # Parquet exports lowercase tag columns: resource_tags_user_environment
+        tag_key = name[len(TAG_COLUMN_PREFIX):]
+        return name, tag_key[5:] if tag_key.startswith("user_") else tag_key
+
+    parts = [category, attribute] if attribute else [category]
+    normalized = "_".join(re.sub(r"(?<=[a-z0-9])([A-Z])", r"_\1", part).lower() for part in parts)
+    return normalized, None
+
+
+class CURIngestService:
+    """Ingests CUR exports for AWS accounts configured with cost_source 'cur'"""
+
+    def __init__(self, db: Session, executor: Optional[Executor] = None):
+        self.db = db
+        self.executor = executor
+
+    async def ingest_account(self, aws_account: AWSAccount, path: Optional[str] = None) -> Dict:
+        """
+        Ingest every new or changed CUR file for an account
+
+        Blocking file and database work runs in the executor.
+
+        Args:
+            aws_account: AWSAccount model instance
+            path: Export directory chosen by an operator, used as given;
+                defaults to the account's directory (see get_cur_path)
+
+        Returns:
+            Dictionary with ingestion summary
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(self._ingest_account, aws_account, path))
+
+    def _ingest_account(self, aws_account: AWSAccount, path: Optional[str]) -> Dict:
+        summary = {
+            "success": True,
+            "skipped": False,
+            "source": COST_SOURCE_CUR,
+            "files_ingested": 0,
+            "rows_read": 0,
+            "records_inserted": 0,
+            "records_updated": 0,
+            "total_cost_micros": 0,
+            "currency": "USD"
+        }
+
+        try:
+            root = os.path.realpath(path) if path else get_cur_path(aws_account)
+            covering = self.covering_account(aws_account, root)
+            if covering is not None:
+                # Its line items arrive with the covering account's ingest
+                logger.info(f"CUR of account {aws_account.account_id} is ingested by account {covering.account_id}")
+                aws_account.last_sync_at = covering.last_sync_at
+                aws_account.sync_status = "success"
+                self.db.commit()
+
+                summary["skipped"] = True
+                summary["covered_by"] = covering.account_id
+                summary["total_cost"] = float(round_money(summary.pop("total_cost_micros")))
+                return summary
+
+            if not os.path.isdir(root):
+                raise FileNotFoundError(f"CUR export directory not found: {root}")
+
+            periods = self.discover_files(root)
+            target_accounts = self._target_accounts(aws_account)
+            tag_keys = get_cost_allocation_tag_keys(aws_account)
+
+            for billing_period, files in sorted(periods.items()):
+                records = self._reconcile_period(aws_account, root, billing_period, files, target_accounts)
+
+                for file_path, fingerprint in files:
+                    record = records.get(file_path)
+                    if record and record.status == CURIngestStatus.COMPLETED:
+                        continue
+
+                    if record is None:
+                        record = CURIngestFile(
+                            tenant_id=aws_account.tenant_id,
+                            aws_account_id=aws_account.id,
+                            source=root,
+                            path=file_path,
+                            billing_period=billing_period,
+                            fingerprint=fingerprint,
+                            rows_ingested=0,
+                            status=CURIngestStatus.IN_PROGRESS
+                        )
+                        self.db.add(record)
+                        self.db.commit()
+
+                    self._ingest_file(aws_account, record, target_accounts, tag_keys, summary)
+                    summary["files_ingested"] += 1
+
+            aws_account.last_sync_at = datetime.utcnow()
+            aws_account.sync_status = "success"
+            self.db.commit()
+
+            try:
+                CostRollups.refresh_dirty(self.db, set(target_accounts.values()))
+            except Exception as e:
+                # The worker's sweep picks the ranges up again
+                self.db.rollback()
+                logger.error(f"Failed to refresh cost rollups for account {aws_account.account_id}: {str(e)}")
+
+            logger.info(
+                f"Ingested CUR for account {aws_account.account_id}: {summary['files_ingested']} files, "
+                f"{summary['rows_read']} line items, ${round_money(summary['total_cost_micros'])}"
+            )
+            # Same shape as the Cost Explorer summary, which ends up in JSON job results
+            summary["total_cost"] = float(round_money(summary.pop("total_cost_micros")))
+            return summary
+
+        except Exception as e:
+            logger.error(f"Error ingesting CUR for account {aws_account.account_id}: {str(e)}")
+            self.db.rollback()
+            aws_account.sync_status = "error"
+            self.db.commit()
+
+            return {
+                "success": False,
+                "source": COST_SOURCE_CUR,
+                "error": str(e)
+            }
+
+    def covering_account(self, aws_account: AWSAccount, source: str) -> Optional[AWSAccount]:
+        """
+        Another active account whose ingest already provides this account's line items
+
+        That is the tenant's CUR account for the payer_account_id of a linked
+        account, or the account that ingests the same export directory.
+
+        Args:
+            aws_account: AWSAccount model instance
+            source: Export directory the account would read
+        """
+        payer_account_id = get_payer_account_id(aws_account)
+        if payer_account_id:
+            payers = self.db.query(AWSAccount).filter(
+                AWSAccount.tenant_id == aws_account.tenant_id,
+                AWSAccount.account_id == payer_account_id,
+                AWSAccount.is_active == True
+            ).all()
+            payer = next((account for account in payers if get_cost_source(account) == COST_SOURCE_CUR), None)
+            if payer is not None:
+                return payer
+
+        return self.db.query(AWSAccount).join(
+            CURIngestFile, CURIngestFile.aws_account_id == AWSAccount.id
+        ).filter(
+            CURIngestFile.tenant_id == aws_account.tenant_id,
+            CURIngestFile.source == source,
+            AWSAccount.id != aws_account.id,
+            AWSAccount.is_active == True
+        ).first()
+
+    def discover_files(self, root: str) -> Dict[str, List[Tuple[str, str]]]:
+        """
+        Find report files grouped by billing period
+
+        When a period folder holds a *-Manifest.json, only the files of the
+        assembly it lists are used, so older report versions are ignored.
+
+        Returns:
+            Mapping of billing period to sorted (path, fingerprint) pairs
+        """
+        periods: Dict[str, List[Tuple[str, str]]] = {}
+
+        for directory, subdirectories, filenames in os.walk(root):
+            subdirectories.sort()
+            period_name = os.path.basename(directory)
+            if not BILLING_PERIOD_PATTERN.match(period_name):
+                continue
+
+            allowed = self._manifest_files(directory, filenames)
+            files = []
+            for period_dir, _, period_filenames in os.walk(directory):
+                for filename in period_filenames:
+                    file_path = os.path.normpath(os.path.join(period_dir, filename))
+                    if not filename.endswith(CUR_FILE_SUFFIXES) or os.path.islink(file_path):
+                        continue
+                    if allowed is not None and file_path not in allowed:
+                        continue
+                    stat = os.stat(file_path)
+                    files.append((file_path, f"{stat.st_size}:{stat.st_mtime_ns}"))
+
+            if files:
+                periods[period_name] = sorted(files)
+            # Files below the period folder were collected above
+            subdirectories.clear()
+
+        return periods
+
+    def _manifest_files(self, period_dir: str, filenames: List[str]) -> Optional[set]:
+        manifests = [
+            name for name in filenames
+            if name.endswith("-Manifest.json") and not os.path.islink(os.path.join(period_dir, name))
+        ]
+        if not manifests:
+            return None
+
+        with open(os.path.join(period_dir, sorted(manifests)[-1])) as manifest_file:
+            report_keys = json.load(manifest_file).get("reportKeys", [])
+
+        period_name = os.path.basename(period_dir)
+        allowed = set()
+        for key in report_keys:
+            # S3 key: <prefix>/<report>/<period>/<assembly id>/<file>
+            relative = key.split(f"{period_name}/", 1)[-1]
+            allowed.add(os.path.normpath(os.path.join(period_dir, relative)))
+
+        return allowed
+
+    def _reconcile_period(
+        self,
+        aws_account: AWSAccount,
+        source: str,
+        billing_period: str,
+        files: List[Tuple[str, str]],
+        target_accounts: Dict[str, Any]
+    ) -> Dict[str, CURIngestFile]:
+        """
+        Load a period's file records, restarting the period if AWS rewrote it
+
+        CUR rewrites a month's report as the month's charges change. If a
+        known file changed or disappeared, everything ingested for the period
+        is deleted and its files are read again from the start. Files the
+        account read from another directory (one its exports moved away
+        from) count as disappeared.
+        """
+        records = {
+            record.path: record
+            for record in self.db.query(CURIngestFile).filter(
+                CURIngestFile.tenant_id == aws_account.tenant_id,
+                or_(CURIngestFile.source == source, CURIngestFile.aws_account_id == aws_account.id),
+                CURIngestFile.billing_period == billing_period
+            ).all()
+        }
+        fingerprints = dict(files)
+
+        restated = any(
+            fingerprints.get(record.path) != record.fingerprint
+            for record in records.values()
+        )
+        if not restated:
+            return records
+
+        logger.info(f"CUR billing period {billing_period} changed for account {aws_account.account_id}, reloading")
+        period_start, period_end = billing_period_dates(billing_period)
+        account_ids = list(target_accounts.values())
+
+        for model in (CostData, CostTagData):
+            self.db.query(model).filter(
+                model.aws_account_id.in_(account_ids),
+                model.date >= period_start,
+                model.date < period_end
+            ).delete(synchronize_session=False)
+        CostRollups.mark_dirty(self.db, [
+            {"tenant_id": aws_account.tenant_id, "aws_account_id": account_id, "date": day}
+            for account_id in account_ids
+            for day in (period_start, period_end - timedelta(days=1))
+        ])
+
+        for record in records.values():
+            self.db.delete(record)
+        self.db.commit()
+
+        return {}
+
+    def _target_accounts(self, aws_account: AWSAccount) -> Dict[str, Any]:
+        """
+        AWS account IDs whose line items are stored under their own AWSAccount
+
+        A payer's CUR covers its linked accounts. Linked accounts of the
+        same tenant configured for CUR with this account as their payer get
+        their own rows; everything else is stored under the ingesting account.
+        """
+        accounts = self.db.query(AWSAccount).filter(
+            AWSAccount.tenant_id == aws_account.tenant_id,
+            AWSAccount.is_active == True
+        ).all()
+
+        targets = {
+            account.account_id: account.id
+            for account in accounts
+            if get_cost_source(account) == COST_SOURCE_CUR
+            and get_payer_account_id(account) == aws_account.account_id
+        }
+        targets[aws_account.account_id] = aws_account.id
+        return targets
+
+    def _ingest_file(
+        self,
+        aws_account: AWSAccount,
+        record: CURIngestFile,
+        target_accounts: Dict[str, Any],
+        tag_keys: List[str],
+        summary: Dict
+    ) -> None:
+        """Ingest one file from its committed offset, one transaction per chunk"""
+        logger.info(f"Ingesting {record.path} from line item {record.rows_ingested}")
+
+        try:
+            for chunk in self.read_chunks(record.path, record.rows_ingested):
+                cost_rows, tag_rows, chunk_micros = self._aggregate(aws_account, chunk, target_accounts, tag_keys)
+
+                inserted, updated = copy_rows(self.db, COST_DATA, cost_rows.values(), MERGE_ACCUMULATE)
+                copy_rows(self.db, COST_TAG_DATA, tag_rows.values(), MERGE_ACCUMULATE)
+
+                record.rows_ingested += len(chunk)
+                self.db.commit()
+
+                summary["rows_read"] += len(chunk)
+                summary["records_inserted"] += inserted
+                summary["records_updated"] += updated
+                summary["total_cost_micros"] += chunk_micros
+
+            record.status = CURIngestStatus.COMPLETED
+            record.last_error = None
+            record.completed_at = datetime.now(timezone.utc)
+            self.db.commit()
+
+        except Exception as e:
+            self.db.rollback()
+            record.status = CURIngestStatus.FAILED
+            record.last_error = str(e)[:2000]
+            self.db.commit()
+            raise
+
+    def read_chunks(self, path: str, offset: int = 0) -> Iterator[List[Dict]]:
+        """
+        Stream a report file as chunks of normalized line items
+
+        Args:
+            path: .csv, .csv.gz or .parquet file
+            offset: Line items to skip, already ingested by an earlier run
+
+        Yields:
+            Lists of at most CUR_INGEST_CHUNK_ROWS line items, with tag
+            columns collected into a "tags" dictionary
+        """
+        chunk_rows = max(settings.CUR_INGEST_CHUNK_ROWS, 1)
+
+        if path.endswith(".parquet"):
+            yield from self._read_parquet_chunks(path, offset, chunk_rows)
+        else:
+            yield from self._read_csv_chunks(path, offset, chunk_rows)
+
+    def _read_csv_chunks(self, path: str, offset: int, chunk_rows: int) -> Iterator[List[Dict]]:
+        opener = gzip.open if path.endswith(".gz") else open
+
+        with opener(path, "rt", newline="", encoding="utf-8") as report:
+            reader = csv.reader(report)
+            header = next(reader, None)
+            if not header:
+                return
+
+            columns = [normalize_column(name) for name in header]
+            # gzip streams cannot seek, so resuming re-reads and skips the committed line items
+            lines = islice(reader, offset, None)
+
+            while True:
+                chunk = []
+                for values in islice(lines, chunk_rows):
+                    item = {"tags": {}}
+                    for (column, tag_key), value in zip(columns, values):
+                        if tag_key is not None:
+                            if value:
+                                item["tags"][tag_key] = value
+                        else:
+                            item[column] = value
+                    chunk.append(item)
+
+                if not chunk:
+                    return
+                yield chunk
+
+    def _read_parquet_chunks(self, path: str, offset: int, chunk_rows: int) -> Iterator[List[Dict]]:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("pyarrow is required to ingest Parquet CUR exports")
+
+        parquet_file = pq.ParquetFile(path)
+        columns = [normalize_column(name) for name in parquet_file.schema_arrow.names]
+        skipped = 0
+
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows):
+            rows = batch.to_pylist()
+
+            if skipped + len(rows) <= offset:
+                skipped += len(rows)
+                continue
+            rows = rows[offset - skipped:] if skipped < offset else rows
+            skipped = offset
+
+            chunk = []
+            for row in rows:
+                item = {"tags": {}}
+                for name, (column, tag_key) in zip(parquet_file.schema_arrow.names, columns):
+                    value = row[name]
+                    if column == TAG_MAP_COLUMN and value:
+                        # CUR 2.0 keeps tags in a map column: {"user_Environment": "prod"}
+                        for key, tag_value in dict(value).items():
+                            if tag_value:
+                                item["tags"][key[5:] if key.startswith("user_") else key] = tag_value
+                    elif tag_key is not None:
+                        if value:
+                            item["tags"][tag_key] = value
+                    else:
+                        item[column] = value
+                chunk.append(item)
+
+            yield chunk
+
+    def _aggregate(
+        self,
+        aws_account: AWSAccount,
+        chunk: List[Dict],
+        target_accounts: Dict[str, Any],
+        tag_keys: List[str]
+    ) -> Tuple[Dict[tuple, Dict], Dict[tuple, Dict], int]:
+        """
+        Sum a chunk's line items onto the cost_data and cost_tag_data keys
+
+        Line items carry up to ten decimal places, so they are summed as
+        exact Decimals and each row is rounded to micros once.
+
+        Returns:
+            Tuple of (cost rows, tag rows, total cost in micros) where rows
+            are keyed by their natural key
+        """
+        cost_rows: Dict[tuple, Dict] = {}
+        tag_rows: Dict[tuple, Dict] = {}
+        total_cost = Decimal(0)
+
+        for item in chunk:
+            cost = to_decimal(item.get(COST_COLUMN) or 0)
+            if cost == 0:
+                continue
+
+            usage_start = item.get(USAGE_DATE_COLUMN)
+            if isinstance(usage_start, datetime):
+                usage_date = usage_start.date()
+            elif isinstance(usage_start, date):
+                usage_date = usage_start
+            else:
+                usage_date = date.fromisoformat(str(usage_start)[:10])
+
+            account_id = target_accounts.get(str(item.get(USAGE_ACCOUNT_COLUMN) or ""), aws_account.id)
+            service = next((item[column] for column in SERVICE_COLUMNS if item.get(column)), "Unknown")
+            region = next((item[column] for column in REGION_COLUMNS if item.get(column)), "NoRegion")
+            usage_type = item.get(USAGE_TYPE_COLUMN) or None
+            currency = item.get(CURRENCY_COLUMN) or "USD"
+            tags = item["tags"]
+
+            key = (account_id, usage_date, service, region, usage_type, json.dumps(tags, sort_keys=True))
+            row = cost_rows.get(key)
+            if row is None:
+                cost_rows[key] = {
+                    "tenant_id": aws_account.tenant_id,
+                    "aws_account_id": account_id,
+                    "date": usage_date,
+                    "service": service,
+                    "region": region,
+                    "usage_type": usage_type,
+                    "tags": tags,
+                    "cost_micros": cost,
+                    "currency": currency
+                }
+            else:
+                row["cost_micros"] += cost
+
+            for tag_key in tag_keys:
+                tag_value = tags.get(tag_key, "")
+                tag_row = tag_rows.setdefault((account_id, usage_date, tag_key, tag_value), {
+                    "tenant_id": aws_account.tenant_id,
+                    "aws_account_id": account_id,
+                    "date": usage_date,
+                    "tag_key": tag_key,
+                    "tag_value": tag_value,
+                    "cost_micros": Decimal(0),
+                    "currency": currency
+                })
+                tag_row["cost_micros"] += cost
+
+            total_cost += cost
+
+        for row in chain(cost_rows.values(), tag_rows.values()):
+            row["cost_micros"] = to_micros(row["cost_micros"])
+
+        return cost_rows, tag_rows, to_micros(total_cost)
+
+
+def main() -> None:
+    """Command line entry point for ingesting one account's CUR exports"""
+    from app.db.base import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Ingest Cost and Usage Report exports")
+    parser.add_argument("--account-id", required=True, help="AWSAccount UUID to ingest for")
+    parser.add_argument("--path", help="Export directory, overrides the account's configured path")
+    parser.add_argument(
+        "--assign-path",
+        help="Store this directory, relative to CUR_DATA_DIR/<tenant_id>, as the account's CUR path and exit"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    db = SessionLocal()
+    try:
+        aws_account = db.query(AWSAccount).filter(AWSAccount.id == args.account_id).first()
+        if not aws_account:
+            raise SystemExit(f"AWS account {args.account_id} not found")
+
+        if args.assign_path is not None:
+            # Reassign so SQLAlchemy notices the JSON change
+            aws_account.config_data = {**(aws_account.config_data or {}), "cur_path": args.assign_path}
+            try:
+                logger.info(f"CUR path of account {aws_account.account_id}: {get_cur_path(aws_account)}")
+            except ValueError as e:
+                raise SystemExit(str(e))
+            db.commit()
+            return
+
+        result = asyncio.run(CURIngestService(db).ingest_account(aws_account, path=args.path))
+        if not result["success"]:
+            raise SystemExit(result["error"])
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
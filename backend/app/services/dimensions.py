@@ -0,0 +1,104 @@
+"""
+Dictionary encoding of cost_data's service, region and usage_type
+
+cost_data stores small integer keys into cost_services, cost_regions and
+cost_usage_types. Names are resolved to keys through an in-process cache
+that is shared by every session; the sets are small (hundreds of services
+and regions, thousands of usage types) and names never change id, so the
+cache is never invalidated.
+"""
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+import threading
+
+
+class DimensionCache:
+    """Name to id mapping of one dimension table"""
+
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, db: Session, names: Iterable[str]) -> Dict[str, int]:
+        """
+        Ids for names, creating the missing ones
+
+        New names are inserted and committed on a separate connection, so
+        the ids stay valid when the caller's transaction rolls back.
+
+        Args:
+            db: Database session, used for its engine
+            names: Dimension values
+
+        Returns:
+            Dictionary of name to id for every given name
+        """
+        names = set(names)
+        with self._lock:
+            ids = {name: self._ids[name] for name in names if name in self._ids}
+        missing = [name for name in names if name not in ids]
+        if not missing:
+            return ids
+
+        with db.get_bind().connect() as connection:
+            connection.execute(
+                text(f"INSERT INTO {self.table_name} (name) SELECT unnest(:names) ON CONFLICT (name) DO NOTHING"),
+                {"names": missing}
+            )
+            rows = connection.execute(
+                text(f"SELECT name, id FROM {self.table_name} WHERE name = ANY(:names)"),
+                {"names": missing}
+            ).all()
+            connection.commit()
+
+        with self._lock:
+            for name, dimension_id in rows:
+                self._ids[name] = dimension_id
+                ids[name] = dimension_id
+
+        return ids
+
+    def lookup(self, db: Session, name: str) -> Optional[int]:
+        """
+        Id of an existing name, None when no cost row has used it yet
+
+        For query filters; never inserts.
+        """
+        with self._lock:
+            dimension_id = self._ids.get(name)
+        if dimension_id is not None:
+            return dimension_id
+
+        dimension_id = db.execute(
+            text(f"SELECT id FROM {self.table_name} WHERE name = :name"),
+            {"name": name}
+        ).scalar()
+        if dimension_id is not None:
+            with self._lock:
+                self._ids[name] = dimension_id
+
+        return dimension_id
+
+
+SERVICES = DimensionCache("cost_services")
+REGIONS = DimensionCache("cost_regions")
+USAGE_TYPES = DimensionCache("cost_usage_types")
+
+
+def encode_dimensions(db: Session, rows: List[Dict], dimensions: Dict[str, tuple]) -> None:
+    """
+    Add dimension id columns to rows that carry names
+
+    Args:
+        db: Database session
+        rows: Row dictionaries, updated in place
+        dimensions: Id column to (name column, DimensionCache), e.g.
+            {"service_id": ("service", SERVICES)}
+    """
+    for id_column, (name_column, cache) in dimensions.items():
+        ids = cache.resolve(db, {row[name_column] for row in rows if row.get(name_column) is not None})
+        for row in rows:
+            name = row.get(name_column)
+            row[id_column] = None if name is None else ids[name]
@@ -0,0 +1,203 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, text
+from sqlalchemy.dialects.postgresql import insert
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, Tuple
+from uuid import UUID
+import random
+import logging
+
+from app.core.config import settings
+from app.models.sync_job import SyncJob, SyncJobStatus
+
+logger = logging.getLogger(__name__)
+
+IN_FLIGHT_WHERE = text("status IN ('queued', 'running')")
+
+
+class PermanentJobError(Exception):
+    """Job failure that retrying cannot fix"""
+    pass
+
+
+class JobQueue:
+    """Postgres-backed job queue using SELECT ... FOR UPDATE SKIP LOCKED"""
+
+    @staticmethod
+    def enqueue(
+        db: Session,
+        tenant_id: UUID,
+        job_type: str,
+        account_id: UUID,
+        payload: Optional[Dict[str, Any]] = None
+    ) -> Tuple[SyncJob, bool]:
+        """
+        Queue a job unless one is already in flight for the same account
+
+        Returns:
+            Tuple of (job, created). When a queued or running job already
+            exists for the account and job type, it is returned instead.
+        """
+        for _ in range(3):
+            stmt = insert(SyncJob).values(
+                tenant_id=tenant_id,
+                job_type=job_type,
+                account_id=account_id,
+                payload=payload or {},
+                status=SyncJobStatus.QUEUED,
+                attempts=0,
+                max_attempts=settings.JOB_MAX_ATTEMPTS
+            ).on_conflict_do_nothing(
+                index_elements=['job_type', 'account_id'],
+                index_where=IN_FLIGHT_WHERE
+            ).returning(SyncJob.id)
+
+            job_id = db.execute(stmt).scalar()
+            db.commit()
+
+            if job_id is not None:
+                return db.query(SyncJob).filter(SyncJob.id == job_id).one(), True
+
+            existing = db.query(SyncJob).filter(
+                SyncJob.job_type == job_type,
+                SyncJob.account_id == account_id,
+                SyncJob.status.in_([SyncJobStatus.QUEUED, SyncJobStatus.RUNNING])
+            ).first()
+
+            # The in-flight job may have finished between the insert and the lookup
+            if existing:
+                return existing, False
+
+        raise RuntimeError(f"Could not enqueue {job_type} job for account {account_id}")
+
+    @staticmethod
+    def dequeue(db: Session, worker_id: str) -> Optional[SyncJob]:
+        """
+        Claim the next due job
+
+        Rows locked by other workers are skipped, so any number of workers
+        can poll the same table without contention.
+        """
+        job = db.query(SyncJob).filter(
+            and_(
+                SyncJob.status == SyncJobStatus.QUEUED,
+                SyncJob.run_after <= func.now()
+            )
+        ).order_by(SyncJob.run_after).with_for_update(skip_locked=True).first()
+
+        if not job:
+            db.commit()
+            return None
+
+        job.status = SyncJobStatus.RUNNING
+        job.attempts += 1
+        job.locked_by = worker_id
+        job.locked_at = func.now()
+        db.commit()
+        db.refresh(job)
+
+        return job
+
+    @staticmethod
+    def heartbeat(db: Session, job_id: UUID, worker_id: str) -> bool:
+        """
+        Renew the lock of a running job so requeue_stale leaves it alone
+
+        Returns:
+            False when the job is no longer running under this worker
+        """
+        renewed = db.query(SyncJob).filter(
+            SyncJob.id == job_id,
+            SyncJob.locked_by == worker_id,
+            SyncJob.status == SyncJobStatus.RUNNING
+        ).update({SyncJob.locked_at: func.now()}, synchronize_session=False)
+        db.commit()
+
+        return renewed > 0
+
+    @staticmethod
+    def _claimed(db: Session, job: SyncJob, worker_id: str) -> Optional[SyncJob]:
+        """Lock and reload a job if it is still running under the worker"""
+        return db.query(SyncJob).filter(
+            SyncJob.id == job.id,
+            SyncJob.locked_by == worker_id,
+            SyncJob.status == SyncJobStatus.RUNNING
+        ).with_for_update().populate_existing().first()
+
+    @staticmethod
+    def complete(db: Session, job: SyncJob, worker_id: str, result: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Mark a job as succeeded
+
+        Returns:
+            False, leaving the job untouched, when the worker no longer owns it
+        """
+        if not JobQueue._claimed(db, job, worker_id):
+            db.rollback()
+            logger.warning(f"Job {job.id} was taken from worker {worker_id}, not marking it succeeded")
+            return False
+
+        job.status = SyncJobStatus.SUCCEEDED
+        job.result = result
+        job.last_error = None
+        job.locked_by = None
+        job.finished_at = datetime.now(timezone.utc)
+        db.commit()
+        return True
+
+    @staticmethod
+    def fail(db: Session, job: SyncJob, worker_id: str, error: str, retryable: bool = True) -> bool:
+        """
+        Record a failure and schedule a retry with exponential backoff
+
+        Returns:
+            False, leaving the job untouched, when the worker no longer owns it
+        """
+        if not JobQueue._claimed(db, job, worker_id):
+            db.rollback()
+            logger.warning(f"Job {job.id} was taken from worker {worker_id}, not recording its failure: {error}")
+            return False
+
+        JobQueue._record_failure(job, error, retryable)
+        db.commit()
+        return True
+
+    @staticmethod
+    def _record_failure(job: SyncJob, error: str, retryable: bool) -> None:
+        """Apply failure bookkeeping to a job without committing"""
+        job.last_error = error[:2000]
+        job.locked_by = None
+
+        if retryable and job.attempts < job.max_attempts:
+            job.status = SyncJobStatus.QUEUED
+            job.run_after = datetime.now(timezone.utc) + JobQueue.retry_delay(job.attempts)
+            logger.warning(f"Job {job.id} failed (attempt {job.attempts}/{job.max_attempts}), retrying at {job.run_after}: {error}")
+        else:
+            job.status = SyncJobStatus.FAILED
+            job.finished_at = datetime.now(timezone.utc)
+            logger.error(f"Job {job.id} failed permanently after {job.attempts} attempts: {error}")
+
+    @staticmethod
+    def retry_delay(attempts: int) -> timedelta:
+        """Exponential backoff with jitter for the given number of attempts made"""
+        delay = min(settings.JOB_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), settings.JOB_RETRY_MAX_SECONDS)
+        return timedelta(seconds=delay * random.uniform(0.9, 1.1))
+
+    @staticmethod
+    def requeue_stale(db: Session) -> int:
+        """Return jobs whose worker stopped renewing their lock to the queue"""
+        # Compared on the database clock, which heartbeat writes with
+        cutoff = func.now() - timedelta(seconds=settings.JOB_LOCK_TIMEOUT_SECONDS)
+
+        stale_jobs = db.query(SyncJob).filter(
+            and_(
+                SyncJob.status == SyncJobStatus.RUNNING,
+                SyncJob.locked_at < cutoff
+            )
+        ).with_for_update(skip_locked=True).all()
+
+        for job in stale_jobs:
+            JobQueue._record_failure(job, f"Worker {job.locked_by} stopped responding", retryable=True)
+
+        db.commit()
+        return len(stale_jobs)
@@ -0,0 +1,192 @@
+"""
+Monthly range partitions of cost_data
+
+Every calendar month of cost_data lives in its own partition named
+cost_data_pYYYY_MM. Partitions are created ahead of time by the worker
+and on demand by the bulk loader; expired months are detached and dropped
+instead of deleted row by row.
+"""
+from datetime import date
+from typing import List, Optional, Set, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+import logging
+import re
+import threading
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "cost_data"
+PARTITION_NAME_RE = re.compile(r"^cost_data_p(\d{4})_(\d{2})$")
+
+# Serializes partition DDL between processes (CREATE ... PARTITION OF locks the parent)
+PARTITION_LOCK_KEY = 0x636f7374  # "cost"
+
+
+def month_start(day: date) -> date:
+    """First day of the day's month"""
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    """First day of the month a number of months after (or before) the given one"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def months_between(start: date, end: date) -> List[date]:
+    """First days of every month touched by the inclusive range start..end"""
+    months = []
+    month = month_start(start)
+    while month <= end:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_p{month:%Y_%m}"
+
+
+def parse_partition_name(name: str) -> Optional[date]:
+    """Month of a partition from its name, None for tables that aren't monthly partitions"""
+    match = PARTITION_NAME_RE.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+class CostDataPartitions:
+    """Creates, lists and detaches the monthly partitions of cost_data"""
+
+    # Months known to have a committed partition in this process
+    _known_months: Set[date] = set()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def ensure_partitions(db: Session, start: date, end: date) -> int:
+        """
+        Make sure a partition exists for every month of start..end
+
+        Months already seen by this process are skipped without a query.
+        Runs in the session's transaction and does not commit.
+
+        Args:
+            db: Database session
+            start: First date that will be written
+            end: Last date that will be written
+
+        Returns:
+            Number of partitions created
+        """
+        months = months_between(start, end)
+        with CostDataPartitions._lock:
+            missing = [month for month in months if month not in CostDataPartitions._known_months]
+        if not missing:
+            return 0
+
+        existing = {
+            month for month in missing
+            if db.execute(text("SELECT to_regclass(:name)"), {"name": partition_name(month)}).scalar()
+        }
+
+        created = 0
+        to_create = [month for month in missing if month not in existing]
+        if to_create:
+            # Another process may be creating the same month; IF NOT EXISTS after the lock is race free
+            db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITION_LOCK_KEY})
+            for month in to_create:
+                name = partition_name(month)
+                db.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+                ))
+                created += 1
+                logger.info(f"Created partition {name}")
+
+        # Only cache months that were already committed; new ones roll back with the transaction
+        with CostDataPartitions._lock:
+            CostDataPartitions._known_months.update(existing)
+
+        return created
+
+    @staticmethod
+    def ensure_future_partitions(db: Session, months_ahead: Optional[int] = None) -> int:
+        """
+        Create partitions from the current month through months_ahead months later, and commit
+
+        Returns:
+            Number of partitions created
+        """
+        if months_ahead is None:
+            months_ahead = settings.COST_PARTITION_MONTHS_AHEAD
+
+        current = month_start(date.today())
+        created = CostDataPartitions.ensure_partitions(
+            db, current, add_months(current, months_ahead)
+        )
+        db.commit()
+        return created
+
+    @staticmethod
+    def list_partitions(db: Session) -> List[Tuple[str, date]]:
+        """
+        Monthly partitions currently attached to cost_data
+
+        Returns:
+            List of (partition name, first day of month), oldest first
+        """
+        rows = db.execute(text("""
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = :parent
+        """), {"parent": PARENT_TABLE}).scalars().all()
+
+        partitions = []
+        for name in rows:
+            month = parse_partition_name(name)
+            if month:
+                partitions.append((name, month))
+
+        return sorted(partitions, key=lambda partition: partition[1])
+
+    @staticmethod
+    def detach_partitions_before(db: Session, cutoff: date, drop: bool = True) -> List[str]:
+        """
+        Detach every partition whose month ends on or before cutoff, and commit
+
+        Whole months only: a month that contains cutoff is kept. Detaching
+        is a catalog change, so expiring a month costs the same no matter
+        how many rows it holds.
+
+        Args:
+            db: Database session
+            cutoff: Oldest date to keep
+            drop: Drop the detached tables, otherwise leave them for archiving
+
+        Returns:
+            Names of the detached partitions
+        """
+        detached = []
+        for name, month in CostDataPartitions.list_partitions(db):
+            if add_months(month, 1) > cutoff:
+                continue
+
+            db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+            if drop:
+                db.execute(text(f"DROP TABLE {name}"))
+            detached.append(name)
+
+            with CostDataPartitions._lock:
+                CostDataPartitions._known_months.discard(month)
+
+        db.commit()
+
+        if detached:
+            logger.info(f"{'Dropped' if drop else 'Detached'} cost_data partitions: {', '.join(detached)}")
+
+        return detached
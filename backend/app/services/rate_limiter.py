@@ -0,0 +1,314 @@
+from typing import Any, Callable, Dict, List, Optional
+from botocore.exceptions import BotoCoreError, ClientError
+from prometheus_client import Counter, Gauge
+import logging
+import threading
+import time
+
+from app.core.config import settings
+from app.models.aws_account import AWSAccount
+
+logger = logging.getLogger(__name__)
+
+# Error codes AWS APIs (Cost Explorer uses LimitExceededException) return when throttling
+THROTTLING_ERROR_CODES = {
+    'ThrottlingException',
+    'Throttling',
+    'TooManyRequestsException',
+    'RequestLimitExceeded',
+    'LimitExceededException',
+}
+
+# Labels stay bounded and anonymous: per-payer state is only logged
+RATE_LIMIT_WAITS = Counter(
+    'aws_rate_limit_waits',
+    'Calls that had to wait for a rate limiter token',
+    ['limiter']
+)
+RATE_LIMIT_WAIT_SECONDS = Counter(
+    'aws_rate_limit_wait_seconds',
+    'Time spent waiting for rate limiter tokens',
+    ['limiter']
+)
+REDUCED_RATE_PAYERS = Gauge(
+    'aws_rate_limit_reduced_payers',
+    'Payers whose adaptive request rate is below the configured maximum',
+    ['limiter']
+)
+OPEN_CIRCUIT_PAYERS = Gauge(
+    'aws_circuit_breaker_open_payers',
+    'Payers whose circuit breaker is open or half-open',
+    ['limiter']
+)
+THROTTLED_CALLS = Counter(
+    'aws_throttled_calls',
+    'Calls rejected by AWS with a throttling error',
+    ['limiter', 'operation']
+)
+CIRCUIT_TRIPS = Counter(
+    'aws_circuit_breaker_trips',
+    'Times a circuit breaker opened',
+    ['limiter']
+)
+CIRCUIT_REJECTED = Counter(
+    'aws_circuit_breaker_rejected',
+    'Calls rejected without reaching AWS because the circuit was open',
+    ['limiter']
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling AWS while a payer's circuit breaker is open"""
+    pass
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """Whether an exception is an AWS throttling response"""
+    return (
+        isinstance(error, ClientError)
+        and error.response.get('Error', {}).get('Code') in THROTTLING_ERROR_CODES
+    )
+
+
+def _is_service_failure(error: Exception) -> bool:
+    """Errors that say the API is unhealthy or overloaded, as opposed to a bad request"""
+    if is_throttling_error(error):
+        return True
+    if isinstance(error, ClientError):
+        return error.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0) >= 500
+    return isinstance(error, BotoCoreError)
+
+
+def payer_key(aws_account: AWSAccount) -> str:
+    """
+    Key that shares a limiter between accounts billed by the same payer
+
+    Cost Explorer quotas apply per payer (management) account. Linked
+    accounts can record theirs as config_data['payer_account_id'];
+    otherwise the account is treated as its own payer.
+    """
+    return (aws_account.config_data or {}).get('payer_account_id') or aws_account.account_id
+
+
+class AdaptiveRateLimiter:
+    """Token bucket whose rate adapts to throttling (AIMD), with a circuit breaker
+
+    The rate is halved on every throttling error and grows back additively
+    on success. After failure_threshold consecutive service failures the
+    circuit opens and calls fail fast for reset_seconds; then one trial call
+    is let through and closes the circuit again if it succeeds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        key: str,
+        rate: float,
+        burst: float,
+        min_rate: float,
+        failure_threshold: int,
+        reset_seconds: float
+    ):
+        self.name = name
+        self.key = key
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return 'closed'
+        if now - self._opened_at < self.reset_seconds:
+            return 'open'
+        return 'half_open'
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """
+        Block until a token is available
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            CircuitOpenError: The circuit is open, or half-open with a trial in flight
+        """
+        with self._lock:
+            now = time.monotonic()
+            state = self._state(now)
+
+            if state == 'open' or (state == 'half_open' and self._trial_in_flight):
+                CIRCUIT_REJECTED.labels(limiter=self.name).inc()
+                raise CircuitOpenError(
+                    f"{self.name} circuit open for payer {self.key} after repeated failures"
+                )
+            if state == 'half_open':
+                self._trial_in_flight = True
+
+            # Reserve a token now; a negative balance is the queue of waiting callers
+            self._refill(now)
+            self._tokens -= 1
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+        if wait > 0:
+            RATE_LIMIT_WAITS.labels(limiter=self.name).inc()
+            RATE_LIMIT_WAIT_SECONDS.labels(limiter=self.name).inc(wait)
+            time.sleep(wait)
+
+        return wait
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+            if self._opened_at is not None:
+                logger.info(f"{self.name} circuit closed for payer {self.key}")
+                self._opened_at = None
+            # Additive increase: regain one request/second over ten successes
+            self.rate = min(self.max_rate, self.rate + 0.1)
+
+    def record_failure(self, throttled: bool) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if throttled:
+                # Multiplicative decrease, and drop the burst so waiters slow down at once
+                self._refill(now)
+                self.rate = max(self.min_rate, self.rate / 2)
+                self._tokens = min(self._tokens, 0.0)
+
+            self._consecutive_failures += 1
+            trial_failed = self._trial_in_flight
+            self._trial_in_flight = False
+
+            if trial_failed or (
+                self._opened_at is None and self._consecutive_failures >= self.failure_threshold
+            ):
+                self._opened_at = now
+                CIRCUIT_TRIPS.labels(limiter=self.name).inc()
+                logger.warning(
+                    f"{self.name} circuit opened for payer {self.key} "
+                    f"after {self._consecutive_failures} consecutive failures"
+                )
+
+
+class RateLimiterRegistry:
+    """One adaptive limiter per payer account for a rate-limited AWS API"""
+
+    def __init__(
+        self,
+        name: str,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        min_rate: Optional[float] = None,
+        failure_threshold: Optional[int] = None,
+        reset_seconds: Optional[float] = None,
+        max_throttle_retries: Optional[int] = None
+    ):
+        self.name = name
+        self.rate = rate or settings.CE_RATE_LIMIT_PER_SECOND
+        self.burst = burst or settings.CE_RATE_LIMIT_BURST
+        self.min_rate = min_rate or settings.CE_RATE_LIMIT_MIN_PER_SECOND
+        self.failure_threshold = failure_threshold or settings.CE_CIRCUIT_FAILURE_THRESHOLD
+        self.reset_seconds = reset_seconds or settings.CE_CIRCUIT_RESET_SECONDS
+        self.max_throttle_retries = (
+            settings.CE_THROTTLE_RETRIES if max_throttle_retries is None else max_throttle_retries
+        )
+        self._limiters: Dict[str, AdaptiveRateLimiter] = {}
+        self._lock = threading.Lock()
+
+        REDUCED_RATE_PAYERS.labels(limiter=name).set_function(
+            lambda: sum(limiter.rate < limiter.max_rate for limiter in self.limiters())
+        )
+        OPEN_CIRCUIT_PAYERS.labels(limiter=name).set_function(
+            lambda: sum(limiter.state != 'closed' for limiter in self.limiters())
+        )
+
+    def limiters(self) -> List[AdaptiveRateLimiter]:
+        """The limiter of every payer seen so far"""
+        with self._lock:
+            return list(self._limiters.values())
+
+    def get(self, key: str) -> AdaptiveRateLimiter:
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                limiter = AdaptiveRateLimiter(
+                    name=self.name,
+                    key=key,
+                    rate=self.rate,
+                    burst=self.burst,
+                    min_rate=self.min_rate,
+                    failure_threshold=self.failure_threshold,
+                    reset_seconds=self.reset_seconds
+                )
+                self._limiters[key] = limiter
+            return limiter
+
+    def call(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Call an AWS API under the payer's limiter
+
+        Blocks while waiting for tokens, so run it in a worker thread from
+        async code. Throttled calls are retried at the reduced rate up to
+        max_throttle_retries times before the error is raised.
+
+        Args:
+            key: Payer key, see payer_key()
+            fn: Bound boto3 client method
+            *args, **kwargs: Arguments for fn
+
+        Returns:
+            The API response
+
+        Raises:
+            CircuitOpenError: The payer's circuit breaker is open
+        """
+        limiter = self.get(key)
+        operation = getattr(fn, '__name__', 'call')
+        attempt = 0
+
+        while True:
+            limiter.acquire()
+            try:
+                response = fn(*args, **kwargs)
+            except Exception as e:
+                if not _is_service_failure(e):
+                    # Bad request or missing permission: the API itself is fine
+                    limiter.record_success()
+                    raise
+
+                throttled = is_throttling_error(e)
+                if throttled:
+                    THROTTLED_CALLS.labels(limiter=self.name, operation=operation).inc()
+                limiter.record_failure(throttled)
+
+                attempt += 1
+                if not throttled or attempt > self.max_throttle_retries:
+                    raise
+                logger.info(f"{operation} throttled for payer {key}, retrying at {limiter.rate:.2f}/s")
+                continue
+
+            limiter.record_success()
+            return response
+
+
+# Shared limiter for Cost Explorer, whose quotas are per payer account
+ce_rate_limiter = RateLimiterRegistry('cost_explorer')
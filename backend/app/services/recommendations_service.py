@@ -2,11 +2,15 @@ from datetime import datetime, timedelta, date
 from typing import List, Dict, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import func
+import asyncio
 import logging
 
+from app.core.money import round_money
 from app.services.aws_client import aws_client_manager
+from app.services.rate_limiter import ce_rate_limiter, payer_key
 from app.models.aws_account import AWSAccount
 from app.models.cost_data import CostData
+from app.models.cost_dimension import ServiceDimension
 
 logger = logging.getLogger(__name__)
 
@@ -320,21 +324,28 @@ class RecommendationsService:
         # Get top services by cost
         thirty_days_ago = date.today() - timedelta(days=30)
 
-        top_services = self.db.query(
-            CostData.service,
-            func.sum(CostData.cost).label('total_cost')
+        top_service_ids = self.db.query(
+            CostData.service_id,
+            func.sum(CostData.cost_micros).label('total_micros')
         ).filter(
             CostData.tenant_id == tenant_id,
             CostData.date >= thirty_days_ago
         ).group_by(
-            CostData.service
+            CostData.service_id
         ).order_by(
-            func.sum(CostData.cost).desc()
-        ).limit(5).all()
+            func.sum(CostData.cost_micros).desc()
+        ).limit(5).subquery()
+
+        top_services = self.db.query(
+            ServiceDimension.name.label('service'),
+            top_service_ids.c.total_micros
+        ).join(
+            top_service_ids, top_service_ids.c.service_id == ServiceDimension.id
+        ).order_by(top_service_ids.c.total_micros.desc()).all()
 
         for service_data in top_services:
             service = service_data.service
-            total_cost = service_data.total_cost
+            total_cost = round_money(service_data.total_micros)
 
             if total_cost > 100:  # Only recommend for services costing >$100/month
                 recommendations.append({
@@ -347,7 +358,8 @@ class RecommendationsService:
                     'resource': service,
                     'current_config': f'${total_cost:.2f}/month',
                     'recommended_config': 'Review usage and optimize',
-                    'potential_savings': total_cost * 0.15,  # Estimate 15% potential savings
+                    # Estimate 15% potential savings; a float like the AWS-sourced estimates it is summed with
+                    'potential_savings': float(round_money(service_data.total_micros * 15 // 100)),
                     'savings_currency': 'USD',
                     'action': 'Analyze usage patterns and look for optimization opportunities',
                     'effort': 'medium'
@@ -377,7 +389,10 @@ class RecommendationsService:
 
             # Get RI coverage for EC2
             try:
-                ri_coverage_response = ce_client.get_reservation_coverage(
+                ri_coverage_response = await asyncio.to_thread(
+                    ce_rate_limiter.call,
+                    payer_key(aws_account),
+                    ce_client.get_reservation_coverage,
                     TimePeriod={
                         'Start': start_date.isoformat(),
                         'End': end_date.isoformat()
@@ -426,7 +441,10 @@ class RecommendationsService:
 
             # Get Savings Plans recommendations
             try:
-                sp_recommendations = ce_client.get_savings_plans_purchase_recommendation(
+                sp_recommendations = await asyncio.to_thread(
+                    ce_rate_limiter.call,
+                    payer_key(aws_account),
+                    ce_client.get_savings_plans_purchase_recommendation,
                     SavingsPlansType='COMPUTE_SP',
                     TermInYears='ONE_YEAR',
                     PaymentOption='NO_UPFRONT',
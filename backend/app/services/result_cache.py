@@ -0,0 +1,296 @@
+"""
+Tenant-aware cache of cost query results
+
+Results of the CostService read methods are cached under
+(tenant, cost_data_version, method, normalized arguments). A tenant's
+cost_data_version is bumped whenever its results can change: when the
+rollup refresh folds newly loaded days in (right after every sync, or by
+the worker's sweep), when retention downsamples its history, whenever the
+bulk loader writes its cost rows, and when its AWS accounts or their
+settings change. Entries of older versions are never read again and
+simply age out, so nothing relies on guessing a TTL.
+
+Redis (REDIS_URL) holds the entries so every API process shares them; its
+round trips run in worker threads, off the event loop. When Redis cannot
+be reached, at startup or later on, an in-process LRU takes over and
+Redis is tried again every COST_CACHE_REDIS_RETRY_SECONDS. Lookups are
+counted in cost_cache_requests_total.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from functools import wraps
+from typing import Any, Awaitable, Callable, Iterable, Optional
+from uuid import UUID
+import asyncio
+import hashlib
+import inspect
+import json
+import logging
+import time
+
+from prometheus_client import Counter
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.aws_client import LRUCache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "cost-cache:v1"
+
+CACHE_REQUESTS = Counter(
+    'cost_cache_requests',
+    'Cost query results served from the cache (hit) or computed (miss)',
+    ['method', 'result']
+)
+CACHE_ERRORS = Counter(
+    'cost_cache_errors',
+    'Cache backend calls that failed and were treated as misses',
+    ['backend']
+)
+
+
+def cost_data_version(db: Session, tenant_id: Any) -> int:
+    """Current cost data version of a tenant"""
+    return db.execute(
+        text("SELECT cost_data_version FROM tenants WHERE id = :tenant_id"),
+        {"tenant_id": tenant_id}
+    ).scalar() or 0
+
+
+def bump_cost_data_version(db: Session, tenant_ids: Iterable[Any]) -> None:
+    """
+    Invalidate every cached result of the given tenants
+
+    Runs in the session's transaction and does not commit. Bump after the
+    change is visible to readers, or in its transaction: a result computed
+    from old data is then only ever stored under the old version.
+    """
+    tenant_ids = list({str(tenant_id) for tenant_id in tenant_ids})
+    if tenant_ids:
+        db.execute(
+            text("UPDATE tenants SET cost_data_version = cost_data_version + 1 WHERE id = ANY(CAST(:ids AS uuid[]))"),
+            {"ids": tenant_ids}
+        )
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return {"__decimal__": str(value)}
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Cannot cache a {type(value).__name__}")
+
+
+def _decode(value: dict) -> Any:
+    if len(value) == 1 and "__decimal__" in value:
+        return Decimal(value["__decimal__"])
+    return value
+
+
+def dumps(value: Any) -> str:
+    """JSON that round-trips the Decimal amounts of cost results"""
+    return json.dumps(value, default=_encode, separators=(",", ":"))
+
+
+def loads(payload: str) -> Any:
+    return json.loads(payload, object_hook=_decode)
+
+
+class MemoryCacheBackend:
+    """In-process LRU; entries are kept serialized so callers never share objects"""
+
+    name = "memory"
+    blocking = False
+
+    def __init__(self, max_entries: int):
+        self._items = LRUCache(max_entries)
+
+    def get(self, key: str) -> Optional[str]:
+        return self._items.get(key)
+
+    def set(self, key: str, payload: str, ttl_seconds: int) -> None:
+        self._items.put(key, payload)
+
+
+class RedisCacheBackend:
+    """Entries shared by every process through Redis"""
+
+    name = "redis"
+    blocking = True  # Network round trips, called from worker threads
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key: str) -> Optional[str]:
+        payload = self.client.get(key)
+        return payload.decode() if payload is not None else None
+
+    def set(self, key: str, payload: str, ttl_seconds: int) -> None:
+        self.client.set(key, payload, ex=ttl_seconds)
+
+
+def create_backend():
+    """Backend for settings.COST_CACHE_BACKEND, None when caching is off"""
+    if settings.COST_CACHE_BACKEND == "none":
+        return None
+    if settings.COST_CACHE_BACKEND == "redis":
+        try:
+            import redis
+
+            client = redis.Redis.from_url(
+                settings.REDIS_URL,
+                socket_timeout=settings.COST_CACHE_REDIS_TIMEOUT_SECONDS,
+                socket_connect_timeout=settings.COST_CACHE_REDIS_TIMEOUT_SECONDS
+            )
+            client.ping()
+            return RedisCacheBackend(client)
+        except Exception as e:
+            logger.warning(f"Redis unavailable for the cost result cache, using an in-process LRU: {str(e)}")
+    return MemoryCacheBackend(settings.COST_CACHE_MAX_ENTRIES)
+
+
+class CostResultCache:
+    """Looks results up under the tenant's current data version, computing them on a miss"""
+
+    def __init__(self, backend=None):
+        self._backend = backend
+        self._resolved = backend is not None
+        self._resolving = False
+        self._retry_at: Optional[float] = None
+
+    async def resolve_backend(self):
+        """
+        The backend in use, None when caching is off
+
+        Resolved on first use so importing the app never waits for Redis.
+        Connecting runs in a worker thread; meanwhile other lookups use the
+        backend at hand, or go uncached before the first one is resolved.
+        """
+        due = not self._resolved or (self._retry_at is not None and time.monotonic() >= self._retry_at)
+        if due and not self._resolving:
+            self._resolving = True
+            try:
+                backend = await asyncio.to_thread(create_backend)
+            finally:
+                self._resolving = False
+            # While Redis stays down, the LRU in use keeps its entries
+            if not (isinstance(backend, MemoryCacheBackend) and isinstance(self._backend, MemoryCacheBackend)):
+                self._backend = backend
+            self._resolved = True
+            if settings.COST_CACHE_BACKEND == "redis" and isinstance(backend, MemoryCacheBackend):
+                self._retry_at = time.monotonic() + settings.COST_CACHE_REDIS_RETRY_SECONDS
+            else:
+                self._retry_at = None
+        return self._backend
+
+    def _backend_failed(self, backend, action: str, error: Exception) -> None:
+        """Count a failed call; a failing Redis is replaced by an LRU until the next retry"""
+        CACHE_ERRORS.labels(backend=backend.name).inc()
+        if backend is not self._backend or not isinstance(backend, RedisCacheBackend):
+            logger.debug(f"Cost result cache {action} failed: {str(error)}")
+            return
+        logger.warning(f"Redis failed for the cost result cache, using an in-process LRU: {str(error)}")
+        self._backend = MemoryCacheBackend(settings.COST_CACHE_MAX_ENTRIES)
+        self._retry_at = time.monotonic() + settings.COST_CACHE_REDIS_RETRY_SECONDS
+
+    @staticmethod
+    async def _call(backend, method: str, *args):
+        """A backend call, in a worker thread when it does network round trips"""
+        if backend.blocking:
+            return await asyncio.to_thread(getattr(backend, method), *args)
+        return getattr(backend, method)(*args)
+
+    @staticmethod
+    def key(tenant_id: Any, version: int, method: str, params: dict) -> str:
+        digest = hashlib.sha256(
+            json.dumps(params, default=_encode, sort_keys=True, separators=(",", ":")).encode()
+        ).hexdigest()
+        return f"{KEY_PREFIX}:{tenant_id}:{version}:{method}:{digest}"
+
+    async def get_or_compute(
+        self,
+        db: Session,
+        method: str,
+        tenant_id: Any,
+        params: dict,
+        compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Cached result of compute() for the tenant's current data version
+
+        Args:
+            db: Database session, for the version lookup
+            method: Name of the cached method
+            tenant_id: Tenant UUID
+            params: The method's arguments besides the tenant
+            compute: Coroutine function producing the result on a miss
+
+        Returns:
+            The result, equal to what compute() returns
+        """
+        backend = await self.resolve_backend()
+        if backend is None:
+            return await compute()
+
+        key = self.key(tenant_id, cost_data_version(db, tenant_id), method, params)
+
+        try:
+            payload = await self._call(backend, "get", key)
+        except Exception as e:
+            self._backend_failed(backend, "read", e)
+            payload = None
+            backend = self._backend
+
+        if payload is not None:
+            CACHE_REQUESTS.labels(method=method, result="hit").inc()
+            return loads(payload)
+
+        CACHE_REQUESTS.labels(method=method, result="miss").inc()
+        result = await compute()
+
+        try:
+            await self._call(backend, "set", key, dumps(result), settings.COST_CACHE_TTL_SECONDS)
+        except Exception as e:
+            self._backend_failed(backend, "write", e)
+
+        return result
+
+
+# Global cache instance
+cost_result_cache = CostResultCache()
+
+
+def cached_result(bypass: Iterable[str] = ()):
+    """
+    Cache an async CostService read method, whose first argument is the tenant
+
+    Args:
+        bypass: Arguments that skip the cache when given (e.g. output parameters)
+    """
+    bypass = tuple(bypass)
+
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            params = dict(bound.arguments)
+            params.pop("self")
+            tenant_id = str(params.pop("tenant_id"))
+
+            if any(params.get(name) is not None for name in bypass):
+                return await method(self, *args, **kwargs)
+
+            return await cost_result_cache.get_or_compute(
+                self.db, method.__name__, tenant_id, params, lambda: method(self, *args, **kwargs)
+            )
+
+        return wrapper
+
+    return decorator
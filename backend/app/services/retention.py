@@ -0,0 +1,196 @@
+"""
+Retention and downsampling of cost history
+
+Each tenant keeps daily cost detail for a number of months set by its
+subscription plan (settings.COST_RETENTION_MONTHS) or its own
+cost_retention_months override. Older days are downsampled: the monthly
+cost_summaries rows stay, while the raw cost_data and cost_tag_data rows
+and the daily and weekly rollups are removed.
+
+A cost_data partition whose rows all belong to tenants past their cutoff
+is dropped whole; what is left of older months is deleted per tenant.
+Tenant.cost_downsampled_before records how far each tenant has been
+downsampled; the rollup planner reads only monthly rows before it.
+
+Raw rows only go once the monthly rollups hold them. Days still waiting
+in cost_rollup_dirty_ranges (an account a concurrent refresh held on to)
+keep their tenant, and every partition from their month on, for the next
+run. Raw rows loaded before a tenant's horizon later on (a restated CUR
+export) never reach its monthly rollups and are deleted on every run.
+
+Run from the worker once a day, or with: python -m app.services.retention
+"""
+from datetime import date
+from typing import Dict, Optional
+from uuid import UUID
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+import argparse
+import logging
+
+from app.core.config import settings
+from app.models.tenant import Tenant
+from app.services.partitions import CostDataPartitions, add_months, month_start
+from app.services.rollups import PERIOD_DAILY, PERIOD_WEEKLY, CostRollups
+
+logger = logging.getLogger(__name__)
+
+
+def retention_months(tenant: Tenant) -> Optional[int]:
+    """Months of daily detail a tenant keeps, None to keep everything"""
+    if tenant.cost_retention_months:
+        return tenant.cost_retention_months
+    return settings.COST_RETENTION_MONTHS.get(tenant.subscription_plan or "free")
+
+
+def retention_cutoff(tenant: Tenant, today: Optional[date] = None) -> Optional[date]:
+    """
+    First day a tenant keeps daily detail for, None when it keeps everything
+
+    The current month is kept on top: with 3 months on 2025-11-17, August
+    through November stay daily.
+    """
+    months = retention_months(tenant)
+    if not months:
+        return None
+    return add_months(month_start(today or date.today()), -months)
+
+
+class CostRetention:
+    """Applies the retention policy of every tenant"""
+
+    @staticmethod
+    def apply(db: Session, today: Optional[date] = None) -> Dict:
+        """
+        Downsample every tenant's cost history past its cutoff
+
+        Args:
+            db: Database session
+            today: Reference date, defaults to today
+
+        Returns:
+            Dictionary with the dropped partitions and the downsampled tenants
+        """
+        cutoffs: Dict[UUID, date] = {}  # Every tenant with a limit
+        due: Dict[UUID, date] = {}  # Those with days past the limit left
+        horizons: Dict[UUID, date] = {}  # Those downsampled before
+        for tenant in db.query(Tenant).all():
+            if tenant.cost_downsampled_before:
+                horizons[tenant.id] = tenant.cost_downsampled_before
+            cutoff = retention_cutoff(tenant, today)
+            if not cutoff:
+                continue
+            cutoffs[tenant.id] = cutoff
+            if tenant.cost_downsampled_before is None or tenant.cost_downsampled_before < cutoff:
+                due[tenant.id] = cutoff
+
+        CostRetention._delete_raw_before(db, horizons)
+
+        if not due:
+            return {"dropped_partitions": [], "tenants_downsampled": 0}
+
+        # Monthly rollups must hold everything the raw rows do before those go
+        CostRollups.refresh_dirty(db)
+
+        # Accounts locked by a concurrent refresh were skipped and still have dirty days
+        pending = dict(db.execute(text("""
+            SELECT tenant_id, min(start_date) FROM cost_rollup_dirty_ranges GROUP BY tenant_id
+        """)).all())
+        db.commit()
+        for tenant_id, first_pending in pending.items():
+            if tenant_id in due and first_pending < due[tenant_id]:
+                logger.info(f"Deferring downsampling of tenant {tenant_id}: rollups pending from {first_pending}")
+                del due[tenant_id]
+
+        droppable_before = CostRetention._droppable_before(db, cutoffs)
+        if pending:
+            droppable_before = min(droppable_before, month_start(min(pending.values())))
+        dropped = CostDataPartitions.detach_partitions_before(db, droppable_before)
+
+        for tenant_id, cutoff in due.items():
+            params = {"tenant_id": tenant_id, "cutoff": cutoff}
+            db.execute(text("DELETE FROM cost_data WHERE tenant_id = :tenant_id AND date < :cutoff"), params)
+            db.execute(text("DELETE FROM cost_tag_data WHERE tenant_id = :tenant_id AND date < :cutoff"), params)
+            db.execute(text("""
+                DELETE FROM cost_summaries
+                WHERE tenant_id = :tenant_id AND period_type IN (:daily, :weekly) AND period_start < :cutoff
+            """), {**params, "daily": PERIOD_DAILY, "weekly": PERIOD_WEEKLY})
+            db.execute(text("DELETE FROM cost_rollup_dirty_ranges WHERE tenant_id = :tenant_id AND end_date < :cutoff"), params)
+            # The trend's daily points became monthly ones, so cached results go too
+            db.execute(
+                text("""
+                    UPDATE tenants
+                    SET cost_downsampled_before = :cutoff, cost_data_version = cost_data_version + 1
+                    WHERE id = :tenant_id
+                """),
+                params
+            )
+            db.commit()
+
+        logger.info(f"Downsampled cost history of {len(due)} tenants")
+
+        return {"dropped_partitions": dropped, "tenants_downsampled": len(due)}
+
+    @staticmethod
+    def _delete_raw_before(db: Session, horizons: Dict[UUID, date]) -> None:
+        """
+        Delete raw rows loaded before each tenant's horizon since it was set
+
+        Rollup refreshes stop at the horizon, so such rows would only ever
+        be read by the raw queries; no cached result changes with them.
+        """
+        for tenant_id, horizon in horizons.items():
+            params = {"tenant_id": tenant_id, "horizon": horizon}
+            deleted = db.execute(
+                text("DELETE FROM cost_data WHERE tenant_id = :tenant_id AND date < :horizon"), params
+            ).rowcount
+            deleted += db.execute(
+                text("DELETE FROM cost_tag_data WHERE tenant_id = :tenant_id AND date < :horizon"), params
+            ).rowcount
+            db.execute(
+                text("DELETE FROM cost_rollup_dirty_ranges WHERE tenant_id = :tenant_id AND end_date < :horizon"), params
+            )
+            db.commit()
+            if deleted:
+                logger.info(f"Deleted {deleted} cost rows of tenant {tenant_id} from before {horizon}")
+
+    @staticmethod
+    def _droppable_before(db: Session, cutoffs: Dict[UUID, date]) -> date:
+        """
+        End of the oldest run of partitions holding only rows past their tenant's cutoff
+
+        A month that still has rows of a tenant keeping it (or keeping
+        everything) stops the run; later months are downsampled row by row.
+        """
+        droppable_before = date.min
+        for name, month in CostDataPartitions.list_partitions(db):
+            month_end = add_months(month, 1)
+            if month_end > max(cutoffs.values()):
+                break
+            tenant_ids = db.execute(text(f"SELECT DISTINCT tenant_id FROM {name}")).scalars().all()
+            if any(tenant_id not in cutoffs or cutoffs[tenant_id] < month_end for tenant_id in tenant_ids):
+                break
+            droppable_before = month_end
+
+        return droppable_before
+
+
+def main() -> None:
+    """Command line entry point for applying the retention policy once"""
+    from app.db.base import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Downsample cost history past each tenant's retention")
+    parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    db = SessionLocal()
+    try:
+        result = CostRetention.apply(db)
+        logger.info(f"Dropped partitions: {', '.join(result['dropped_partitions']) or 'none'}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+"""
+Daily, weekly and monthly cost rollups in cost_summaries
+
+Each account has one row per period and service plus one account-level
+row (service_id NULL) per period. Daily rows are recomputed from
+cost_data, weekly (ISO, Monday first) and monthly rows from the daily
+rows, so refreshing a few days costs the same however much history the
+account has.
+
+Every load into cost_data records the (account, days) it touched in
+cost_rollup_dirty_ranges, in the same transaction. refresh_dirty() folds
+pending ranges into the rollups; ingestion calls it inline right after a
+sync and the worker sweeps up whatever is left, so the cost of keeping
+the rollups fresh follows the size of the change, not of the history.
+Each refresh also bumps the tenant's cost_data_version, which retires
+its cached query results (see app.services.result_cache).
+
+plan_rollup_ranges() decomposes a queried date range into whole months,
+whole weeks and leftover edge days; CostService reads the first two from
+cost_summaries and only the edge days, and any still-dirty days, from
+cost_data.
+"""
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+import logging
+
+from app.services.partitions import add_months
+from app.services.result_cache import bump_cost_data_version
+
+logger = logging.getLogger(__name__)
+
+PERIOD_DAILY = "daily"
+PERIOD_WEEKLY = "weekly"
+PERIOD_MONTHLY = "monthly"
+
+ROLLUP_LOCK_KEY = 0x726f6c6c  # "roll", paired with the account's hash
+
+DateRange = Tuple[date, date]  # Inclusive
+
+
+class RollupPlan:
+    """Rollup periods and raw date ranges that exactly cover a queried range"""
+
+    def __init__(self):
+        self.periods: Dict[str, List[date]] = {PERIOD_MONTHLY: [], PERIOD_WEEKLY: []}  # Period starts
+        self.daily_ranges: List[DateRange] = []  # Runs of days read from daily rollups
+        self.raw_ranges: List[DateRange] = []
+
+    def add_raw(self, start: date, end: date) -> None:
+        if start <= end:
+            self.raw_ranges.append((start, end))
+
+
+def month_end(day: date) -> date:
+    return add_months(day.replace(day=1), 1) - timedelta(days=1)
+
+
+def overlaps(start: date, end: date, ranges: Sequence[DateRange]) -> bool:
+    return any(range_start <= end and start <= range_end for range_start, range_end in ranges)
+
+
+def merge_ranges(ranges: Iterable[DateRange]) -> List[DateRange]:
+    """Sorted union of date ranges, joining overlapping and adjacent ones"""
+    merged: List[DateRange] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _plan_weeks(plan: RollupPlan, start: date, end: date, dirty: Sequence[DateRange]) -> None:
+    """Whole ISO weeks inside start..end, and the days around them as raw ranges"""
+    first_monday = start + timedelta(days=(7 - start.weekday()) % 7)
+    week = first_monday
+    while week + timedelta(days=6) <= end:
+        if overlaps(week, week + timedelta(days=6), dirty):
+            plan.add_raw(week, week + timedelta(days=6))
+        else:
+            plan.periods[PERIOD_WEEKLY].append(week)
+        week += timedelta(days=7)
+
+    if week == first_monday:
+        # Not a single whole week
+        plan.add_raw(start, end)
+    else:
+        plan.add_raw(start, first_monday - timedelta(days=1))
+        plan.add_raw(week, end)
+
+
+def _plan_days(plan: RollupPlan, start: date, end: date, dirty: Sequence[DateRange]) -> None:
+    """Clean runs of days inside start..end from daily rollups, dirty ones as raw ranges"""
+    day = start
+    for dirty_start, dirty_end in merge_ranges(dirty):
+        if dirty_end < day or dirty_start > end:
+            continue
+        if dirty_start > day:
+            plan.daily_ranges.append((day, dirty_start - timedelta(days=1)))
+        plan.add_raw(max(dirty_start, day), min(dirty_end, end))
+        day = dirty_end + timedelta(days=1)
+    if day <= end:
+        plan.daily_ranges.append((day, end))
+
+
+def plan_rollup_ranges(
+    start: date,
+    end: date,
+    dirty: Sequence[DateRange] = (),
+    downsampled_before: Optional[date] = None,
+    coarsest: str = PERIOD_MONTHLY
+) -> RollupPlan:
+    """
+    Cover the inclusive range start..end with the coarsest rollups possible
+
+    Whole calendar months come from monthly rollups, whole weeks of the
+    remaining edges from weekly rollups, and at most six days before and
+    after each run of weeks are left for cost_data. A month overlapping a
+    dirty range is split into weeks, and dirty weeks are read raw.
+
+    coarsest caps the period size for results bucketed by week or day:
+    PERIOD_WEEKLY skips monthly rollups, PERIOD_DAILY reads clean days from
+    daily rollups (daily_ranges) and only dirty days raw.
+
+    Before downsampled_before (a month start) only monthly rollups exist,
+    so months there are read whole even when the range covers part of one.
+    """
+    plan = RollupPlan()
+    if start > end:
+        return plan
+
+    if downsampled_before and start < downsampled_before:
+        month = start.replace(day=1)
+        while month < downsampled_before and month <= end:
+            plan.periods[PERIOD_MONTHLY].append(month)
+            month = add_months(month, 1)
+        start = downsampled_before
+        if start > end:
+            return plan
+
+    if coarsest == PERIOD_DAILY:
+        _plan_days(plan, start, end, dirty)
+        return plan
+    if coarsest == PERIOD_WEEKLY:
+        _plan_weeks(plan, start, end, dirty)
+        plan.raw_ranges = merge_ranges(plan.raw_ranges)
+        return plan
+
+    first_month = start if start.day == 1 else add_months(start.replace(day=1), 1)
+    last_month = end.replace(day=1) if end == month_end(end) else add_months(end.replace(day=1), -1)
+
+    if first_month > last_month:
+        # No whole month, but weeks still stop at the month boundary
+        if start.month != end.month:
+            _plan_weeks(plan, start, end.replace(day=1) - timedelta(days=1), dirty)
+            start = end.replace(day=1)
+        _plan_weeks(plan, start, end, dirty)
+        plan.raw_ranges = merge_ranges(plan.raw_ranges)
+        return plan
+
+    month = first_month
+    while month <= last_month:
+        if overlaps(month, month_end(month), dirty):
+            _plan_weeks(plan, month, month_end(month), dirty)
+        else:
+            plan.periods[PERIOD_MONTHLY].append(month)
+        month = add_months(month, 1)
+
+    _plan_weeks(plan, start, first_month - timedelta(days=1), dirty)
+    _plan_weeks(plan, month_end(last_month) + timedelta(days=1), end, dirty)
+    plan.raw_ranges = merge_ranges(plan.raw_ranges)
+    return plan
+
+
+class CostRollups:
+    """Maintains cost_summaries for ranges of ingested days"""
+
+    @staticmethod
+    def mark_dirty(db: Session, rows: Iterable[Dict]) -> None:
+        """
+        Record the days each account's rows were loaded for
+
+        Runs in the session's transaction so the ranges commit together with
+        the cost_data change; does not commit.
+
+        Args:
+            db: Database session
+            rows: Dictionaries with tenant_id, aws_account_id and date
+        """
+        spans: Dict[tuple, List[date]] = {}
+        for row in rows:
+            span = spans.setdefault((row["tenant_id"], row["aws_account_id"]), [row["date"], row["date"]])
+            span[0] = min(span[0], row["date"])
+            span[1] = max(span[1], row["date"])
+
+        if spans:
+            db.execute(text("""
+                INSERT INTO cost_rollup_dirty_ranges (tenant_id, aws_account_id, start_date, end_date)
+                VALUES (:tenant_id, :aws_account_id, :start, :end)
+            """), [
+                {"tenant_id": tenant_id, "aws_account_id": account_id, "start": start, "end": end}
+                for (tenant_id, account_id), (start, end) in spans.items()
+            ])
+
+    @staticmethod
+    def dirty_ranges(
+        db: Session,
+        tenant_id: UUID,
+        start: date,
+        end: date,
+        aws_account_id: Optional[UUID] = None
+    ) -> List[DateRange]:
+        """Pending dirty ranges of a tenant (or one account) that overlap start..end, merged"""
+        query = """
+            SELECT start_date, end_date FROM cost_rollup_dirty_ranges
+            WHERE tenant_id = :tenant_id AND start_date <= :end AND end_date >= :start
+        """
+        if aws_account_id:
+            query += " AND aws_account_id = :account_id"
+
+        rows = db.execute(text(query), {
+            "tenant_id": tenant_id, "start": start, "end": end, "account_id": aws_account_id
+        }).all()
+        return merge_ranges((row.start_date, row.end_date) for row in rows)
+
+    @staticmethod
+    def refresh_dirty(db: Session, aws_account_ids: Optional[Iterable[UUID]] = None) -> int:
+        """
+        Fold pending dirty ranges into the rollups, one account per transaction
+
+        An account is claimed with a transaction-level advisory lock, so an
+        inline refresh and the worker's sweep never rebuild the same account
+        at once; the one that loses skips it. Ranges committed while a
+        refresh runs stay pending for the next one.
+
+        Args:
+            db: Database session
+            aws_account_ids: Only these accounts (all when None)
+
+        Returns:
+            Number of accounts refreshed
+        """
+        query = "SELECT DISTINCT aws_account_id FROM cost_rollup_dirty_ranges"
+        params = {}
+        if aws_account_ids is not None:
+            query += " WHERE aws_account_id = ANY(:account_ids)"
+            params["account_ids"] = list(aws_account_ids)
+        account_ids = db.execute(text(query), params).scalars().all()
+        db.commit()
+
+        refreshed = 0
+        for account_id in account_ids:
+            try:
+                locked = db.execute(
+                    text("SELECT pg_try_advisory_xact_lock(:key, hashtext(:account_id))"),
+                    {"key": ROLLUP_LOCK_KEY, "account_id": str(account_id)}
+                ).scalar()
+                if not locked:
+                    db.rollback()
+                    continue
+
+                ranges = db.execute(text("""
+                    DELETE FROM cost_rollup_dirty_ranges WHERE aws_account_id = :account_id
+                    RETURNING start_date, end_date
+                """), {"account_id": account_id}).all()
+                # Downsampled months (see app.services.retention) keep their monthly rows as they are
+                tenant_id, horizon = db.execute(text("""
+                    SELECT tenants.id, tenants.cost_downsampled_before FROM aws_accounts
+                    JOIN tenants ON tenants.id = aws_accounts.tenant_id
+                    WHERE aws_accounts.id = :account_id
+                """), {"account_id": account_id}).one()
+                for start, end in merge_ranges((row.start_date, row.end_date) for row in ranges):
+                    if horizon:
+                        start = max(start, horizon)
+                    if start <= end:
+                        CostRollups.refresh(db, account_id, start, end)
+                if ranges:
+                    # The loads behind these ranges are committed, so cached results can go
+                    bump_cost_data_version(db, [tenant_id])
+                db.commit()
+                refreshed += 1
+            except Exception:
+                db.rollback()
+                raise
+
+        return refreshed
+
+    @staticmethod
+    def refresh(db: Session, aws_account_id: UUID, start: date, end: date) -> None:
+        """
+        Recompute one account's rollups for the inclusive range start..end
+
+        Daily rows of the range are rebuilt from cost_data; every week and
+        month overlapping it is rebuilt from the daily rows. Runs in the
+        session's transaction and does not commit.
+        """
+        params = {"account_id": aws_account_id, "start": start, "end": end}
+
+        db.execute(text("""
+            DELETE FROM cost_summaries
+            WHERE aws_account_id = :account_id AND period_type = 'daily'
+              AND period_start BETWEEN :start AND :end
+        """), params)
+        # One pass for both levels: the second grouping set is the account total
+        db.execute(text("""
+            INSERT INTO cost_summaries (
+                id, tenant_id, aws_account_id, period_start, period_end, period_type,
+                total_cost_micros, service_id, currency
+            )
+            SELECT gen_random_uuid(), tenant_id, aws_account_id, date, date, 'daily',
+                   sum(cost_micros), service_id, max(currency)
+            FROM cost_data
+            WHERE aws_account_id = :account_id AND date BETWEEN :start AND :end
+            GROUP BY GROUPING SETS (
+                (tenant_id, aws_account_id, date, service_id),
+                (tenant_id, aws_account_id, date)
+            )
+        """), params)
+
+        for period_type, unit, period_start, period_end in (
+            (PERIOD_WEEKLY, "week", start - timedelta(days=start.weekday()), end + timedelta(days=6 - end.weekday())),
+            (PERIOD_MONTHLY, "month", start.replace(day=1), month_end(end)),
+        ):
+            period_params = {"account_id": aws_account_id, "start": period_start, "end": period_end}
+            db.execute(text(f"""
+                DELETE FROM cost_summaries
+                WHERE aws_account_id = :account_id AND period_type = '{period_type}'
+                  AND period_start BETWEEN :start AND :end
+            """), period_params)
+            db.execute(text(f"""
+                INSERT INTO cost_summaries (
+                    id, tenant_id, aws_account_id, period_start, period_end, period_type,
+                    total_cost_micros, service_id, currency
+                )
+                SELECT gen_random_uuid(), tenant_id, aws_account_id, period,
+                       (period + interval '1 {unit}' - interval '1 day')::date,
+                       '{period_type}', sum(total_cost_micros), service_id, max(currency)
+                FROM (
+                    SELECT *, date_trunc('{unit}', period_start)::date AS period
+                    FROM cost_summaries
+                    WHERE aws_account_id = :account_id AND period_type = 'daily'
+                      AND period_start BETWEEN :start AND :end
+                ) AS days
+                GROUP BY tenant_id, aws_account_id, period, service_id
+            """), period_params)
+
+        logger.debug(f"Refreshed rollups for account {aws_account_id} from {start} to {end}")
@@ -0,0 +1,407 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, date
+from typing import Callable, Dict, List, Optional
+import argparse
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.models.aws_account import AWSAccount
+from app.models.cloud_account import CloudAccount, CloudProvider
+from app.models.sync_job import SyncBatch, SyncJob, SyncJobStatus, SyncJobType
+from app.services.cost_service import CostService
+from app.services.job_queue import JobQueue
+
+logger = logging.getLogger(__name__)
+
+# Job states reported in the orchestrator's progress vocabulary
+JOB_PROGRESS_STATUS = {
+    SyncJobStatus.QUEUED: "queued",
+    SyncJobStatus.RUNNING: "running",
+    SyncJobStatus.SUCCEEDED: "success",
+    SyncJobStatus.FAILED: "error",
+}
+
+
+class SyncOrchestrator:
+    """Syncs cost data for many accounts concurrently with bounded fan-out"""
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        max_per_tenant: Optional[int] = None,
+        on_progress: Optional[Callable[[Dict], None]] = None
+    ):
+        """
+        Args:
+            max_concurrency: Accounts synced at once across all tenants
+            max_per_tenant: Accounts synced at once within one tenant
+            on_progress: Optional callback invoked with an account's progress
+                entry every time its status changes
+        """
+        self.max_concurrency = max_concurrency or settings.SYNC_MAX_CONCURRENCY
+        self.max_per_tenant = max_per_tenant or settings.SYNC_MAX_CONCURRENCY_PER_TENANT
+        self.on_progress = on_progress
+        self.progress: Dict[str, Dict] = {}
+
+    def discover_accounts(self, db, tenant_id: Optional[str] = None) -> List[Dict]:
+        """
+        Find every active account that should be synced
+
+        Active AWSAccounts are synced directly. Active AWS CloudAccounts are
+        synced through the AWSAccount with the same AWS account ID, since
+        cost_data rows reference aws_accounts. Other providers have no cost
+        fetcher yet and are reported as skipped.
+
+        Args:
+            db: Database session
+            tenant_id: Optional tenant filter, all tenants when omitted
+
+        Returns:
+            List of sync targets
+        """
+        aws_query = db.query(AWSAccount).filter(AWSAccount.is_active == True)
+        cloud_query = db.query(CloudAccount).filter(CloudAccount.is_active == True)
+
+        if tenant_id:
+            aws_query = aws_query.filter(AWSAccount.tenant_id == tenant_id)
+            cloud_query = cloud_query.filter(CloudAccount.tenant_id == tenant_id)
+
+        aws_accounts = aws_query.all()
+        linked = {(account.tenant_id, account.account_id) for account in aws_accounts}
+
+        targets = [
+            {
+                "id": str(account.id),
+                "tenant_id": str(account.tenant_id),
+                "account_id": account.account_id,
+                "account_name": account.account_name,
+                "provider": CloudProvider.AWS.value,
+                "skip_reason": None
+            }
+            for account in aws_accounts
+        ]
+
+        for account in cloud_query.all():
+            if account.provider == CloudProvider.AWS and (account.tenant_id, account.account_id) in linked:
+                # Already covered by its AWSAccount
+                continue
+
+            if account.provider == CloudProvider.AWS:
+                skip_reason = "No linked AWS account for this cloud account"
+            else:
+                skip_reason = f"Cost sync not supported for {account.provider.value.upper()} yet"
+
+            targets.append({
+                "id": str(account.id),
+                "tenant_id": str(account.tenant_id),
+                "account_id": account.account_id,
+                "account_name": account.account_name,
+                "provider": account.provider.value,
+                "skip_reason": skip_reason
+            })
+
+        return targets
+
+    def queue_all(
+        self,
+        db,
+        tenant_id: str,
+        days: int = 30,
+        full_refresh: bool = False
+    ) -> SyncBatch:
+        """
+        Queue one background sync job per active account of a tenant
+
+        The worker runs the jobs with its own concurrency limits, so this
+        returns as soon as they are queued. Accounts that already have a
+        job in flight keep it instead of getting a second one.
+
+        Args:
+            db: Database session
+            tenant_id: Tenant UUID
+            days: Number of days to sync per account
+            full_refresh: Ignore per-account watermarks
+
+        Returns:
+            The batch grouping the jobs, for batch_progress
+        """
+        end_date = date.today()
+        start_date = end_date - timedelta(days=days)
+
+        job_ids = []
+        skipped = []
+
+        for target in self.discover_accounts(db, tenant_id):
+            if target["skip_reason"]:
+                self._update(target, status="skipped", error=target["skip_reason"])
+                skipped.append(self.progress[target["id"]])
+                continue
+
+            job, _ = JobQueue.enqueue(
+                db,
+                tenant_id=target["tenant_id"],
+                job_type=SyncJobType.AWS_ACCOUNT_SYNC,
+                account_id=target["id"],
+                payload={"days": days, "full_refresh": full_refresh}
+            )
+            job_ids.append(str(job.id))
+
+            db.query(AWSAccount).filter(AWSAccount.id == target["id"]).update(
+                {AWSAccount.sync_status: "syncing"}, synchronize_session=False
+            )
+
+        batch = SyncBatch(
+            tenant_id=tenant_id,
+            start_date=start_date,
+            end_date=end_date,
+            job_ids=job_ids,
+            skipped=skipped
+        )
+        db.add(batch)
+        db.commit()
+        db.refresh(batch)
+
+        return batch
+
+    @staticmethod
+    def batch_progress(db, batch: SyncBatch) -> Dict:
+        """
+        Overall counts and per-account progress of a queued batch
+
+        Returns:
+            Dictionary shaped like the sync_all summary, with the counts of
+            jobs still queued or running and a completed flag
+        """
+        rows = db.query(SyncJob, AWSAccount).outerjoin(
+            AWSAccount, AWSAccount.id == SyncJob.account_id
+        ).filter(SyncJob.id.in_(batch.job_ids)).all()
+
+        accounts = []
+        for job, aws_account in rows:
+            result = job.result or {}
+            accounts.append({
+                "id": str(job.account_id),
+                "tenant_id": str(job.tenant_id),
+                "account_id": aws_account.account_id if aws_account else None,
+                "account_name": aws_account.account_name if aws_account else None,
+                "provider": CloudProvider.AWS.value,
+                "job_id": str(job.id),
+                "status": JOB_PROGRESS_STATUS.get(job.status, job.status),
+                "attempts": job.attempts,
+                "records_inserted": result.get("records_inserted", 0),
+                "records_updated": result.get("records_updated", 0),
+                "error": job.last_error,
+                "started_at": job.locked_at.isoformat() if job.locked_at else None,
+                "finished_at": job.finished_at.isoformat() if job.finished_at else None
+            })
+        accounts += batch.skipped
+
+        statuses = [entry["status"] for entry in accounts]
+
+        return {
+            "sync_id": str(batch.id),
+            "completed": statuses.count("queued") + statuses.count("running") == 0,
+            "total_accounts": len(accounts),
+            "queued": statuses.count("queued"),
+            "running": statuses.count("running"),
+            "succeeded": statuses.count("success"),
+            "failed": statuses.count("error"),
+            "skipped": statuses.count("skipped"),
+            "start_date": batch.start_date.isoformat(),
+            "end_date": batch.end_date.isoformat(),
+            "accounts": accounts
+        }
+
+    async def sync_all(
+        self,
+        tenant_id: Optional[str] = None,
+        days: int = 30,
+        full_refresh: bool = False
+    ) -> Dict:
+        """
+        Sync every active account, optionally limited to one tenant
+
+        Args:
+            tenant_id: Optional tenant filter, all tenants when omitted
+            days: Number of days to sync per account
+            full_refresh: Ignore per-account watermarks
+
+        Returns:
+            Dictionary with overall counts and per-account progress
+        """
+        targets = await asyncio.to_thread(self._discover_in_session, tenant_id)
+
+        end_date = date.today()
+        start_date = end_date - timedelta(days=days)
+
+        for target in targets:
+            self._update(target, status="queued")
+
+        global_limit = asyncio.Semaphore(self.max_concurrency)
+        tenant_limits: Dict[str, asyncio.Semaphore] = {}
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="cost-sync")
+
+        async def run(target: Dict):
+            if target["skip_reason"]:
+                self._update(target, status="skipped", error=target["skip_reason"])
+                return
+
+            tenant_limit = tenant_limits.setdefault(
+                target["tenant_id"], asyncio.Semaphore(self.max_per_tenant)
+            )
+            # Take the tenant slot first so a busy tenant never holds a global slot idle
+            async with tenant_limit:
+                async with global_limit:
+                    await self._sync_account(target, start_date, end_date, full_refresh, executor)
+
+        started_at = datetime.utcnow()
+        try:
+            await asyncio.gather(*(run(target) for target in targets))
+        finally:
+            executor.shutdown(wait=False)
+
+        statuses = [entry["status"] for entry in self.progress.values()]
+
+        return {
+            "total_accounts": len(targets),
+            "succeeded": statuses.count("success"),
+            "failed": statuses.count("error"),
+            "skipped": statuses.count("skipped"),
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "duration_seconds": round((datetime.utcnow() - started_at).total_seconds(), 2),
+            "accounts": list(self.progress.values())
+        }
+
+    def _discover_in_session(self, tenant_id: Optional[str]) -> List[Dict]:
+        """discover_accounts in a session of its own; blocking"""
+        db = SessionLocal()
+        try:
+            return self.discover_accounts(db, tenant_id)
+        finally:
+            db.close()
+
+    async def _sync_account(
+        self,
+        target: Dict,
+        start_date: date,
+        end_date: date,
+        full_refresh: bool,
+        executor
+    ) -> None:
+        """
+        Sync one account in its own session so failures stay isolated
+
+        The session's queries and commits run in the executor, so accounts
+        waiting on AWS never hold up the others on the event loop.
+        """
+        self._update(target, status="running", started_at=datetime.utcnow().isoformat())
+
+        loop = asyncio.get_running_loop()
+        db = SessionLocal()
+        try:
+            aws_account = await loop.run_in_executor(executor, self._start_account, db, target["id"])
+
+            cost_service = CostService(db, executor=executor)
+            result = await cost_service.fetch_costs_for_account(
+                aws_account=aws_account,
+                start_date=start_date,
+                end_date=end_date,
+                full_refresh=full_refresh
+            )
+
+            if result.get("success"):
+                self._update(
+                    target,
+                    status="success",
+                    records_inserted=result["records_inserted"],
+                    records_updated=result["records_updated"],
+                    finished_at=datetime.utcnow().isoformat()
+                )
+            else:
+                self._update(
+                    target,
+                    status="error",
+                    error=result.get("error"),
+                    finished_at=datetime.utcnow().isoformat()
+                )
+
+        except Exception as e:
+            logger.error(f"Error syncing account {target['account_id']}: {str(e)}")
+            self._update(target, status="error", error=str(e), finished_at=datetime.utcnow().isoformat())
+
+        finally:
+            await loop.run_in_executor(executor, db.close)
+
+    @staticmethod
+    def _start_account(db, account_id: str) -> AWSAccount:
+        """Load an account and mark it syncing; blocking"""
+        aws_account = db.query(AWSAccount).filter(AWSAccount.id == account_id).one()
+        aws_account.sync_status = "syncing"
+        db.commit()
+        # Loaded again here, so reading it later never queries from the event loop
+        db.refresh(aws_account)
+        return aws_account
+
+    def _update(self, target: Dict, **changes) -> None:
+        """Record a progress change for an account and notify the listener"""
+        entry = self.progress.setdefault(target["id"], {
+            "id": target["id"],
+            "tenant_id": target["tenant_id"],
+            "account_id": target["account_id"],
+            "account_name": target["account_name"],
+            "provider": target["provider"],
+            "status": "queued",
+            "records_inserted": 0,
+            "records_updated": 0,
+            "error": None,
+            "started_at": None,
+            "finished_at": None
+        })
+        entry.update(changes)
+
+        if self.on_progress:
+            try:
+                self.on_progress(dict(entry))
+            except Exception as e:
+                logger.warning(f"Sync progress callback failed: {str(e)}")
+
+
+def main() -> None:
+    """Command line entry point for scheduled (e.g. nightly) syncs"""
+    parser = argparse.ArgumentParser(description="Sync cost data for all active accounts")
+    parser.add_argument("--tenant-id", help="Only sync accounts of this tenant")
+    parser.add_argument("--days", type=int, default=30, help="Number of days to sync")
+    parser.add_argument("--concurrency", type=int, help="Accounts synced at once")
+    parser.add_argument("--per-tenant", type=int, help="Accounts synced at once per tenant")
+    parser.add_argument("--full-refresh", action="store_true", help="Ignore per-account sync watermarks")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def log_progress(entry: Dict) -> None:
+        if entry["status"] in ("success", "error", "skipped"):
+            logger.info(f"{entry['provider']} account {entry['account_id']}: {entry['status']}"
+                        + (f" ({entry['error']})" if entry["error"] else ""))
+
+    orchestrator = SyncOrchestrator(
+        max_concurrency=args.concurrency,
+        max_per_tenant=args.per_tenant,
+        on_progress=log_progress
+    )
+    summary = asyncio.run(orchestrator.sync_all(
+        tenant_id=args.tenant_id,
+        days=args.days,
+        full_refresh=args.full_refresh
+    ))
+
+    logger.info(
+        f"Synced {summary['total_accounts']} accounts in {summary['duration_seconds']}s: "
+        f"{summary['succeeded']} succeeded, {summary['failed']} failed, {summary['skipped']} skipped"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Background worker for queued sync jobs
+
+Run with: python -m app.worker [--concurrency N]
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Dict, Any
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import time
+
+from app.core.config import settings
+from app.core.metrics import start_metrics_server
+from app.db.base import SessionLocal
+from app.models.aws_account import AWSAccount
+from app.models.cloud_account import CloudAccount, CloudProvider
+from app.models.sync_job import SyncJob, SyncJobType
+from app.services.cost_service import CostService
+from app.services.job_queue import JobQueue, PermanentJobError
+from app.services.partitions import CostDataPartitions
+from app.services.retention import CostRetention
+from app.services.rollups import CostRollups
+
+logger = logging.getLogger(__name__)
+
+STALE_CHECK_INTERVAL_SECONDS = 60
+PARTITION_CHECK_INTERVAL_SECONDS = 3600
+ROLLUP_REFRESH_INTERVAL_SECONDS = 15
+RETENTION_INTERVAL_SECONDS = 86400
+
+
+async def sync_aws_account(db, aws_account: AWSAccount, payload: Dict[str, Any], executor) -> Dict[str, Any]:
+    """Fetch Cost Explorer data for one AWSAccount, raising on failure so the job is retried"""
+    end_date = date.today()
+    start_date = end_date - timedelta(days=payload.get("days", 30))
+
+    aws_account.sync_status = "syncing"
+    db.commit()
+
+    result = await CostService(db, executor=executor).fetch_costs_for_account(
+        aws_account=aws_account,
+        start_date=start_date,
+        end_date=end_date,
+        full_refresh=payload.get("full_refresh", False)
+    )
+
+    if not result.get("success"):
+        raise RuntimeError(result.get("error") or "Cost sync failed")
+
+    return result
+
+
+async def run_aws_account_sync(db, job: SyncJob, executor) -> Dict[str, Any]:
+    """Handler for aws_account_sync jobs"""
+    aws_account = db.query(AWSAccount).filter(
+        AWSAccount.id == job.account_id,
+        AWSAccount.tenant_id == job.tenant_id
+    ).first()
+
+    if not aws_account or not aws_account.is_active:
+        raise PermanentJobError("AWS account not found or inactive")
+
+    return await sync_aws_account(db, aws_account, job.payload or {}, executor)
+
+
+async def run_cloud_account_sync(db, job: SyncJob, executor) -> Dict[str, Any]:
+    """Handler for cloud_account_sync jobs"""
+    account = db.query(CloudAccount).filter(
+        CloudAccount.id == job.account_id,
+        CloudAccount.tenant_id == job.tenant_id
+    ).first()
+
+    if not account or not account.is_active:
+        raise PermanentJobError("Cloud account not found or inactive")
+
+    try:
+        # Only AWS has a cost fetcher so far; it stores data against the linked AWSAccount
+        if account.provider != CloudProvider.AWS:
+            raise PermanentJobError(f"Cost sync not supported for {account.provider.value.upper()} yet")
+
+        aws_account = db.query(AWSAccount).filter(
+            AWSAccount.tenant_id == account.tenant_id,
+            AWSAccount.account_id == account.account_id,
+            AWSAccount.is_active == True
+        ).first()
+
+        if not aws_account:
+            raise PermanentJobError("No linked AWS account for this cloud account")
+
+        result = await sync_aws_account(db, aws_account, job.payload or {}, executor)
+
+        account.sync_status = "success"
+        account.sync_error = None
+        account.last_sync_at = datetime.utcnow()
+        db.commit()
+
+        return result
+
+    except Exception as e:
+        db.rollback()
+        account.sync_status = "error"
+        account.sync_error = str(e)
+        db.commit()
+        raise
+
+
+JOB_HANDLERS = {
+    SyncJobType.AWS_ACCOUNT_SYNC: run_aws_account_sync,
+    SyncJobType.CLOUD_ACCOUNT_SYNC: run_cloud_account_sync,
+}
+
+
+class Worker:
+    """Polls the job queue and runs jobs until stopped"""
+
+    def __init__(self, concurrency: int = 1):
+        self.concurrency = concurrency
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="job-worker")
+        # One thread for the periodic maintenance, which runs one task at a
+        # time, and one so heartbeats never wait behind a long retention run
+        self.maintenance_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="job-maintenance")
+        self._stopping = False
+
+    def stop(self) -> None:
+        self._stopping = True
+
+    async def run(self) -> None:
+        logger.info(f"Worker {self.worker_id} started with concurrency {self.concurrency}")
+        try:
+            await asyncio.gather(self._maintain(), *(self._loop(slot) for slot in range(self.concurrency)))
+        finally:
+            self.executor.shutdown(wait=False)
+            self.maintenance_executor.shutdown(wait=False)
+
+    async def _loop(self, slot: int) -> None:
+        worker_id = f"{self.worker_id}:{slot}"
+
+        while not self._stopping:
+            ran = await self.run_once(worker_id)
+            if not ran:
+                await asyncio.sleep(settings.JOB_POLL_INTERVAL_SECONDS)
+
+    async def _maintain(self) -> None:
+        """Run the periodic tasks in a thread so job slots keep running meanwhile"""
+        tasks = [
+            (STALE_CHECK_INTERVAL_SECONDS, self._requeue_stale),
+            (PARTITION_CHECK_INTERVAL_SECONDS, self._ensure_partitions),
+            (ROLLUP_REFRESH_INTERVAL_SECONDS, self._refresh_rollups),
+            (RETENTION_INTERVAL_SECONDS, self._apply_retention),
+        ]
+        last_run = [0.0] * len(tasks)
+        loop = asyncio.get_running_loop()
+
+        while not self._stopping:
+            for index, (interval, task) in enumerate(tasks):
+                if time.monotonic() - last_run[index] >= interval:
+                    last_run[index] = time.monotonic()
+                    await loop.run_in_executor(self.maintenance_executor, self._in_session, task)
+
+            await asyncio.sleep(1)
+
+    @staticmethod
+    def _in_session(task) -> None:
+        db = SessionLocal()
+        try:
+            task(db)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _requeue_stale(db) -> None:
+        try:
+            requeued = JobQueue.requeue_stale(db)
+            if requeued:
+                logger.warning(f"Requeued {requeued} stale jobs")
+        except Exception as e:
+            logger.error(f"Failed to requeue stale jobs: {e}")
+
+    @staticmethod
+    def _ensure_partitions(db) -> None:
+        try:
+            CostDataPartitions.ensure_future_partitions(db)
+        except Exception as e:
+            logger.error(f"Failed to create cost_data partitions: {e}")
+
+    @staticmethod
+    def _refresh_rollups(db) -> None:
+        # Syncs refresh their own rollups; this catches ranges they left behind
+        try:
+            refreshed = CostRollups.refresh_dirty(db)
+            if refreshed:
+                logger.info(f"Refreshed cost rollups of {refreshed} accounts")
+        except Exception as e:
+            logger.error(f"Failed to refresh cost rollups: {e}")
+
+    @staticmethod
+    def _apply_retention(db) -> None:
+        try:
+            CostRetention.apply(db)
+        except Exception as e:
+            logger.error(f"Failed to apply cost retention: {e}")
+
+    async def _heartbeat(self, job_id, worker_id: str) -> None:
+        """Renew the job's lock until cancelled, so long syncs are not requeued"""
+        loop = asyncio.get_running_loop()
+
+        def beat() -> bool:
+            db = SessionLocal()
+            try:
+                return JobQueue.heartbeat(db, job_id, worker_id)
+            finally:
+                db.close()
+
+        while True:
+            await asyncio.sleep(settings.JOB_HEARTBEAT_SECONDS)
+            try:
+                if not await loop.run_in_executor(self.maintenance_executor, beat):
+                    logger.warning(f"Job {job_id} is no longer held by {worker_id}")
+                    return
+            except Exception as e:
+                logger.error(f"Failed to renew the lock of job {job_id}: {e}")
+
+    async def run_once(self, worker_id: str) -> bool:
+        """Claim and run a single job. Returns False when the queue was empty."""
+        db = SessionLocal()
+        try:
+            job = JobQueue.dequeue(db, worker_id)
+            if not job:
+                return False
+
+            handler = JOB_HANDLERS.get(job.job_type)
+            logger.info(f"Running job {job.id} ({job.job_type}) attempt {job.attempts}")
+
+            heartbeat = asyncio.create_task(self._heartbeat(job.id, worker_id))
+            try:
+                if not handler:
+                    raise PermanentJobError(f"Unknown job type: {job.job_type}")
+                result = await handler(db, job, self.executor)
+                JobQueue.complete(db, job, worker_id, result)
+            except PermanentJobError as e:
+                db.rollback()
+                JobQueue.fail(db, job, worker_id, str(e), retryable=False)
+            except Exception as e:
+                db.rollback()
+                JobQueue.fail(db, job, worker_id, str(e), retryable=True)
+            finally:
+                heartbeat.cancel()
+
+            return True
+        finally:
+            db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the background job worker")
+    parser.add_argument("--concurrency", type=int, default=1, help="Jobs run at once by this process")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+
+    worker = Worker(concurrency=args.concurrency)
+    try:
+        asyncio.run(worker.run())
+    except KeyboardInterrupt:
+        logger.info("Worker stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+ETags of the cost endpoints across writes that change their results
+
+Runs the app against the migrated database at TEST_DATABASE_URL inside a
+transaction that is rolled back; every request gets its own session, as
+in production, so the tenant row and its cost_data_version are read
+fresh each time.
+"""
+import os
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core.deps import get_current_user
+from app.db.base import get_db
+from app.main import app
+from app.models import AWSAccount, Tenant, User
+from app.services import result_cache
+from app.services.result_cache import CostResultCache, MemoryCacheBackend
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+
+@pytest.fixture
+def tenant_client(monkeypatch):
+    engine = create_engine(TEST_DATABASE_URL)
+    connection = engine.connect()
+    transaction = connection.begin()
+    monkeypatch.setattr(result_cache, "cost_result_cache", CostResultCache(MemoryCacheBackend(100)))
+
+    def session() -> Session:
+        return Session(bind=connection, join_transaction_mode="create_savepoint")
+
+    db = session()
+    tenant = Tenant(id=uuid.uuid4(), name="ETag", slug=f"etag-{uuid.uuid4().hex[:8]}")
+    db.add(tenant)
+    db.flush()
+    user = User(id=uuid.uuid4(), email=f"{tenant.slug}@example.com", hashed_password="-", tenant_id=tenant.id)
+    account = AWSAccount(
+        id=uuid.uuid4(),
+        tenant_id=tenant.id,
+        account_id="000000000000",
+        role_arn="arn:aws:iam::000000000000:role/etag"
+    )
+    db.add_all([user, account])
+    db.commit()
+
+    def override_get_db():
+        request_db = session()
+        try:
+            yield request_db
+        finally:
+            request_db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        yield TestClient(app, headers={"Authorization": "Bearer test"}), account
+    finally:
+        app.dependency_overrides.clear()
+        db.close()
+        transaction.rollback()
+        connection.close()
+        engine.dispose()
+
+
+def test_cost_allocation_tags_update_changes_the_etag(tenant_client):
+    client, account = tenant_client
+    params = {"start_date": "2025-01-01", "end_date": "2025-01-31"}
+
+    first = client.get("/api/v1/costs/summary", params=params)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert client.get("/api/v1/costs/summary", params=params, headers={"If-None-Match": etag}).status_code == 304
+
+    updated = client.put(f"/api/v1/aws-accounts/{account.id}/cost-allocation-tags", json={"tag_keys": ["Team"]})
+    assert updated.status_code == 200
+
+    after = client.get("/api/v1/costs/summary", params=params, headers={"If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != etag
@@ -0,0 +1,173 @@
+"""
+State transitions of the Postgres job queue
+
+Runs JobQueue against the migrated database at TEST_DATABASE_URL. The
+queue commits on every step and SKIP LOCKED only shows between separate
+connections, so the jobs are really committed and deleted afterwards.
+Test jobs are due in the year 2000, ahead of anything else in the queue.
+"""
+from datetime import datetime, timedelta, timezone
+import os
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.models import SyncJob, Tenant
+from app.models.sync_job import SyncJobStatus, SyncJobType
+from app.services.job_queue import JobQueue
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+DUE = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def sessions():
+    engine = create_engine(TEST_DATABASE_URL)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    tenant = Tenant(id=uuid.uuid4(), name="Job queue", slug=f"job-queue-{uuid.uuid4().hex[:8]}")
+    db.add(tenant)
+    db.commit()
+
+    def add_job(minutes: int = 0, **values) -> SyncJob:
+        job = SyncJob(**{
+            "tenant_id": tenant.id,
+            "job_type": SyncJobType.AWS_ACCOUNT_SYNC,
+            "account_id": uuid.uuid4(),
+            "payload": {},
+            "status": SyncJobStatus.QUEUED,
+            "attempts": 0,
+            "max_attempts": 3,
+            "run_after": DUE + timedelta(minutes=minutes),
+            **values
+        })
+        db.add(job)
+        db.commit()
+        return job
+
+    try:
+        yield Session, db, add_job
+    finally:
+        db.rollback()
+        db.execute(text("DELETE FROM sync_jobs WHERE tenant_id = :id"), {"id": tenant.id})
+        db.execute(text("DELETE FROM tenants WHERE id = :id"), {"id": tenant.id})
+        db.commit()
+        db.close()
+        engine.dispose()
+
+
+def test_dequeue_claims_the_next_due_job(sessions):
+    Session, db, add_job = sessions
+    later = add_job(minutes=1)
+    first = add_job()
+    add_job(run_after=datetime.now(timezone.utc) + timedelta(days=1))
+
+    claimed = JobQueue.dequeue(db, "worker-a")
+
+    assert claimed.id == first.id
+    assert claimed.status == SyncJobStatus.RUNNING
+    assert claimed.attempts == 1
+    assert claimed.locked_by == "worker-a"
+    assert claimed.locked_at is not None
+    assert JobQueue.dequeue(db, "worker-a").id == later.id
+
+
+def test_dequeue_skips_jobs_locked_by_another_worker(sessions):
+    Session, db, add_job = sessions
+    first = add_job()
+    second = add_job(minutes=1)
+
+    # Another worker is in the middle of claiming the first job
+    other = Session()
+    try:
+        other.execute(text("SELECT id FROM sync_jobs WHERE id = :id FOR UPDATE"), {"id": first.id})
+        assert JobQueue.dequeue(db, "worker-a").id == second.id
+    finally:
+        other.rollback()
+        other.close()
+
+    assert JobQueue.dequeue(db, "worker-b").id == first.id
+
+
+def test_complete_and_fail_require_the_claiming_worker(sessions):
+    Session, db, add_job = sessions
+    add_job()
+    job = JobQueue.dequeue(db, "worker-a")
+
+    assert not JobQueue.complete(db, job, "worker-b", {"records_inserted": 1})
+    assert not JobQueue.fail(db, job, "worker-b", "boom")
+    db.refresh(job)
+    assert job.status == SyncJobStatus.RUNNING
+
+    assert JobQueue.complete(db, job, "worker-a", {"records_inserted": 1})
+    db.refresh(job)
+    assert job.status == SyncJobStatus.SUCCEEDED
+    assert job.result == {"records_inserted": 1}
+    assert job.locked_by is None
+    assert job.finished_at is not None
+
+
+def test_fail_retries_until_max_attempts(sessions):
+    Session, db, add_job = sessions
+    add_job(attempts=1)
+    job = JobQueue.dequeue(db, "worker-a")
+
+    assert JobQueue.fail(db, job, "worker-a", "throttled")
+    db.refresh(job)
+    assert job.status == SyncJobStatus.QUEUED
+    assert job.run_after > datetime.now(timezone.utc)
+    assert job.last_error == "throttled"
+
+    job.run_after = DUE
+    db.commit()
+    job = JobQueue.dequeue(db, "worker-a")
+    assert job.attempts == job.max_attempts
+
+    assert JobQueue.fail(db, job, "worker-a", "throttled")
+    db.refresh(job)
+    assert job.status == SyncJobStatus.FAILED
+    assert job.finished_at is not None
+
+
+def test_permanent_failure_is_not_retried(sessions):
+    Session, db, add_job = sessions
+    add_job()
+    job = JobQueue.dequeue(db, "worker-a")
+
+    assert JobQueue.fail(db, job, "worker-a", "account removed", retryable=False)
+    db.refresh(job)
+    assert job.status == SyncJobStatus.FAILED
+    assert job.attempts == 1
+
+
+def test_requeue_stale_spares_jobs_with_a_heartbeat(sessions):
+    Session, db, add_job = sessions
+    add_job()
+    add_job(minutes=1)
+    stale = JobQueue.dequeue(db, "worker-a")
+    alive = JobQueue.dequeue(db, "worker-b")
+
+    db.execute(
+        text("UPDATE sync_jobs SET locked_at = now() - interval '1 day' WHERE id IN (:stale, :alive)"),
+        {"stale": stale.id, "alive": alive.id}
+    )
+    db.commit()
+    assert JobQueue.heartbeat(db, alive.id, "worker-b")
+
+    JobQueue.requeue_stale(db)
+    db.refresh(stale)
+    db.refresh(alive)
+    assert stale.status == SyncJobStatus.QUEUED
+    assert stale.locked_by is None
+    assert alive.status == SyncJobStatus.RUNNING
+
+    # The worker that lost the job can neither renew nor finish it
+    assert not JobQueue.heartbeat(db, stale.id, "worker-a")
+    assert not JobQueue.complete(db, stale, "worker-a")
+    db.refresh(stale)
+    assert stale.status == SyncJobStatus.QUEUED
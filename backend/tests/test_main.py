@@ -12,3 +12,7 @@ def test_root():
     response = client.get("/")
     assert response.status_code == 200
     assert response.json()["message"] == "CloudCostly API"
+
+def test_metrics_are_not_served_by_the_api():
+    response = client.get("/metrics")
+    assert response.status_code == 404
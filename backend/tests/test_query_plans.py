@@ -0,0 +1,175 @@
+"""
+EXPLAIN regression tests for the query shapes of CostService
+
+Runs the service methods against the migrated database at
+TEST_DATABASE_URL, inside a transaction that is rolled back, records the
+statements they send and checks each plan: cost_data and cost_summaries
+must be read through index-only scans of their covering indexes.
+Sequential and bitmap scans are disabled so the result does not depend
+on how much data the database holds.
+"""
+from datetime import date, timedelta
+import asyncio
+import os
+import re
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.models import AWSAccount, Tenant
+from app.services.bulk_loader import COST_DATA, copy_rows
+from app.services.cost_service import CostService
+from app.services.rollups import CostRollups
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+START = date(2025, 1, 1)
+END = date(2025, 3, 31)
+
+# Ranges whose edges fall between weeks, so both rollups and raw days are read
+QUERY_START = date(2025, 1, 15)
+QUERY_END = date(2025, 3, 20)
+
+
+@pytest.fixture(scope="module")
+def plans():
+    engine = create_engine(TEST_DATABASE_URL)
+    db = sessionmaker(bind=engine)()
+    try:
+        tenant = Tenant(id=uuid.uuid4(), name="Query plans", slug=f"query-plans-{uuid.uuid4().hex[:8]}")
+        db.add(tenant)
+        db.flush()
+        accounts = [
+            AWSAccount(
+                id=uuid.uuid4(),
+                tenant_id=tenant.id,
+                account_id=f"{index:012d}",
+                account_name=f"Query plans {index}",
+                organizational_unit="Root/Workloads" if index else None,
+                role_arn="arn:aws:iam::000000000000:role/query-plans"
+            )
+            for index in range(2)
+        ]
+        db.add_all(accounts)
+        db.flush()
+
+        rows = [
+            {
+                "tenant_id": tenant.id,
+                "aws_account_id": account.id,
+                "date": START + timedelta(days=day),
+                "service": f"Query plans service {service}",
+                "region": "us-east-1",
+                "usage_type": None,
+                "tags": {},
+                "cost_micros": 1_000_000,
+                "currency": "USD"
+            }
+            for account in accounts
+            for day in range((END - START).days + 1)
+            for service in range(3)
+        ]
+        copy_rows(db, COST_DATA, rows)
+        for account in accounts:
+            CostRollups.refresh(db, account.id, START, END)
+        # Leave a few days dirty so the trend and planner read them raw
+        db.execute(text("DELETE FROM cost_rollup_dirty_ranges WHERE tenant_id = :tenant_id"), {"tenant_id": tenant.id})
+        CostRollups.mark_dirty(db, [
+            {"tenant_id": tenant.id, "aws_account_id": accounts[0].id, "date": date(2025, 2, 11)},
+            {"tenant_id": tenant.id, "aws_account_id": accounts[0].id, "date": date(2025, 2, 12)},
+        ])
+
+        db.execute(text("SET LOCAL enable_seqscan = off"))
+        db.execute(text("SET LOCAL enable_bitmapscan = off"))
+
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().startswith("SELECT") and re.search(r"\b(cost_data|cost_summaries)\b", statement):
+                statements.append((statement, parameters))
+
+        service = CostService(db)
+        shapes = {
+            "summary": lambda: service.get_cost_summary(tenant.id, QUERY_START, QUERY_END),
+            "summary_account": lambda: service.get_cost_summary(tenant.id, QUERY_START, QUERY_END, accounts[0].id),
+            "trend": lambda: service.get_cost_trend(tenant.id, QUERY_START, QUERY_END),
+            "by_region": lambda: service.get_cost_by_region(tenant.id, QUERY_START, QUERY_END),
+            "month_over_month": lambda: service.get_month_over_month_comparison(
+                tenant.id, date(2025, 3, 1), date(2025, 3, 31)
+            ),
+            "multi_account": lambda: service.get_multi_account_summary(tenant.id, QUERY_START, QUERY_END),
+            "multi_account_ou": lambda: service.get_multi_account_summary(
+                tenant.id, QUERY_START, QUERY_END, group_by="organizational_unit"
+            ),
+            "query_service_account": lambda: service.query_costs(
+                tenant.id, QUERY_START, QUERY_END, group_by=["service", "account"], granularity="week"
+            ),
+            "query_region_top": lambda: service.query_costs(
+                tenant.id, QUERY_START, QUERY_END, group_by=["region"], granularity="month", top_n=1
+            ),
+            "dashboard": lambda: service.get_dashboard(
+                tenant.id, QUERY_START, QUERY_END, date(2025, 3, 1), QUERY_END
+            ),
+        }
+
+        results = {}
+        for name, run in shapes.items():
+            statements.clear()
+            event.listen(engine, "before_cursor_execute", capture)
+            try:
+                asyncio.run(run())
+            finally:
+                event.remove(engine, "before_cursor_execute", capture)
+
+            cursor = db.connection().connection.cursor()
+            results[name] = []
+            for statement, parameters in statements:
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+                results[name].append(cursor.fetchone()[0][0]["Plan"])
+            cursor.close()
+
+        yield results
+    finally:
+        db.rollback()
+        db.close()
+        engine.dispose()
+
+
+def _scans(plan, table):
+    """(node type, index name) of every scan of table or its partitions"""
+    scans = []
+    relation = plan.get("Relation Name", "")
+    if relation == table or relation.startswith(f"{table}_p"):
+        scans.append((plan["Node Type"], plan.get("Index Name")))
+    for child in plan.get("Plans", []):
+        scans += _scans(child, table)
+    return scans
+
+
+@pytest.mark.parametrize("shape", [
+    "summary", "summary_account", "trend", "by_region", "month_over_month", "multi_account", "multi_account_ou",
+    "query_service_account", "query_region_top", "dashboard"
+])
+def test_cost_queries_use_index_only_scans(plans, shape):
+    cost_data_scans = [scan for plan in plans[shape] for scan in _scans(plan, "cost_data")]
+    summary_scans = [scan for plan in plans[shape] for scan in _scans(plan, "cost_summaries")]
+
+    assert cost_data_scans or summary_scans
+    for node_type, index_name in cost_data_scans:
+        assert node_type == "Index Only Scan", (shape, node_type, index_name)
+        # Partition indexes are named after their columns
+        assert "tenant_id_date" in index_name or "aws_account_id_date_tenant_id" in index_name
+    for node_type, index_name in summary_scans:
+        assert (node_type, index_name) == ("Index Only Scan", "idx_summary_tenant_type_start"), shape
+
+
+@pytest.mark.parametrize("shape", [
+    "multi_account", "multi_account_ou", "query_service_account", "query_region_top", "dashboard"
+])
+def test_grouped_queries_are_one_statement(plans, shape):
+    # Rollups, raw edge days and the names all in one query, whatever the number of groups
+    assert len(plans[shape]) == 1
@@ -0,0 +1,174 @@
+"""
+CostRetention.apply against the migrated database at TEST_DATABASE_URL
+
+Runs inside a transaction that is rolled back; the service's commits
+only release savepoints, so no other tenant's history is touched for
+good. Dimension names are committed on their own connection and are
+resolved before the transaction starts.
+"""
+from datetime import date
+import os
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.models import AWSAccount, Tenant
+from app.services import result_cache
+from app.services.bulk_loader import COST_DATA, copy_rows
+from app.services.cost_service import CostService
+from app.services.dimensions import REGIONS, SERVICES
+from app.services.result_cache import CostResultCache, MemoryCacheBackend
+from app.services.retention import CostRetention
+from app.services.rollups import ROLLUP_LOCK_KEY
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+# Free plan: three months plus the current one, so the cutoff is 2019-08-01
+TODAY = date(2019, 11, 17)
+
+
+def test_retention_defers_tenants_with_unrolled_days():
+    engine = create_engine(TEST_DATABASE_URL)
+    with Session(engine) as plain:
+        SERVICES.resolve(plain, ["Retention service"])
+        REGIONS.resolve(plain, ["us-east-1"])
+    connection = engine.connect()
+    transaction = connection.begin()
+    db = Session(bind=connection, join_transaction_mode="create_savepoint")
+    other = engine.connect()
+    try:
+        tenant = Tenant(id=uuid.uuid4(), name="Retention", slug=f"retention-{uuid.uuid4().hex[:8]}", subscription_plan="free")
+        db.add(tenant)
+        db.flush()
+        account = AWSAccount(
+            id=uuid.uuid4(),
+            tenant_id=tenant.id,
+            account_id="000000000000",
+            role_arn="arn:aws:iam::000000000000:role/retention"
+        )
+        db.add(account)
+        db.flush()
+        copy_rows(db, COST_DATA, [
+            {
+                "tenant_id": tenant.id,
+                "aws_account_id": account.id,
+                "date": date(2019, 6, day),
+                "service": "Retention service",
+                "region": "us-east-1",
+                "usage_type": None,
+                "tags": {},
+                "cost_micros": 1_000_000,
+                "currency": "USD"
+            }
+            for day in (10, 11)
+        ])
+        db.commit()
+
+        def raw_rows():
+            return db.execute(
+                text("SELECT count(*) FROM cost_data WHERE tenant_id = :tenant_id"), {"tenant_id": tenant.id}
+            ).scalar()
+
+        def june_total():
+            return db.execute(text("""
+                SELECT total_cost_micros FROM cost_summaries
+                WHERE aws_account_id = :account_id AND period_type = 'monthly'
+                  AND period_start = '2019-06-01' AND service_id IS NULL
+            """), {"account_id": account.id}).scalar()
+
+        # A concurrent refresh holds the account, so its June days stay dirty
+        other.execute(
+            text("SELECT pg_advisory_lock(:key, hashtext(:account_id))"),
+            {"key": ROLLUP_LOCK_KEY, "account_id": str(account.id)}
+        )
+        CostRetention.apply(db, TODAY)
+
+        db.refresh(tenant)
+        assert raw_rows() == 2
+        assert june_total() is None
+        assert tenant.cost_downsampled_before is None
+
+        other.execute(
+            text("SELECT pg_advisory_unlock(:key, hashtext(:account_id))"),
+            {"key": ROLLUP_LOCK_KEY, "account_id": str(account.id)}
+        )
+        CostRetention.apply(db, TODAY)
+
+        db.refresh(tenant)
+        assert raw_rows() == 0
+        assert june_total() == 2_000_000
+        assert tenant.cost_downsampled_before == date(2019, 8, 1)
+    finally:
+        other.close()
+        db.close()
+        transaction.rollback()
+        connection.close()
+        engine.dispose()
+
+
+async def test_raw_rows_loaded_past_the_horizon_are_deleted_and_never_read(monkeypatch):
+    monkeypatch.setattr(result_cache, "cost_result_cache", CostResultCache(MemoryCacheBackend(100)))
+    engine = create_engine(TEST_DATABASE_URL)
+    with Session(engine) as plain:
+        SERVICES.resolve(plain, ["Retention service"])
+        REGIONS.resolve(plain, ["us-east-1"])
+    connection = engine.connect()
+    transaction = connection.begin()
+    db = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        # Already downsampled up to its cutoff, so nothing is due
+        tenant = Tenant(
+            id=uuid.uuid4(),
+            name="Retention",
+            slug=f"retention-{uuid.uuid4().hex[:8]}",
+            subscription_plan="free",
+            cost_downsampled_before=date(2019, 8, 1)
+        )
+        db.add(tenant)
+        db.flush()
+        account = AWSAccount(
+            id=uuid.uuid4(),
+            tenant_id=tenant.id,
+            account_id="000000000000",
+            role_arn="arn:aws:iam::000000000000:role/retention"
+        )
+        db.add(account)
+        db.flush()
+        # A restated June export lands next to August's detail
+        copy_rows(db, COST_DATA, [
+            {
+                "tenant_id": tenant.id,
+                "aws_account_id": account.id,
+                "date": day,
+                "service": "Retention service",
+                "region": "us-east-1",
+                "usage_type": None,
+                "tags": {},
+                "cost_micros": 1_000_000,
+                "currency": "USD"
+            }
+            for day in (date(2019, 6, 10), date(2019, 8, 10))
+        ])
+        db.commit()
+
+        by_region = await CostService(db).get_cost_by_region(str(tenant.id), date(2019, 6, 1), date(2019, 8, 31))
+        assert by_region["total_cost"] == 1.0
+        assert by_region["detail_available_from"] == "2019-08-01"
+
+        CostRetention.apply(db, TODAY)
+
+        db.refresh(tenant)
+        assert tenant.cost_downsampled_before == date(2019, 8, 1)
+        days = db.execute(
+            text("SELECT date FROM cost_data WHERE tenant_id = :tenant_id"), {"tenant_id": tenant.id}
+        ).scalars().all()
+        assert days == [date(2019, 8, 10)]
+    finally:
+        db.close()
+        transaction.rollback()
+        connection.close()
+        engine.dispose()
@@ -0,0 +1,105 @@
+"""
+Sync-all batches against the migrated database at TEST_DATABASE_URL
+
+Runs inside a transaction that is rolled back; the queue's commits only
+release savepoints.
+"""
+import os
+import uuid
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.models import AWSAccount, SyncBatch, SyncJob, Tenant
+from app.models.sync_job import SyncJobStatus
+from app.services.sync_orchestrator import SyncOrchestrator
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+
+@pytest.fixture
+def tenant_db():
+    engine = create_engine(TEST_DATABASE_URL)
+    connection = engine.connect()
+    transaction = connection.begin()
+    db = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        tenant = Tenant(id=uuid.uuid4(), name="Sync batches", slug=f"sync-batches-{uuid.uuid4().hex[:8]}")
+        db.add(tenant)
+        db.flush()
+        accounts = [
+            AWSAccount(
+                id=uuid.uuid4(),
+                tenant_id=tenant.id,
+                account_id=account_id,
+                account_name=f"Account {account_id}",
+                role_arn=f"arn:aws:iam::{account_id}:role/sync",
+                is_active=is_active
+            )
+            for account_id, is_active in [("111111111111", True), ("222222222222", True), ("333333333333", False)]
+        ]
+        db.add_all(accounts)
+        db.commit()
+        yield db, tenant, accounts
+    finally:
+        db.close()
+        transaction.rollback()
+        connection.close()
+        engine.dispose()
+
+
+def test_queue_all_queues_one_job_per_active_account(tenant_db):
+    db, tenant, accounts = tenant_db
+
+    batch = SyncOrchestrator().queue_all(db, tenant.id, days=7)
+
+    progress = SyncOrchestrator.batch_progress(db, batch)
+    assert progress["sync_id"] == str(batch.id)
+    assert (batch.end_date - batch.start_date).days == 7
+    assert progress["end_date"] == batch.end_date.isoformat()
+    assert sorted(entry["account_id"] for entry in progress["accounts"]) == ["111111111111", "222222222222"]
+    assert progress["queued"] == progress["total_accounts"] == 2
+    assert not progress["completed"]
+    for account in accounts[:2]:
+        db.refresh(account)
+        assert account.sync_status == "syncing"
+
+    # A second sync-all while the jobs are in flight reuses them
+    again = SyncOrchestrator().queue_all(db, tenant.id, days=7)
+    assert sorted(again.job_ids) == sorted(batch.job_ids)
+
+
+def test_batch_progress_counts_finished_and_skipped_accounts(tenant_db):
+    db, tenant, accounts = tenant_db
+    queued = SyncOrchestrator().queue_all(db, tenant.id)
+
+    jobs = {entry["account_id"]: entry["job_id"] for entry in SyncOrchestrator.batch_progress(db, queued)["accounts"]}
+    succeeded = db.get(SyncJob, uuid.UUID(jobs["111111111111"]))
+    succeeded.status = SyncJobStatus.SUCCEEDED
+    succeeded.result = {"records_inserted": 12, "records_updated": 3}
+    failed = db.get(SyncJob, uuid.UUID(jobs["222222222222"]))
+    failed.status = SyncJobStatus.FAILED
+    failed.last_error = "AccessDenied"
+    db.commit()
+
+    skipped = {"id": str(uuid.uuid4()), "account_id": "subscription", "status": "skipped", "error": "Not supported"}
+    batch = SyncBatch(
+        tenant_id=tenant.id,
+        start_date=queued.start_date,
+        end_date=queued.end_date,
+        job_ids=queued.job_ids,
+        skipped=[skipped]
+    )
+
+    progress = SyncOrchestrator.batch_progress(db, batch)
+
+    assert progress["completed"]
+    assert (progress["succeeded"], progress["failed"], progress["skipped"]) == (1, 1, 1)
+    assert progress["total_accounts"] == 3
+    entries = {entry["account_id"]: entry for entry in progress["accounts"]}
+    assert entries["111111111111"]["records_inserted"] == 12
+    assert entries["222222222222"]["error"] == "AccessDenied"
+    assert entries["subscription"] == skipped
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta, timezone
+
+from app.services.aws_client import AWSClientManager, LRUCache
+
+
+def make_manager(expires_in: timedelta):
+    manager = AWSClientManager(credential_cache_size=2, client_cache_size=10)
+    calls = []
+
+    def fake_assume_role(role_arn, external_id, region):
+        calls.append(role_arn)
+        return {
+            'access_key': f'AKIA{len(calls)}',
+            'secret_key': 'secret',
+            'token': 'token',
+            'expiry_time': (datetime.now(timezone.utc) + expires_in).isoformat()
+        }
+
+    manager._assume_role = fake_assume_role
+    return manager, calls
+
+
+def test_clients_share_cached_role_credentials():
+    manager, calls = make_manager(timedelta(hours=1))
+
+    ce_client = manager.get_cost_explorer_client('arn:aws:iam::111111111111:role/a')
+    assert manager.get_cost_explorer_client('arn:aws:iam::111111111111:role/a') is ce_client
+    manager.get_pricing_client('arn:aws:iam::111111111111:role/a')
+
+    assert calls == ['arn:aws:iam::111111111111:role/a']
+    assert ce_client._request_signer._credentials.get_frozen_credentials().access_key == 'AKIA1'
+
+
+def test_assume_role_builds_tuned_clients_for_any_service():
+    manager, calls = make_manager(timedelta(hours=1))
+    role_arn = 'arn:aws:iam::111111111111:role/a'
+
+    clients = [
+        manager.assume_role(role_arn=role_arn, region='eu-west-1', service_name=service_name)
+        for service_name in ('ec2', 'cloudwatch', 'rds', 'ce', 'compute-optimizer')
+    ]
+
+    assert calls == [role_arn]
+    assert [client.meta.service_model.service_name for client in clients] == [
+        'ec2', 'cloudwatch', 'rds', 'ce', 'compute-optimizer'
+    ]
+    assert manager.assume_role(role_arn=role_arn, region='eu-west-1', service_name='ec2') is clients[0]
+    assert clients[0].meta.config.retries['mode'] == 'adaptive'
+    # Cost Explorer calls are retried by the payer rate limiter only
+    assert clients[3].meta.config.retries == {'mode': 'standard', 'total_max_attempts': 1}
+    assert clients[3].meta.config.max_pool_connections == clients[0].meta.config.max_pool_connections
+
+
+def test_credentials_are_refreshed_before_expiry():
+    manager, calls = make_manager(timedelta(minutes=5))
+
+    credentials = manager.get_credentials('arn:aws:iam::111111111111:role/a')
+    # Inside botocore's mandatory refresh window, reading credentials re-assumes the role
+    assert credentials.get_frozen_credentials().access_key == 'AKIA2'
+    assert len(calls) == 2
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_size=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert len(cache) == 2
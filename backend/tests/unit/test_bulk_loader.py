@@ -0,0 +1,49 @@
+import io
+import uuid
+from datetime import date
+
+from app.services.bulk_loader import COST_DATA, row_key, write_copy_text
+
+
+def test_write_copy_text_distinguishes_null_from_empty_string():
+    account_id = uuid.UUID('00000000-0000-0000-0000-000000000001')
+    buffer = io.StringIO()
+
+    count = write_copy_text([{
+        'tenant_id': account_id,
+        'aws_account_id': account_id,
+        'date': date(2025, 11, 1),
+        'service_id': 3,
+        'region_id': None,
+        'usage_type_id': None,
+        'tags': {'Team': 'a\tb\\c'},
+        'cost_micros': 1500000,
+        'currency': ''
+    }], COST_DATA.columns, buffer)
+
+    assert count == 1
+    assert buffer.getvalue().split('\t') == [
+        '00000000-0000-0000-0000-000000000001',
+        '00000000-0000-0000-0000-000000000001',
+        '2025-11-01',
+        '3',
+        '\\N',
+        '\\N',
+        '{"Team":"a\\\\tb\\\\\\\\c"}',
+        '1500000',
+        '\n'
+    ]
+
+
+def test_row_key_is_hashable_with_tags():
+    row = {'aws_account_id': 'a', 'date': date(2025, 11, 1), 'service': 's', 'region': None,
+           'usage_type': None, 'tags': {'b': '2', 'a': '1'}}
+
+    assert row_key(COST_DATA, row) == row_key(COST_DATA, dict(row, tags={'a': '1', 'b': '2'}))
+
+
+def test_row_key_uses_dimension_names():
+    row = {'aws_account_id': 'a', 'date': date(2025, 11, 1), 'service': 's', 'region': 'r',
+           'usage_type': None, 'tags': {}}
+
+    assert row_key(COST_DATA, row) == ('a', date(2025, 11, 1), 's', 'r', None, '{}')
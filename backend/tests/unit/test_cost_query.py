@@ -0,0 +1,72 @@
+from datetime import date
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services.cost_query import CostQuery, CostQueryEngine
+
+
+class NoDirtyRanges:
+    """Session stand-in for the dirty range lookup"""
+
+    def execute(self, *args, **kwargs):
+        return self
+
+    def all(self):
+        return []
+
+
+def _sql(query, start=date(2025, 1, 1), end=date(2025, 3, 31)):
+    statement = CostQueryEngine(NoDirtyRanges()).statement("tenant", start, end, query)
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.parametrize("query", [
+    {"group_by": ["owner"]},
+    {"group_by": ["tag:"]},
+    {"filters": {"account": ["123456789012"]}},
+    {"granularity": "hour"},
+    {"top_n": 0},
+])
+def test_cost_query_rejects_what_it_cannot_answer(query):
+    with pytest.raises(ValueError):
+        CostQuery(**query)
+
+
+def test_service_and_account_queries_read_rollups():
+    sql = _sql(CostQuery(group_by=["service", "account"], granularity="month"))
+
+    assert "FROM cost_summaries" in sql
+    # Whole months need no raw days
+    assert "FROM cost_data" not in sql
+
+
+def test_other_dimensions_scan_cost_data_in_one_statement():
+    sql = _sql(CostQuery(
+        group_by=["region", "tag:Team"], filters={"service": ["Amazon EC2"], "tag:Env": ["prod", None]}, top_n=5
+    ))
+
+    assert "cost_summaries" not in sql
+    assert sql.count("FROM cost_data") == 1
+    assert "dense_rank() OVER" in sql
+    assert "@>" in sql  # Tag filters by containment, for the GIN index
+
+
+def test_empty_range_has_no_statement():
+    assert CostQueryEngine(NoDirtyRanges()).statement(
+        "tenant", date(2025, 2, 1), date(2025, 1, 1), CostQuery(group_by=["service"])
+    ) is None
+
+
+def test_raw_scans_start_at_the_retention_horizon():
+    query = CostQuery(group_by=["region"])
+    statement = CostQueryEngine(NoDirtyRanges()).statement(
+        "tenant", date(2025, 1, 1), date(2025, 3, 31), query, downsampled_before=date(2025, 2, 1)
+    )
+    dates = set(statement.compile(dialect=postgresql.dialect()).params.values())
+
+    assert date(2025, 2, 1) in dates
+    assert date(2025, 1, 1) not in dates
+    assert CostQueryEngine(NoDirtyRanges()).statement(
+        "tenant", date(2025, 1, 1), date(2025, 1, 31), query, downsampled_before=date(2025, 2, 1)
+    ) is None
@@ -0,0 +1,139 @@
+from decimal import Decimal
+
+from app.services.cost_service import UNTAGGED, CostService
+
+
+class PagedCostExplorer:
+    """Minimal Cost Explorer stand-in that serves results over several pages"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requests = []
+
+    def get_cost_and_usage(self, **params):
+        self.requests.append(params)
+        page = int(params.get('NextPageToken', 0))
+        response = {'ResultsByTime': self.pages[page]}
+        if page + 1 < len(self.pages):
+            response['NextPageToken'] = str(page + 1)
+        return response
+
+
+async def test_iter_cost_and_usage_follows_next_page_token():
+    ce_client = PagedCostExplorer([[{'page': 0}], [{'page': 1}, {'page': 1}], [{'page': 2}]])
+    service = CostService(db=None)
+
+    results = [result async for result in service.iter_cost_and_usage(ce_client, Granularity='DAILY')]
+
+    assert [result['page'] for result in results] == [0, 1, 1, 2]
+    assert len(ce_client.requests) == 3
+    assert 'NextPageToken' not in ce_client.requests[0]
+    assert ce_client.requests[2]['NextPageToken'] == '2'
+
+
+def test_resolve_sync_window_uses_watermark_and_restatement_window(monkeypatch):
+    from datetime import date
+    from types import SimpleNamespace
+    from app.services import cost_service
+
+    monkeypatch.setattr(cost_service.settings, 'COST_RESTATEMENT_DAYS', 3)
+    service = CostService(db=None)
+    account = SimpleNamespace(cost_synced_from=date(2025, 9, 1), cost_watermark_date=date(2025, 10, 15))
+
+    # Only the restatement window and newer days are re-fetched
+    assert service.resolve_sync_window(account, date(2025, 9, 16), date(2025, 10, 16)) == \
+        (date(2025, 10, 13), date(2025, 10, 16))
+    # Nothing left to fetch when the whole range is final
+    assert service.resolve_sync_window(account, date(2025, 9, 1), date(2025, 10, 10)) is None
+    # Reaching back before the covered range or forcing fetches everything
+    assert service.resolve_sync_window(account, date(2025, 8, 1), date(2025, 10, 16)) == \
+        (date(2025, 8, 1), date(2025, 10, 16))
+    assert service.resolve_sync_window(account, date(2025, 9, 16), date(2025, 10, 16), full_refresh=True) == \
+        (date(2025, 9, 16), date(2025, 10, 16))
+
+
+async def test_iter_tag_cost_rows_splits_tag_keys():
+    from types import SimpleNamespace
+
+    ce_client = PagedCostExplorer([[{
+        'TimePeriod': {'Start': '2025-10-01', 'End': '2025-10-02'},
+        'Groups': [
+            {'Keys': ['Environment$production'], 'Metrics': {'UnblendedCost': {'Amount': '12.5', 'Unit': 'USD'}}},
+            {'Keys': ['Environment$'], 'Metrics': {'UnblendedCost': {'Amount': '3', 'Unit': 'USD'}}},
+            {'Keys': ['Environment$staging'], 'Metrics': {'UnblendedCost': {'Amount': '0', 'Unit': 'USD'}}}
+        ]
+    }]])
+    service = CostService(db=None)
+    account = SimpleNamespace(id='account', tenant_id='tenant', account_id='111111111111', config_data=None)
+
+    rows = [row async for row in service.iter_tag_cost_rows(account, ce_client, '2025-10-01', '2025-10-02', 'Environment')]
+
+    assert [(row['tag_value'], row['cost_micros']) for row in rows] == [('production', 12500000), ('', 3000000)]
+    assert ce_client.requests[0]['GroupBy'] == [{'Type': 'TAG', 'Key': 'Environment'}]
+
+
+def test_get_tag_keys_prefers_account_configuration():
+    from types import SimpleNamespace
+    from app.services import cost_service
+
+    service = CostService(db=None)
+
+    assert service.get_tag_keys(SimpleNamespace(config_data=None)) == cost_service.settings.COST_ALLOCATION_TAG_KEYS
+    assert service.get_tag_keys(SimpleNamespace(config_data={'cost_allocation_tags': ['CostCenter', 'CostCenter']})) == \
+        ['CostCenter']
+
+
+async def test_prefetched_streams_fetch_concurrently():
+    import asyncio
+    import time
+    from app.services.cost_service import PrefetchedStream
+
+    async def slow_rows(name):
+        for index in range(3):
+            await asyncio.sleep(0.05)
+            yield (name, index)
+
+    started = time.monotonic()
+    first = PrefetchedStream(slow_rows('costs'), max_buffered=10)
+    second = PrefetchedStream(slow_rows('tags'), max_buffered=10)
+
+    assert [row async for row in first] == [('costs', 0), ('costs', 1), ('costs', 2)]
+    assert [row async for row in second] == [('tags', 0), ('tags', 1), ('tags', 2)]
+    # Back to back would take six sleeps
+    assert time.monotonic() - started < 0.25
+
+
+async def test_prefetched_stream_reraises_source_errors():
+    import pytest
+    from app.services.cost_service import PrefetchedStream
+
+    async def failing_rows():
+        yield 1
+        raise RuntimeError('throttled')
+
+    stream = PrefetchedStream(failing_rows(), max_buffered=1)
+
+    with pytest.raises(RuntimeError, match='throttled'):
+        [row async for row in stream]
+
+
+def test_tag_breakdown_labels_untagged_values():
+    breakdown, total_micros = CostService._tag_breakdown(['Environment', 'Team'], {
+        ('prod', 'a'): 3_000_000,
+        ('prod', None): 1_000_000,
+        (None, None): 0,
+    })
+
+    assert total_micros == 4_000_000
+    assert [(row['tag_value'], row['cost'], row['percentage']) for row in breakdown] == [
+        ('prod / a', Decimal('3.00'), 75.0),
+        (f'prod / {UNTAGGED}', Decimal('1.00'), 25.0),
+    ]
+    assert breakdown[1]['tags'] == {'Environment': 'prod', 'Team': None}
+
+
+def test_previous_period_has_the_same_length():
+    from datetime import date
+
+    assert CostService._previous_period(date(2025, 3, 1), date(2025, 3, 31)) == (date(2025, 1, 29), date(2025, 2, 28))
+    assert CostService._previous_period(date(2025, 3, 1), date(2025, 3, 10)) == (date(2025, 2, 19), date(2025, 2, 28))
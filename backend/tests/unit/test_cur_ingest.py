@@ -0,0 +1,134 @@
+import csv
+import gzip
+import os
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import account_config
+from app.services.account_config import get_cur_path, get_payer_account_id
+from app.services.cur_ingest import CURIngestService, normalize_column
+
+HEADER = [
+    'lineItem/UsageStartDate', 'lineItem/UsageAccountId', 'product/ProductName', 'product/region',
+    'lineItem/UsageType', 'lineItem/UnblendedCost', 'lineItem/CurrencyCode', 'resourceTags/user:Environment'
+]
+
+
+def write_report(path, rows):
+    with gzip.open(path, 'wt', newline='') as report:
+        writer = csv.writer(report)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+
+
+def test_normalize_column():
+    assert normalize_column('lineItem/UsageStartDate') == ('line_item_usage_start_date', None)
+    assert normalize_column('product/ProductName') == ('product_product_name', None)
+    assert normalize_column('line_item_unblended_cost') == ('line_item_unblended_cost', None)
+    assert normalize_column('resourceTags/user:Environment')[1] == 'Environment'
+    assert normalize_column('resource_tags_user_environment')[1] == 'environment'
+
+
+def test_read_chunks_resumes_from_offset(tmp_path, monkeypatch):
+    from app.services import cur_ingest
+
+    monkeypatch.setattr(cur_ingest.settings, 'CUR_INGEST_CHUNK_ROWS', 2)
+    path = str(tmp_path / 'report-1.csv.gz')
+    write_report(path, [
+        [f'2025-11-0{day}T00:00:00Z', '111111111111', 'Amazon EC2', 'us-east-1', 'BoxUsage', '1.5', 'USD', 'prod']
+        for day in range(1, 6)
+    ])
+    service = CURIngestService(db=None)
+
+    chunks = list(service.read_chunks(path, offset=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert chunks[0][0]['line_item_usage_start_date'] == '2025-11-03T00:00:00Z'
+    assert chunks[0][0]['tags'] == {'Environment': 'prod'}
+
+
+def test_aggregate_sums_line_items_onto_cost_keys():
+    service = CURIngestService(db=None)
+    account = SimpleNamespace(id='payer', tenant_id='tenant')
+    line_item = {
+        'line_item_usage_start_date': '2025-11-01T00:00:00Z',
+        'line_item_usage_account_id': '222222222222',
+        'product_product_name': 'Amazon EC2',
+        'product_region': 'us-east-1',
+        'line_item_usage_type': 'BoxUsage',
+        'line_item_unblended_cost': '2.25',
+        'line_item_currency_code': 'USD',
+        'tags': {'Environment': 'prod'}
+    }
+    untagged = dict(line_item, tags={}, product_region='')
+    zero = dict(line_item, line_item_unblended_cost='0')
+
+    cost_rows, tag_rows, total = service._aggregate(
+        account, [line_item, line_item, untagged, zero], {'222222222222': 'linked'}, ['Environment']
+    )
+
+    assert total == 6750000
+    assert sorted(
+        (row['aws_account_id'], row['region'], row['tags'], row['cost_micros']) for row in cost_rows.values()
+    ) == [
+        ('linked', 'NoRegion', {}, 2250000),
+        ('linked', 'us-east-1', {'Environment': 'prod'}, 4500000)
+    ]
+    assert {key[3]: row['cost_micros'] for key, row in tag_rows.items()} == {'prod': 4500000, '': 2250000}
+    assert all(row['date'] == date(2025, 11, 1) for row in cost_rows.values())
+
+
+def test_aggregate_rounds_summed_line_items_once():
+    service = CURIngestService(db=None)
+    account = SimpleNamespace(id='payer', tenant_id='tenant')
+    # Each line item is below one micro, their sum is not
+    line_item = {
+        'line_item_usage_start_date': '2025-11-01T00:00:00Z',
+        'line_item_usage_account_id': '',
+        'product_product_name': 'AWS Lambda',
+        'line_item_unblended_cost': '0.0000004',
+        'tags': {}
+    }
+
+    cost_rows, _, total = service._aggregate(account, [line_item] * 5, {}, [])
+
+    assert [row['cost_micros'] for row in cost_rows.values()] == [2]
+    assert total == 2
+
+
+def test_payer_account_id_is_none_for_the_payer_itself():
+    assert get_payer_account_id(SimpleNamespace(account_id='222', config_data={'payer_account_id': '111'})) == '111'
+    assert get_payer_account_id(SimpleNamespace(account_id='111', config_data={'payer_account_id': '111'})) is None
+    assert get_payer_account_id(SimpleNamespace(account_id='111', config_data=None)) is None
+
+
+def test_cur_path_stays_inside_the_tenant_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(account_config.settings, 'CUR_DATA_DIR', str(tmp_path))
+    (tmp_path / 'tenant-b' / '111').mkdir(parents=True)
+    (tmp_path / 'tenant-a').mkdir()
+    os.symlink(tmp_path / 'tenant-b' / '111', tmp_path / 'tenant-a' / 'link')
+
+    def account(cur_path=None):
+        config_data = {'cur_path': cur_path} if cur_path else None
+        return SimpleNamespace(tenant_id='tenant-a', account_id='111', config_data=config_data)
+
+    assert get_cur_path(account()) == str(tmp_path / 'tenant-a' / '111')
+    assert get_cur_path(account('payer/exports')) == str(tmp_path / 'tenant-a' / 'payer' / 'exports')
+    for escape in ['../tenant-b/111', str(tmp_path / 'tenant-b' / '111'), 'link']:
+        with pytest.raises(ValueError):
+            get_cur_path(account(escape))
+
+
+def test_discovery_skips_symbolic_links(tmp_path):
+    period = tmp_path / '20251101-20251201' / 'assembly'
+    period.mkdir(parents=True)
+    write_report(period / 'report-1.csv.gz', [])
+    secret = tmp_path / 'secret.csv'
+    secret.write_text('secret')
+    os.symlink(secret, period / 'report-2.csv')
+
+    periods = CURIngestService(db=None).discover_files(str(tmp_path))
+
+    assert [path for path, _ in periods['20251101-20251201']] == [str(period / 'report-1.csv.gz')]
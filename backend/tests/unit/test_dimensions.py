@@ -0,0 +1,29 @@
+from app.services.dimensions import encode_dimensions
+
+
+class FakeDimensionCache:
+    def __init__(self):
+        self.requested = []
+
+    def resolve(self, db, names):
+        self.requested.append(set(names))
+        return {name: index for index, name in enumerate(sorted(names), start=1)}
+
+
+def test_encode_dimensions_resolves_each_name_once():
+    services = FakeDimensionCache()
+    regions = FakeDimensionCache()
+    rows = [
+        {'service': 'Amazon S3', 'region': 'us-east-1'},
+        {'service': 'Amazon EC2', 'region': None},
+        {'service': 'Amazon S3', 'region': 'eu-west-1'},
+    ]
+
+    encode_dimensions(None, rows, {
+        'service_id': ('service', services),
+        'region_id': ('region', regions),
+    })
+
+    assert services.requested == [{'Amazon S3', 'Amazon EC2'}]
+    assert regions.requested == [{'us-east-1', 'eu-west-1'}]
+    assert [(row['service_id'], row['region_id']) for row in rows] == [(2, 2), (1, None), (2, 1)]
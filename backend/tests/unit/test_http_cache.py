@@ -0,0 +1,53 @@
+import uuid
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.deps import get_current_tenant
+from app.core.http_cache import NotModified, conditional_cost_get, not_modified_handler
+from app.models.tenant import Tenant
+
+
+def _client(tenant):
+    app = FastAPI()
+    app.add_exception_handler(NotModified, not_modified_handler)
+    app.dependency_overrides[get_current_tenant] = lambda: tenant
+    calls = []
+
+    @app.get("/costs/summary", dependencies=[Depends(conditional_cost_get)])
+    async def summary(start_date: str = None):
+        calls.append(start_date)
+        return {"total_cost": 1.0}
+
+    return TestClient(app), calls
+
+
+def test_matching_etag_answers_304_without_running_the_endpoint():
+    tenant = Tenant(id=uuid.uuid4(), cost_data_version=3)
+    client, calls = _client(tenant)
+
+    first = client.get("/costs/summary", params={"start_date": "2025-01-01"})
+    etag = first.headers["ETag"]
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    again = client.get("/costs/summary", params={"start_date": "2025-01-01"}, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+    assert again.content == b""
+    assert calls == ["2025-01-01"]
+
+
+def test_etag_changes_with_parameters_and_data_version():
+    tenant = Tenant(id=uuid.uuid4(), cost_data_version=3)
+    client, calls = _client(tenant)
+
+    etag = client.get("/costs/summary", params={"start_date": "2025-01-01"}).headers["ETag"]
+    other_range = client.get("/costs/summary", params={"start_date": "2025-02-01"}, headers={"If-None-Match": etag})
+    assert other_range.status_code == 200
+
+    tenant.cost_data_version += 1
+    reloaded = client.get("/costs/summary", params={"start_date": "2025-01-01"}, headers={"If-None-Match": etag})
+    assert reloaded.status_code == 200
+    assert reloaded.headers["ETag"] != etag
+    assert len(calls) == 3
@@ -0,0 +1,14 @@
+from app.services.job_queue import JobQueue
+
+
+def test_retry_delay_backs_off_exponentially_up_to_the_cap(monkeypatch):
+    from app.services import job_queue
+
+    monkeypatch.setattr(job_queue.settings, 'JOB_RETRY_BASE_SECONDS', 30)
+    monkeypatch.setattr(job_queue.settings, 'JOB_RETRY_MAX_SECONDS', 600)
+
+    delays = [JobQueue.retry_delay(attempts).total_seconds() for attempts in range(1, 7)]
+
+    # Jitter stays within +/-10% of 30s, 60s, 120s, 240s, 480s, then the 600s cap
+    for delay, expected in zip(delays, [30, 60, 120, 240, 480, 600]):
+        assert expected * 0.9 <= delay <= expected * 1.1
@@ -0,0 +1,18 @@
+from decimal import Decimal
+
+from app.core.money import from_micros, percentage, round_money, to_micros
+
+
+def test_to_micros_is_exact_for_cost_explorer_amounts():
+    assert to_micros('12.3456789') == 12345679
+    assert to_micros('0.0000005') == 0  # Half to even
+    assert to_micros(0.1) == 100000
+    assert sum(to_micros('0.1') for _ in range(10)) == to_micros('1')
+
+
+def test_round_money_and_percentage():
+    assert from_micros(Decimal(1234567)) == Decimal('1.234567')
+    assert round_money(1005000) == Decimal('1.01')
+    assert round_money(None) == Decimal('0.00')
+    assert percentage(1, 3) == 33.33
+    assert percentage(5, 0) == 0.0
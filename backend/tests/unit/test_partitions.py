@@ -0,0 +1,19 @@
+from datetime import date
+
+from app.services.partitions import add_months, months_between, parse_partition_name, partition_name
+
+
+def test_months_between_spans_year_boundary():
+    assert months_between(date(2025, 11, 15), date(2026, 1, 3)) == [
+        date(2025, 11, 1),
+        date(2025, 12, 1),
+        date(2026, 1, 1),
+    ]
+    assert months_between(date(2025, 11, 15), date(2025, 11, 30)) == [date(2025, 11, 1)]
+    assert add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+
+
+def test_partition_name_round_trip():
+    assert partition_name(date(2025, 3, 1)) == 'cost_data_p2025_03'
+    assert parse_partition_name('cost_data_p2025_03') == date(2025, 3, 1)
+    assert parse_partition_name('cost_data_staging') is None
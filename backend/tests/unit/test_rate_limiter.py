@@ -0,0 +1,110 @@
+import pytest
+from botocore.exceptions import ClientError
+
+from prometheus_client import REGISTRY, generate_latest
+
+from app.services.rate_limiter import CircuitOpenError, RateLimiterRegistry
+
+
+def throttling_error():
+    return ClientError(
+        {'Error': {'Code': 'LimitExceededException', 'Message': 'Rate exceeded'}},
+        'GetCostAndUsage'
+    )
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def make_registry(**overrides):
+    options = dict(
+        rate=1000.0,
+        burst=10.0,
+        min_rate=1.0,
+        failure_threshold=3,
+        reset_seconds=60.0,
+        max_throttle_retries=2
+    )
+    options.update(overrides)
+    return RateLimiterRegistry('test', **options)
+
+
+def test_throttled_call_backs_off_and_retries():
+    registry = make_registry()
+    responses = [throttling_error(), {'ResultsByTime': []}]
+
+    def get_cost_and_usage():
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    before = sample('aws_throttled_calls_total', limiter='test', operation='get_cost_and_usage')
+
+    assert registry.call('payer-a', get_cost_and_usage) == {'ResultsByTime': []}
+    assert registry.get('payer-a').rate == pytest.approx(500.1)
+    assert sample('aws_throttled_calls_total', limiter='test', operation='get_cost_and_usage') == before + 1
+
+
+def test_circuit_opens_after_repeated_failures():
+    registry = make_registry(max_throttle_retries=0)
+
+    def get_cost_forecast():
+        raise throttling_error()
+
+    trips_before = sample('aws_circuit_breaker_trips_total', limiter='test')
+
+    for _ in range(3):
+        with pytest.raises(ClientError):
+            registry.call('payer-b', get_cost_forecast)
+
+    with pytest.raises(CircuitOpenError):
+        registry.call('payer-b', get_cost_forecast)
+
+    assert registry.get('payer-b').state == 'open'
+    assert sample('aws_circuit_breaker_trips_total', limiter='test') == trips_before + 1
+    # Other payers are unaffected
+    assert registry.get('payer-c').state == 'closed'
+
+
+def test_circuit_closes_after_successful_trial():
+    registry = make_registry(max_throttle_retries=0, failure_threshold=1, reset_seconds=0.01)
+
+    with pytest.raises(ClientError):
+        registry.call('payer-d', lambda: (_ for _ in ()).throw(throttling_error()))
+
+    limiter = registry.get('payer-d')
+    limiter._opened_at -= 1
+
+    assert limiter.state == 'half_open'
+    assert registry.call('payer-d', lambda: 'ok') == 'ok'
+    assert limiter.state == 'closed'
+
+
+def test_client_errors_do_not_trip_circuit():
+    registry = make_registry(failure_threshold=1)
+    access_denied = ClientError({'Error': {'Code': 'AccessDeniedException'}}, 'GetCostAndUsage')
+
+    def get_cost_and_usage():
+        raise access_denied
+
+    for _ in range(3):
+        with pytest.raises(ClientError):
+            registry.call('payer-e', get_cost_and_usage)
+
+    assert registry.get('payer-e').state == 'closed'
+
+
+def test_metrics_count_payers_without_naming_them():
+    registry = make_registry(max_throttle_retries=0, failure_threshold=1)
+
+    with pytest.raises(ClientError):
+        registry.call('123456789012', lambda: (_ for _ in ()).throw(throttling_error()))
+    registry.call('210987654321', lambda: 'ok')
+
+    assert sample('aws_rate_limit_reduced_payers', limiter='test') == 1
+    assert sample('aws_circuit_breaker_open_payers', limiter='test') == 1
+    exposition = generate_latest().decode()
+    assert '123456789012' not in exposition
+    assert 'payer=' not in exposition
@@ -0,0 +1,143 @@
+from decimal import Decimal
+import threading
+
+from app.services import result_cache
+from app.services.result_cache import (
+    CostResultCache, MemoryCacheBackend, RedisCacheBackend, cached_result, dumps, loads
+)
+
+
+class VersionedDb:
+    """Session stand-in answering the cost_data_version lookup"""
+
+    def __init__(self):
+        self.version = 0
+
+    def execute(self, *args, **kwargs):
+        return self
+
+    def scalar(self):
+        return self.version
+
+
+class Reports:
+    def __init__(self, db):
+        self.db = db
+        self.calls = 0
+
+    @cached_result(bypass=['timings'])
+    async def get_report(self, tenant_id, start, end=None, timings=None):
+        self.calls += 1
+        return {"total_cost": Decimal("12.30"), "start": start}
+
+
+def test_results_round_trip_decimals():
+    value = {"total_cost": Decimal("1.05"), "breakdown": [{"cost": Decimal("0.10"), "tags": {"Team": None}}]}
+
+    assert loads(dumps(value)) == value
+
+
+async def test_cache_hits_until_the_data_version_changes(monkeypatch):
+    monkeypatch.setattr(result_cache, "cost_result_cache", CostResultCache(MemoryCacheBackend(100)))
+    reports = Reports(VersionedDb())
+
+    first = await reports.get_report("tenant", "2025-01-01")
+    # Keyword and positional arguments normalize to the same key
+    second = await reports.get_report(tenant_id="tenant", start="2025-01-01", end=None)
+    assert first == second == {"total_cost": Decimal("12.30"), "start": "2025-01-01"}
+    assert reports.calls == 1
+
+    await reports.get_report("tenant", "2025-02-01")
+    await reports.get_report("other-tenant", "2025-01-01")
+    assert reports.calls == 3
+
+    reports.db.version += 1
+    await reports.get_report("tenant", "2025-01-01")
+    assert reports.calls == 4
+
+
+async def test_bypass_arguments_skip_the_cache(monkeypatch):
+    monkeypatch.setattr(result_cache, "cost_result_cache", CostResultCache(MemoryCacheBackend(100)))
+    reports = Reports(VersionedDb())
+
+    await reports.get_report("tenant", "2025-01-01", timings={})
+    await reports.get_report("tenant", "2025-01-01", timings={})
+    assert reports.calls == 2
+
+
+class FlakyRedis:
+    """Redis client stand-in recording the calling threads, down while `down` is set"""
+
+    def __init__(self):
+        self.down = False
+        self.entries = {}
+        self.threads = set()
+
+    def get(self, key):
+        self.threads.add(threading.get_ident())
+        if self.down:
+            raise ConnectionError("Connection refused")
+        return self.entries.get(key)
+
+    def set(self, key, payload, ex=None):
+        self.threads.add(threading.get_ident())
+        if self.down:
+            raise ConnectionError("Connection refused")
+        self.entries[key] = payload.encode()
+
+
+async def test_redis_is_retried_after_falling_back_to_the_lru(monkeypatch):
+    now = [1000.0]
+    redis_backend = RedisCacheBackend(FlakyRedis())
+    backends = [MemoryCacheBackend(100), MemoryCacheBackend(100), redis_backend]
+    monkeypatch.setattr(result_cache.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(result_cache, "create_backend", lambda: backends.pop(0))
+    monkeypatch.setattr(result_cache.settings, "COST_CACHE_BACKEND", "redis")
+    monkeypatch.setattr(result_cache.settings, "COST_CACHE_REDIS_RETRY_SECONDS", 30)
+    cache = CostResultCache()
+
+    fallback = await cache.resolve_backend()
+    assert isinstance(fallback, MemoryCacheBackend)
+    now[0] += 29
+    assert await cache.resolve_backend() is fallback
+    assert len(backends) == 2
+
+    # Redis still down: the LRU in use is kept with its entries
+    now[0] += 1
+    assert await cache.resolve_backend() is fallback
+    assert len(backends) == 1
+
+    now[0] += 30
+    assert await cache.resolve_backend() is redis_backend
+    now[0] += 3600
+    assert await cache.resolve_backend() is redis_backend
+
+
+async def test_redis_failing_at_runtime_falls_back_to_the_lru(monkeypatch):
+    now = [1000.0]
+    client = FlakyRedis()
+    monkeypatch.setattr(result_cache.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(result_cache, "create_backend", lambda: RedisCacheBackend(client))
+    monkeypatch.setattr(result_cache.settings, "COST_CACHE_REDIS_RETRY_SECONDS", 30)
+    cache = CostResultCache(RedisCacheBackend(client))
+    monkeypatch.setattr(result_cache, "cost_result_cache", cache)
+    reports = Reports(VersionedDb())
+
+    await reports.get_report("tenant", "2025-01-01")
+    await reports.get_report("tenant", "2025-01-01")
+    assert reports.calls == 1
+    assert client.entries
+    # Round trips never block the event loop
+    assert threading.get_ident() not in client.threads
+
+    client.down = True
+    await reports.get_report("tenant", "2025-02-01")
+    assert isinstance(await cache.resolve_backend(), MemoryCacheBackend)
+    await reports.get_report("tenant", "2025-02-01")
+    assert reports.calls == 2
+
+    client.down = False
+    now[0] += 30
+    assert isinstance(await cache.resolve_backend(), RedisCacheBackend)
+    await reports.get_report("tenant", "2025-01-01")
+    assert reports.calls == 2
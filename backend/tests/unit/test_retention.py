@@ -0,0 +1,14 @@
+from datetime import date
+
+from app.models.tenant import Tenant
+from app.services.retention import retention_cutoff
+
+
+def test_retention_cutoff_follows_plan_and_override():
+    today = date(2025, 11, 17)
+
+    # Free keeps 3 months besides the current one
+    assert retention_cutoff(Tenant(subscription_plan="free"), today) == date(2025, 8, 1)
+    assert retention_cutoff(Tenant(subscription_plan="pro"), today) == date(2024, 10, 1)
+    assert retention_cutoff(Tenant(subscription_plan="enterprise"), today) is None
+    assert retention_cutoff(Tenant(subscription_plan="enterprise", cost_retention_months=6), today) == date(2025, 5, 1)
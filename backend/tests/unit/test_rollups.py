@@ -0,0 +1,97 @@
+from datetime import date, timedelta
+
+from app.services.rollups import PERIOD_DAILY, PERIOD_MONTHLY, PERIOD_WEEKLY, merge_ranges, month_end, plan_rollup_ranges
+
+
+def _covered_days(plan):
+    days = []
+    for month in plan.periods[PERIOD_MONTHLY]:
+        days += [month + timedelta(days=i) for i in range((month_end(month) - month).days + 1)]
+    for week in plan.periods[PERIOD_WEEKLY]:
+        days += [week + timedelta(days=i) for i in range(7)]
+    for start, end in plan.daily_ranges + plan.raw_ranges:
+        days += [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    return sorted(days)
+
+
+def test_plan_covers_range_exactly_once():
+    start, end = date(2025, 1, 15), date(2025, 12, 20)
+    plan = plan_rollup_ranges(start, end)
+
+    assert _covered_days(plan) == [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    assert plan.periods[PERIOD_MONTHLY] == [date(2025, month, 1) for month in range(2, 12)]
+    # Weeks never cross the month boundary or the range edges
+    assert plan.periods[PERIOD_WEEKLY] == [date(2025, 1, 20), date(2025, 12, 1), date(2025, 12, 8)]
+    assert plan.raw_ranges == [
+        (date(2025, 1, 15), date(2025, 1, 19)),
+        (date(2025, 1, 27), date(2025, 1, 31)),
+        (date(2025, 12, 15), date(2025, 12, 20)),
+    ]
+
+
+def test_plan_whole_months_need_no_raw_days():
+    plan = plan_rollup_ranges(date(2025, 1, 1), date(2025, 12, 31))
+
+    assert len(plan.periods[PERIOD_MONTHLY]) == 12
+    assert plan.periods[PERIOD_WEEKLY] == []
+    assert plan.raw_ranges == []
+
+
+def test_plan_short_range_reads_raw_days():
+    # Wednesday to Sunday, not a whole week
+    assert plan_rollup_ranges(date(2025, 11, 5), date(2025, 11, 9)).raw_ranges == [
+        (date(2025, 11, 5), date(2025, 11, 9))
+    ]
+    assert plan_rollup_ranges(date(2025, 11, 9), date(2025, 11, 5)).raw_ranges == []
+
+
+def test_plan_reads_dirty_weeks_raw():
+    start, end = date(2025, 1, 1), date(2025, 3, 31)
+    plan = plan_rollup_ranges(start, end, dirty=[(date(2025, 2, 12), date(2025, 2, 13))])
+
+    assert _covered_days(plan) == [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    assert plan.periods[PERIOD_MONTHLY] == [date(2025, 1, 1), date(2025, 3, 1)]
+    # February keeps its clean weeks; the dirty week joins the raw days
+    assert plan.periods[PERIOD_WEEKLY] == [date(2025, 2, 3), date(2025, 2, 17)]
+    assert (date(2025, 2, 10), date(2025, 2, 16)) in plan.raw_ranges
+
+
+def test_merge_ranges_joins_overlapping_and_adjacent():
+    assert merge_ranges([
+        (date(2025, 1, 5), date(2025, 1, 6)),
+        (date(2025, 1, 1), date(2025, 1, 3)),
+        (date(2025, 1, 4), date(2025, 1, 4)),
+        (date(2025, 1, 10), date(2025, 1, 12)),
+    ]) == [(date(2025, 1, 1), date(2025, 1, 6)), (date(2025, 1, 10), date(2025, 1, 12))]
+
+
+def test_plan_reads_downsampled_months_whole():
+    plan = plan_rollup_ranges(date(2025, 1, 10), date(2025, 3, 12), downsampled_before=date(2025, 3, 1))
+
+    assert plan.periods[PERIOD_MONTHLY] == [date(2025, 1, 1), date(2025, 2, 1)]
+    assert plan.periods[PERIOD_WEEKLY] == [date(2025, 3, 3)]
+    assert plan.raw_ranges == [(date(2025, 3, 1), date(2025, 3, 2)), (date(2025, 3, 10), date(2025, 3, 12))]
+
+
+def test_plan_weeks_stop_at_month_boundary_without_whole_month():
+    plan = plan_rollup_ranges(date(2025, 3, 6), date(2025, 4, 20))
+
+    # The ISO week of March 31 crosses into April, so its days are read raw
+    assert plan.periods[PERIOD_WEEKLY] == [
+        date(2025, 3, 10), date(2025, 3, 17), date(2025, 3, 24), date(2025, 4, 7), date(2025, 4, 14)
+    ]
+    assert plan.raw_ranges == [(date(2025, 3, 6), date(2025, 3, 9)), (date(2025, 3, 31), date(2025, 4, 6))]
+
+
+def test_plan_coarsest_caps_period_size():
+    start, end = date(2025, 1, 1), date(2025, 3, 31)
+    dirty = [(date(2025, 2, 12), date(2025, 2, 13))]
+
+    weekly = plan_rollup_ranges(start, end, dirty, coarsest=PERIOD_WEEKLY)
+    assert weekly.periods[PERIOD_MONTHLY] == []
+    assert date(2025, 1, 27) in weekly.periods[PERIOD_WEEKLY]
+    assert _covered_days(weekly) == [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+    daily = plan_rollup_ranges(start, end, dirty, coarsest=PERIOD_DAILY)
+    assert daily.daily_ranges == [(date(2025, 1, 1), date(2025, 2, 11)), (date(2025, 2, 14), date(2025, 3, 31))]
+    assert daily.raw_ranges == dirty
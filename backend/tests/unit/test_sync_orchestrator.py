@@ -0,0 +1,100 @@
+import asyncio
+import uuid
+from collections import Counter
+
+from app.models import AWSAccount, CloudAccount
+from app.models.cloud_account import CloudProvider
+from app.services.sync_orchestrator import SyncOrchestrator
+
+
+class FakeQuery:
+    """Query stand-in applying equality filters to in-memory rows"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, condition):
+        # `column == True` compiles to a constant without a value
+        value = getattr(condition.right, "value", True)
+        return FakeQuery([row for row in self.rows if getattr(row, condition.left.key) == value])
+
+    def all(self):
+        return self.rows
+
+
+class FakeDb:
+    def __init__(self, *rows):
+        self.rows = rows
+
+    def query(self, model):
+        return FakeQuery([row for row in self.rows if isinstance(row, model)])
+
+
+def _aws_account(tenant_id, account_id, is_active=True):
+    return AWSAccount(id=uuid.uuid4(), tenant_id=tenant_id, account_id=account_id, is_active=is_active)
+
+
+def _cloud_account(tenant_id, provider, account_id):
+    return CloudAccount(id=uuid.uuid4(), tenant_id=tenant_id, provider=provider, account_id=account_id, is_active=True)
+
+
+def test_discovery_covers_linked_cloud_accounts_and_skips_the_rest():
+    tenant_id, other_tenant_id = uuid.uuid4(), uuid.uuid4()
+    synced = _aws_account(tenant_id, "111111111111")
+    db = FakeDb(
+        synced,
+        _aws_account(tenant_id, "222222222222", is_active=False),
+        _aws_account(other_tenant_id, "333333333333"),
+        # Synced through its AWSAccount, so not listed twice
+        _cloud_account(tenant_id, CloudProvider.AWS, "111111111111"),
+        _cloud_account(tenant_id, CloudProvider.AWS, "444444444444"),
+        _cloud_account(tenant_id, CloudProvider.AZURE, "subscription")
+    )
+
+    targets = SyncOrchestrator().discover_accounts(db, tenant_id)
+
+    assert [(target["account_id"], target["skip_reason"]) for target in targets] == [
+        ("111111111111", None),
+        ("444444444444", "No linked AWS account for this cloud account"),
+        ("subscription", "Cost sync not supported for AZURE yet")
+    ]
+    assert targets[0]["id"] == str(synced.id)
+    assert len(SyncOrchestrator().discover_accounts(db)) == 4
+
+
+async def test_sync_all_bounds_concurrency_globally_and_per_tenant(monkeypatch):
+    targets = [
+        {
+            "id": f"{tenant}-{index}",
+            "tenant_id": tenant,
+            "account_id": f"{tenant}-{index}",
+            "account_name": None,
+            "provider": "aws",
+            "skip_reason": "Not supported" if index == 9 else None
+        }
+        for tenant in ("a", "b", "c")
+        for index in range(10)
+    ]
+    running = Counter()
+    peaks = Counter()
+
+    async def sync_account(self, target, start_date, end_date, full_refresh, executor):
+        running[target["tenant_id"]] += 1
+        running["all"] += 1
+        for key in (target["tenant_id"], "all"):
+            peaks[key] = max(peaks[key], running[key])
+        await asyncio.sleep(0.001)
+        running[target["tenant_id"]] -= 1
+        running["all"] -= 1
+        self._update(target, status="success")
+
+    monkeypatch.setattr(SyncOrchestrator, "_discover_in_session", lambda self, tenant_id: targets)
+    monkeypatch.setattr(SyncOrchestrator, "_sync_account", sync_account)
+
+    summary = await SyncOrchestrator(max_concurrency=4, max_per_tenant=2).sync_all()
+
+    assert peaks["all"] == 4
+    assert max(peaks[tenant] for tenant in "abc") == 2
+    assert summary["total_accounts"] == 30
+    assert summary["succeeded"] == 27
+    assert summary["skipped"] == 3